@@ -0,0 +1,113 @@
+"""프레임당 메모리 할당/RSS 변동: 풀 버퍼(FramePool + dst=) vs 매 프레임 새 배열
+한 프레임 = 운전자 ROI 전처리(limit_size + enhance) + 페달 추적 2회 + 대시보드 + 경고 오버레이
+
+    python benchmarks/bench_alloc.py [--frames 300] [--font PATH] [--check]
+
+측정: 프레임당 임시 할당 MB(tracemalloc 최고치), minor page fault(큰 배열 mmap/해제), GC 횟수,
+RSS 최소~최대 폭, 프레임 시간 p50/p99/max, 워밍업 뒤 풀 재할당 수.
+--check: 풀 경로가 워밍업 뒤 재할당하거나 프레임당 임시 할당이 --max-mb를 넘으면 종료 코드 1
+"""
+import os, sys, gc, time, argparse, resource, tracemalloc
+import numpy as np, cv2 as cv
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+def legacy_overlay(img, color, alpha):
+    """기존 draw_fullscreen_overlay_center_text의 반투명 부분 (전체 복사 + 사각형 + addWeighted)"""
+    overlay = img.copy()
+    cv.rectangle(overlay, (0, 0), (img.shape[1], img.shape[0]), color, -1)
+    cv.addWeighted(img, 1 - alpha, overlay, alpha, 0, img)
+
+def make_frame_fn(pooled, driver, pedal, with_ui):
+    from common.framepool import FramePool
+    from common.helpers import enhance_frame_for_face_detection, limit_size
+    from vision.pedal_tracker import PedalTracker
+    infer_pool, render_pool = (FramePool("infer"), FramePool("render")) if pooled else (None, None)
+    tracker = PedalTracker(); tracker.pool = FramePool("pedal", reuse=pooled)
+    tracker.calibrate_brake_simple(pedal[0])
+    pools = [p for p in (infer_pool, render_pool, tracker.pool) if p is not None]
+    if with_ui:
+        from ui.dashboard import render_dashboard_exact
+        from ui.overlay import draw_fullscreen_overlay_center_text
+        from ui.utils import put_korean_center_text
+        hr = 70 + 5 * np.sin(np.arange(600) / 20.0); br = 15 + 2 * np.sin(np.arange(600) / 50.0)
+
+    def frame(i):
+        f = driver[i % len(driver)]
+        h = 300 + (i * 7) % 120                        # 얼굴 ROI 크기가 프레임마다 바뀜
+        roi = f[120:120 + h, 400:400 + h]
+        rgb = enhance_frame_for_face_detection(limit_size(roi, 640, infer_pool), rgb=True, pool=infer_pool)
+        for k in range(2):                             # 페달 60fps = 운전자 프레임당 2장
+            view, _ = tracker.update(pedal[(2 * i + k) % len(pedal)], i / 30.0)
+        if not with_ui: return rgb
+        out = render_pool.ring("dash", (768, 1366, 3), n=4) if pooled else None
+        dash = render_dashboard_exact(f, view, 3000, 80, 40, i % 100, 72, 15, hr, br, W=1366, H=768,
+                                      fsr_pressed=True, out=out, pool=render_pool)
+        if pooled: draw_fullscreen_overlay_center_text(dash, "졸음운전이 감지되었습니다.", (0, 255, 255), alpha=0.45)
+        else:
+            legacy_overlay(dash, (0, 255, 255), 0.45)
+            put_korean_center_text(dash, "졸음운전이 감지되었습니다.", font_size=57, stroke=3)
+        return dash
+    return frame, pools
+
+def measure(label, frame, pools, n, warmup):
+    for i in range(warmup): frame(i)
+    allocs0 = sum(p.allocs for p in pools)
+
+    # 1) 시간/페이지 폴트/GC/RSS (tracemalloc 없이)
+    gcs = [0]; cb = lambda phase, info: gcs.__setitem__(0, gcs[0] + (phase == "start"))
+    gc.callbacks.append(cb)
+    times, rss = np.empty(n), []
+    flt0 = resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+    for i in range(n):
+        t0 = time.perf_counter(); frame(warmup + i); times[i] = time.perf_counter() - t0
+        if i % 10 == 0: rss.append(rss_mb())
+    flt = resource.getrusage(resource.RUSAGE_SELF).ru_minflt - flt0
+    gc.callbacks.remove(cb)
+
+    # 2) 프레임당 임시 할당량 (tracemalloc: numpy/OpenCV 출력 배열 포함)
+    tracemalloc.start()
+    peaks = []
+    for i in range(min(n, 100)):
+        base = tracemalloc.get_traced_memory()[0]; tracemalloc.reset_peak()
+        frame(warmup + n + i)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    realloc = sum(p.allocs for p in pools) - allocs0 if all(p.reuse for p in pools) and pools else None
+
+    ms = times * 1e3
+    print(f"{label:<8s} alloc {np.mean(peaks)/1e6:7.2f} MB/frame   page faults {flt/n:7.1f}/frame   gc {gcs[0]:4d}   "
+          f"RSS {min(rss):6.1f}~{max(rss):6.1f} MB   frame p50 {np.percentile(ms, 50):6.2f} p99 {np.percentile(ms, 99):6.2f} "
+          f"max {ms.max():6.2f} ms" + ("" if realloc is None else f"   pool reallocs {realloc} ({sum(p.nbytes for p in pools)/1e6:.1f} MB held)"))
+    return np.mean(peaks) / 1e6, realloc
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=300)
+    ap.add_argument("--warmup", type=int, default=30)
+    ap.add_argument("--font", help="한글 폰트 경로 (없으면 대시보드/오버레이 제외)")
+    ap.add_argument("--check", action="store_true")
+    ap.add_argument("--max-mb", type=float, default=0.5, help="--check: 풀 경로 프레임당 임시 할당 한도")
+    args = ap.parse_args()
+    if args.font: os.environ["KOREAN_FONT_PATH"] = args.font   # ui.utils import 전에 설정
+
+    from sensors.camera import SyntheticCamera
+    from ui.utils import KOREAN_FONT_PATH
+    with_ui = os.path.exists(KOREAN_FONT_PATH)
+    if not with_ui: print("[bench_alloc] Korean font not found (--font); dashboard/overlay excluded")
+    dcam, pcam = SyntheticCamera("driver", fps=1e6), SyntheticCamera("pedal", fps=1e6)
+    driver = [dcam.read()[1] for _ in range(8)]
+    pedal = [pcam._draw(i / 60.0) for i in range(240)]
+
+    print(f"{args.frames} frames (+{args.warmup} warmup), driver 1280x720 ROI + 2 pedal 640x480"
+          + (" + dashboard 1366x768 + alert overlay" if with_ui else ""))
+    measure("legacy", *make_frame_fn(False, driver, pedal, with_ui), args.frames, args.warmup)
+    mb, realloc = measure("pooled", *make_frame_fn(True, driver, pedal, with_ui), args.frames, args.warmup)
+    if args.check and (realloc or mb > args.max_mb):
+        print(f"[bench_alloc] FAIL: pooled path reallocs={realloc}, {mb:.2f} MB/frame (limit {args.max_mb})"); sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""운전자 카메라 캡처 + FaceMesh 입력 준비: 기존 경로 vs 캡처 프로파일 (CAPTURE_PROFILES)
+  기존: 1280x720 BGR (videoconvert) → cv.flip → enhance(BGR) → BGR→RGB
+  신규: 프로파일 출력 크기/형식, 뒤집기는 파이프라인 → limit_size(infer_max) → enhance(rgb=True)
+
+    python benchmarks/bench_capture.py [--frames 300] [--source auto|videotestsrc|file] [--nvmm]
+
+videotestsrc는 OpenCV가 GStreamer로 빌드된 경우(Jetson). 아니면 합성 MJPG 파일(FFmpeg)로 대체하며,
+이때 축소/흑백 변환은 TransformedCapture가 CPU에서 하므로 Jetson(nvvidconv) 대비 신규 경로에 불리한 측정임.
+"""
+import os, sys, time, tempfile, argparse
+import numpy as np, cv2 as cv
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sensors.camera import CAPTURE_PROFILES, SyntheticCamera, TransformedCapture
+from common.helpers import enhance_frame_for_face_detection, limit_size
+
+def has_gstreamer():
+    return any("GStreamer" in l and "YES" in l for l in cv.getBuildInformation().splitlines())
+
+def test_pipeline(n, out_w, out_h, fmt, flip, nvmm):
+    """videotestsrc 1280x720 NV12 → (뒤집기) → 축소 → 형식 변환 → appsink"""
+    src = f"videotestsrc num-buffers={n} pattern=ball ! video/x-raw, width=1280, height=720, format=NV12, framerate=120/1 ! "
+    if nvmm:   # Jetson: 하드웨어 변환기
+        conv = (f"nvvidconv flip-method={4 if flip else 0} ! video/x-raw, width={out_w}, height={out_h}, "
+                + ("format=GRAY8 ! " if fmt == "GRAY8" else "format=BGRx ! videoconvert ! video/x-raw, format=BGR ! "))
+    else:
+        conv = (("videoflip method=horizontal-flip ! " if flip else "") +
+                f"videoscale ! video/x-raw, width={out_w}, height={out_h} ! videoconvert ! video/x-raw, format={fmt} ! ")
+    return cv.VideoCapture(src + conv + "appsink sync=false", cv.CAP_GSTREAMER)
+
+def synth_file(n, path):
+    cam = SyntheticCamera("driver", fps=1e6)
+    w = cv.VideoWriter(path, cv.VideoWriter_fourcc(*"MJPG"), 30, (cam.width, cam.height))
+    for _ in range(n): w.write(cam.read()[1])
+    w.release()
+
+def run(label, cap, n, prep):
+    t_read = t_prep = 0.0; got = 0
+    for _ in range(n):
+        t0 = time.perf_counter(); ok, f = cap.read(); t1 = time.perf_counter()
+        if not ok: break
+        rgb = prep(f); t2 = time.perf_counter()
+        t_read += t1 - t0; t_prep += t2 - t1; got += 1
+    cap.release()
+    if not got: print(f"{label:<34s} no frames"); return
+    print(f"{label:<34s} {got/(t_read+t_prep):7.1f} fps   capture {t_read/got*1e3:6.2f} ms  prep {t_prep/got*1e3:6.2f} ms"
+          f"   FaceMesh input {rgb.shape[1]}x{rgb.shape[0]}")
+
+def legacy_prep(f):
+    f = cv.flip(f, 1)
+    return cv.cvtColor(enhance_frame_for_face_detection(f), cv.COLOR_BGR2RGB)
+
+def profile_prep(profile):
+    return lambda f: enhance_frame_for_face_detection(limit_size(f, profile.infer_max), rgb=True)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=300)
+    ap.add_argument("--source", choices=("auto", "videotestsrc", "file"), default="auto")
+    ap.add_argument("--nvmm", action="store_true", help="videotestsrc 경로에서 nvvidconv 사용 (Jetson)")
+    args = ap.parse_args()
+    n = args.frames
+    source = args.source if args.source != "auto" else ("videotestsrc" if has_gstreamer() else "file")
+    print(f"source: {source}, {n} frames, 1280x720 input")
+
+    if source == "videotestsrc":
+        # 기존: flip-method=4 + cv.flip (서로 상쇄) → 신규: 뒤집기 없음
+        run("legacy 1280x720 BGR + cv.flip", test_pipeline(n, 1280, 720, "BGR", True, args.nvmm), n, legacy_prep)
+        for name, p in CAPTURE_PROFILES.items():
+            cap = test_pipeline(n, *p.output, "GRAY8" if p.gray else "BGR", p.flip_method == 4, args.nvmm)
+            run(f"profile {name} {p.output[0]}x{p.output[1]}{' GRAY8' if p.gray else ''}", cap, n, profile_prep(p))
+        return
+
+    path = os.path.join(tempfile.gettempdir(), "bench_capture.avi")
+    if not os.path.exists(path): synth_file(n, path)
+    run("legacy 1280x720 BGR + cv.flip", cv.VideoCapture(path), n, legacy_prep)
+    for name, p in CAPTURE_PROFILES.items():
+        run(f"profile {name} {p.output[0]}x{p.output[1]}{' GRAY8' if p.gray else ''}",
+            TransformedCapture(cv.VideoCapture(path), p), n, profile_prep(p))
+
+if __name__ == "__main__":
+    main()
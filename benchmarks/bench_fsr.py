@@ -0,0 +1,64 @@
+"""FSR 발 뗌 감지 지연: 기존 폴링(단발 변환 2회 + check_interval 대기) vs 연속 변환 + 디바운스 (FakeADC)
+
+    python benchmarks/bench_fsr.py [--cycles 40] [--budget-ms 5]
+
+상한(bound) = 공칭 지연 + 고정 스케줄링 예산 (FSRMonitor.max_release_latency).
+지연이 상한을 넘거나(release_overruns 포함), 뗌을 놓치거나, 떨림(추가 상태 전환)이 있으면 종료 코드 1.
+마지막 "no hysteresis" 줄은 비교용 (떨림이 나는 게 정상, 종료 코드에 반영 안 함)
+"""
+import os, sys, time, random, argparse, threading
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sensors.fsr import FSRMonitor, FakeADC, SCHED_BUDGET
+
+def run(label, cycles, budget, contrast=False, **kw):
+    adc = FakeADC(data_rate=475, continuous=kw.pop("continuous"), noise=kw.pop("noise", 0.0))
+    mon = FSRMonitor(chan=adc, sched_budget=budget, **kw)
+    events, released = [], threading.Event()
+    def on_change(pressed, ts):
+        events.append((pressed, ts))
+        if not pressed: released.set()
+    mon.on_change = on_change
+    mon.start()
+    rng = random.Random(0)
+    lat, misses = [], 0
+    try:
+        for _ in range(cycles):
+            adc.press(); time.sleep(rng.uniform(0.15, 0.3))
+            n = len(events); released.clear()
+            adc.release(); t_rel = time.monotonic()
+            released.wait(1.0)       # 폴링하지 않고 대기 (샘플 스레드와 GIL 경합 최소화)
+            rel = [ts for p, ts in events[n:] if not p]
+            if rel: lat.append(rel[0] - t_rel)
+            else: misses += 1
+            time.sleep(rng.uniform(0.05, 0.15))
+    finally:
+        mon.stop()
+    lat = np.array(lat) * 1e3
+    spurious = max(0, len(events) - 2 * cycles)      # 눌림/뗌 1회씩 외의 상태 전환 (떨림)
+    bound = mon.max_release_latency * 1e3
+    over = int(np.count_nonzero(lat > bound))
+    ok = len(lat) and not over and not mon.release_overruns and not misses and not spurious
+    print(f"{label:<36s} release latency p50 {np.percentile(lat,50):6.1f} ms  p99 {np.percentile(lat,99):6.1f} ms"
+          f"  max {lat.max():6.1f} ms  (bound {bound:.1f} ms = {mon.nominal_release_latency*1e3:.1f} nominal"
+          f" + {budget*1e3:g} budget; over {over}, overruns {mon.release_overruns}, samples late {mon.samples_late},"
+          f" worst late {mon.worst_late*1e3:.1f} ms, missed {misses}, spurious {spurious})"
+          + ("  (contrast)" if contrast else "" if ok else "  FAIL"))
+    return ok or contrast
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cycles", type=int, default=40)
+    ap.add_argument("--budget-ms", type=float, default=SCHED_BUDGET * 1e3, help="스케줄링 예산 (상한 = 공칭 + 예산)")
+    args = ap.parse_args()
+    b = args.budget_ms / 1e3
+    ok = [run("legacy-like: single-shot, 50ms poll", args.cycles, b, continuous=False, check_interval=0.05,
+              hysteresis=0, debounce=0.0),
+          run("continuous 475 SPS, debounce 20ms", args.cycles, b, continuous=True, debounce=0.02),
+          run("continuous + noise, debounce 20ms", args.cycles, b, continuous=True, debounce=0.02, noise=500),
+          run("continuous + noise, no hysteresis", args.cycles, b, contrast=True, continuous=True, debounce=0.0,
+              hysteresis=0, noise=500)]
+    if not all(ok): sys.exit(1)
+
+if __name__ == "__main__":
+    main()
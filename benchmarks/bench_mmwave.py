@@ -0,0 +1,77 @@
+"""mmWave 파서 처리량: 기존 바이트 단위 상태기계 vs MmWaveFrameParser (합성 바이트 스트림)
+
+    python benchmarks/bench_mmwave.py [--frames 20000] [--chunk 64]
+"""
+import os, sys, time, struct, argparse
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sensors.mmwave import (MmWaveFrameParser, build_frame, _cksum, SOF_BYTE, FRAME_HEADER_SIZE,
+                            TYPE_HEART_RATE, TYPE_BREATH_RATE)
+
+def synth_stream(n_frames, noise=0.05, seed=0):
+    """심박/호흡 프레임 + 사이사이 잡음 바이트(SOF 포함)"""
+    rng = np.random.default_rng(seed)
+    parts = []
+    for i in range(n_frames):
+        dtype = TYPE_HEART_RATE if i % 2 == 0 else TYPE_BREATH_RATE
+        parts.append(build_frame(dtype, struct.pack('<f', float(rng.uniform(10, 90))), i & 0xFFFF))
+        if rng.random() < noise: parts.append(rng.integers(0, 4, rng.integers(1, 12), dtype=np.uint8).tobytes())
+    return b"".join(parts)
+
+class _ByteSerial:
+    """read(n)만 흉내내는 직렬 포트"""
+    def __init__(self, data): self.data, self.pos = data, 0
+    def read(self, n=1):
+        b = self.data[self.pos:self.pos+n]; self.pos += len(b); return b
+
+def legacy_parse(ser):
+    """기존 _read_loop/_process_frame 로직 (ser.read(1) + 바이트별 상태기계)"""
+    frames, buf, started = [], bytearray(), False
+    while True:
+        b = ser.read(1)
+        if not b: break
+        b = b[0]
+        if not started and b == SOF_BYTE:
+            started = True; buf.clear(); buf.append(b)
+        elif started:
+            buf.append(b)
+            if len(buf) >= FRAME_HEADER_SIZE:
+                data_len = (buf[3] << 8) | buf[4]
+                if data_len > 200: started = False; continue
+                if len(buf) >= FRAME_HEADER_SIZE + data_len + 1:
+                    hdr = buf[:FRAME_HEADER_SIZE]; payload = buf[FRAME_HEADER_SIZE:-1]
+                    if _cksum(hdr[:FRAME_HEADER_SIZE-1]) == hdr[7] and _cksum(payload) == buf[-1]:
+                        frames.append(((hdr[5] << 8) | hdr[6], bytes(payload)))
+                    started = False
+    return frames
+
+def chunked_parse(data, chunk):
+    p, frames = MmWaveFrameParser(), []
+    for i in range(0, len(data), chunk): frames += p.feed(data[i:i+chunk])
+    return frames
+
+def _bench(fn, repeat=3):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t = time.perf_counter(); out = fn(); best = min(best, time.perf_counter() - t)
+    return best, out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=20000)
+    ap.add_argument("--chunk", type=int, default=64, help="read 1회당 바이트 수 (in_waiting)")
+    args = ap.parse_args()
+    data = synth_stream(args.frames)
+    print(f"stream: {len(data)} bytes, {args.frames} frames")
+
+    t_old, f_old = _bench(lambda: legacy_parse(_ByteSerial(data)))
+    print(f"legacy  per-byte     : {len(f_old)/t_old:10.0f} frames/s  ({len(data)/t_old/1e6:.2f} MB/s)")
+    for chunk in sorted({args.chunk, 16, 256, 4096}):
+        t_new, f_new = _bench(lambda: chunked_parse(data, chunk))
+        print(f"chunked chunk={chunk:<5d}   : {len(f_new)/t_new:10.0f} frames/s  ({len(data)/t_new/1e6:.2f} MB/s)"
+              f"  x{t_old/t_new:.1f}")
+    # 115200 baud ≈ 11.5 KB/s
+    print(f"line rate 115200 baud: {115200/10/len(data)*args.frames:.0f} frames/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""OBD PID 처리량: PID 하나씩 요청 vs 한 요청에 여러 PID (FakeELM327, 요청당 지연 + 전송 시간 모사)
+
+    python benchmarks/bench_obd.py [--seconds 3] [--latency 0.03] [--baud 38400]
+"""
+import os, sys, time, argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sensors.obd_client import OBDClient, FakeELM327, PID_RPM, PID_SPEED, PID_ACCEL_D
+
+def run(label, seconds, latency, baud, multi_pid):
+    elm = FakeELM327(baudrate=baud, latency=latency, multi_pid=multi_pid)
+    # 최대 처리량 측정: 모든 PID를 계속 기한 상태로
+    cli = OBDClient(ser=elm, rates={PID_RPM: (1000, 1000), PID_SPEED: (1000, 1000), PID_ACCEL_D: (1000, 1000)})
+    if not cli.start(): print(f"{label}: start failed"); return
+    r0, q0 = cli.responses, cli.requests
+    time.sleep(seconds)
+    r1, q1 = cli.responses, cli.requests
+    t = time.perf_counter(); n = 100000
+    for _ in range(n): cli.get_rpm()
+    get_us = (time.perf_counter() - t) / n * 1e6
+    cli.stop()
+    print(f"{label:<22s} {(r1-r0)/seconds:7.1f} PIDs/s  {(q1-q0)/seconds:6.1f} req/s"
+          f"  rtt {cli.stats()['rtt_ms']:.1f} ms  get_rpm() {get_us:.2f} us")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--latency", type=float, default=0.03, help="ECU 응답 지연 (초)")
+    ap.add_argument("--baud", type=int, default=38400)
+    args = ap.parse_args()
+    run("single PID / request", args.seconds, args.latency, args.baud, multi_pid=False)
+    run("pipelined (3 PIDs)", args.seconds, args.latency, args.baud, multi_pid=True)
+
+if __name__ == "__main__":
+    main()
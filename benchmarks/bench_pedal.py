@@ -0,0 +1,86 @@
+"""페달 마커 검출: 기존(int16 채도 + findContours, 전체 화면) vs PedalTracker(uint8 채도 + ROI + 연결요소)
+
+    python benchmarks/bench_pedal.py                 # 합성 페달 영상
+    python benchmarks/bench_pedal.py --session DIR   # 기록된 세션의 페달 프레임 (--record 로 녹화)
+
+경로별: 전체 화면 검출(마커를 찾기 전, 캘리브레이션), 추적 ROI, ROI에서 놓친 뒤 전체 화면 재검출.
+어느 경로든 기존보다 느리면 종료 코드 1
+"""
+import os, sys, time, argparse
+import numpy as np, cv2 as cv
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from vision.pedal_tracker import PedalTracker
+
+def legacy_find(frame, th_green=25, area_min=80, kernel=np.ones((3,3), np.uint8)):
+    """기존 find_point_by_saliency"""
+    bgr = frame.astype(np.int16)
+    B, G, R = bgr[:,:,0], bgr[:,:,1], bgr[:,:,2]
+    L = (R + G + B) // 3
+    mask_g = ((G - L) > th_green).astype(np.uint8) * 255
+    mask_g = cv.morphologyEx(mask_g, cv.MORPH_OPEN, kernel, iterations=1)
+    cnts, _ = cv.findContours(mask_g, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+    if not cnts: return None
+    c = max(cnts, key=cv.contourArea)
+    if cv.contourArea(c) < area_min: return None
+    M = cv.moments(c)
+    if M["m00"] == 0: return None
+    return int(M["m10"]/M["m00"]), int(M["m01"]/M["m00"])
+
+def synth_frames(n, W=640, H=480, seed=0):
+    """어두운 페달 영역 + 잡음 + 위아래로 움직이는 녹색 마커"""
+    rng = np.random.default_rng(seed)
+    base = cv.GaussianBlur(rng.integers(30, 90, (H, W, 3), dtype=np.uint8), (0, 0), 3)
+    cv.rectangle(base, (W//2 - 60, H//4), (W//2 + 60, H*3//4), (70, 70, 75), -1)
+    for i in range(n):
+        f = base.copy()
+        y = int(H*0.4 + 50 * (0.5 - 0.5*np.cos(i * 0.15)))
+        cv.circle(f, (W//2, y), 10, (40, 200, 50), -1, cv.LINE_AA)
+        f = cv.add(f, rng.integers(0, 12, (H, W, 3), dtype=np.uint8))
+        yield f
+
+def session_frames(path, limit):
+    from common.session import SessionReader, K_PEDAL
+    for i, rec in enumerate(SessionReader(path, kinds=[K_PEDAL])):
+        if i >= limit: break
+        yield rec.value
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--session", default=None)
+    ap.add_argument("--frames", type=int, default=300)
+    args = ap.parse_args()
+    frames = list(session_frames(args.session, args.frames) if args.session else synth_frames(args.frames))
+    if not frames: print("no pedal frames"); return
+    print(f"{len(frames)} frames {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+    t = time.perf_counter(); ref = [legacy_find(f) for f in frames]; t_old = time.perf_counter() - t
+    tr = PedalTracker()
+    t = time.perf_counter(); full = [tr.find_point_by_saliency(f)[0] for f in frames]; t_full = time.perf_counter() - t
+    tr = PedalTracker(); got = []
+    t = time.perf_counter()
+    for f in frames:
+        tr.update(f)
+        got.append(None if tr.roi_green is None else tr.roi_green)
+    t_roi = time.perf_counter() - t
+    tr = PedalTracker()
+    t = time.perf_counter()
+    for f in frames:                       # 매 프레임 마커가 없는 구석을 ROI로 줘서 놓침 → 전체 화면
+        tr.roi_green = (0, 0, 64, 48)
+        tr.update(f)
+    t_miss = time.perf_counter() - t
+
+    dist = [np.hypot(a[0]-b[0], a[1]-b[1]) for a, b in zip(ref, full) if a and b]
+    miss = sum(1 for a, b in zip(ref, full) if (a is None) != (b is None))
+    n = len(frames)
+    print(f"legacy  full frame          : {t_old/n*1e3:6.2f} ms/frame")
+    print(f"uint8   full frame          : {t_full/n*1e3:6.2f} ms/frame  x{t_old/t_full:.1f}"
+          f"  (|dp| mean {np.mean(dist) if dist else 0:.2f}px, detect mismatch {miss})")
+    print(f"update() with tracked ROI   : {t_roi/n*1e3:6.2f} ms/frame  x{t_old/t_roi:.1f}  (incl. view copy, "
+          f"ROI hit {sum(g is not None for g in got)}/{n})")
+    print(f"update() ROI miss + full    : {t_miss/n*1e3:6.2f} ms/frame  x{t_old/t_miss:.1f}")
+    slow = [name for name, tt in (("full frame", t_full), ("tracked ROI", t_roi), ("ROI miss", t_miss)) if tt > t_old]
+    if slow:
+        print(f"[bench_pedal] FAIL: slower than legacy: {', '.join(slow)}"); sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""텔레메트리 기록이 프레임 루프를 막지 않는지 + 하루치 읽기 시간
+  sync:  프레임마다 레코드를 파일에 쓰고 flush (기존처럼 호출 스레드에서 바로 쓰는 방식)
+  async: TelemetryLogger.log (배치에 대입, 쓰기/fsync는 전용 스레드)
+느린 SD 카드 흉내: 쓰기 --stall-every번마다 --stall-ms 동안 멈춤 (두 방식 같은 조건)
+
+    python benchmarks/bench_telemetry.py [--frames 1500] [--fps 300] [--stall-ms 200] [--day-hours 8]
+
+측정: log 호출 시간 p50/p99/max, 버린 프레임 수, 하루치(day-hours, 30fps) .tlm 읽기 시간
+"""
+import os, sys, time, shutil, argparse, tempfile
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.telemetry import TelemetryLogger, FRAME_DTYPE, load
+
+class Stall:
+    """n번째 쓰기마다 ms만큼 대기"""
+    def __init__(self, every, ms): self.every, self.sec, self.n = every, ms / 1e3, 0
+    def __call__(self):
+        self.n += 1
+        if self.every and self.n % self.every == 0: time.sleep(self.sec)
+
+class SlowLogger(TelemetryLogger):
+    def __init__(self, path, stall, **kw):
+        self._stall = stall; super().__init__(path, **kw)
+    def _write(self, kind, value):
+        self._stall(); super()._write(kind, value)
+
+class SyncWriter:
+    def __init__(self, path, stall):
+        self.f, self.stall, self.row = open(os.path.join(path, "sync.bin"), "wb"), stall, np.zeros(1, FRAME_DTYPE)
+    def log(self, row):
+        self.row[0] = row; self.stall()
+        self.f.write(self.row.tobytes()); self.f.flush()
+    def close(self): self.f.close()
+
+def sample_row(i):
+    return (i / 30.0, time.time(), 1, 0.3, 0, 0.9, 1, 0, 0, 72.0, 15.0, 2000.0, 60.0, 20.0, 0.0, 0.0,
+            1, 0, 0, 0, 0, 0, 5.0, 6.0, 12.0)
+
+def run(label, logger, n, fps, stall_every):
+    period, t_next = 1.0 / fps, time.perf_counter()
+    times = np.empty(n)
+    for i in range(n):
+        row = sample_row(i)
+        t0 = time.perf_counter(); logger.log(row); times[i] = time.perf_counter() - t0
+        t_next += period
+        dt = t_next - time.perf_counter()
+        if dt > 0: time.sleep(dt)
+    t0 = time.perf_counter(); logger.close(); t_close = time.perf_counter() - t0
+    ms = times * 1e3
+    dropped = getattr(logger, "dropped_frames", 0)
+    print(f"{label:<6s} log p50 {np.percentile(ms, 50):7.4f}  p99 {np.percentile(ms, 99):7.4f}  max {ms.max():8.2f} ms   "
+          f"calls > 5 ms: {np.count_nonzero(ms > 5):4d}   dropped {dropped}   close {t_close*1e3:.0f} ms")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=1500)
+    ap.add_argument("--fps", type=float, default=300, help="기록 호출 속도 (실제 30fps보다 빠르게 해서 배치가 밀리게)")
+    ap.add_argument("--stall-every", type=int, default=4, help="쓰기 n번마다 멈춤 (sync는 프레임 단위, async는 배치 단위)")
+    ap.add_argument("--stall-ms", type=float, default=200)
+    ap.add_argument("--day-hours", type=float, default=8, help="읽기 측정용 주행 시간 (30fps)")
+    args = ap.parse_args()
+    tmp = tempfile.mkdtemp(prefix="bench_tlm_")
+    try:
+        print(f"{args.frames} frames at {args.fps:g}/s, write stall {args.stall_ms:g} ms every {args.stall_every} writes, "
+              f"record {FRAME_DTYPE.itemsize} B")
+        run("sync", SyncWriter(tmp, Stall(args.stall_every * 32, args.stall_ms)), args.frames, args.fps, args.stall_every)
+        run("async", SlowLogger(os.path.join(tmp, "async"), Stall(args.stall_every, args.stall_ms), batch=32),
+            args.frames, args.fps, args.stall_every)
+
+        # 하루치: 배치를 그대로 써서 파일 생성 (교체 포함) → load
+        rows = int(args.day_hours * 3600 * 30)
+        day = os.path.join(tmp, "day")
+        tlm = TelemetryLogger(day, batch=4096, n_batches=64, max_bytes=64 << 20)
+        t0 = time.perf_counter()
+        for i in range(rows): tlm.log(sample_row(i))
+        tlm.close(timeout=60)
+        t_write = time.perf_counter() - t0
+        t0 = time.perf_counter(); arr = load(day); t_load = time.perf_counter() - t0
+        print(f"day    {len(arr)} rows ({args.day_hours:g} h @ 30fps, {tlm.files} files, {tlm.bytes/1e6:.0f} MB, dropped {tlm.dropped_frames}): "
+              f"write {t_write:.1f}s, load {t_load:.2f}s")
+        try:
+            from common.telemetry import to_dataframe
+            t0 = time.perf_counter(); to_dataframe(arr); print(f"       to_dataframe {time.perf_counter() - t0:.2f}s")
+        except ImportError:
+            print("       pandas not installed (to_dataframe skipped)")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
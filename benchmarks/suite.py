@@ -0,0 +1,276 @@
+"""헤드리스 벤치마크 모음: 카메라/시리얼/I2C/SPI 없이 핫패스 컴포넌트별 지연 백분위 + 처리량.
+입력은 합성 데이터 또는 --session 으로 기록된 세션. 의존성(mediapipe, 감정 모델, 한글 폰트)이 없는 항목은 건너뜀.
+
+    python benchmarks/suite.py                          # 전체 실행
+    python benchmarks/suite.py --only "ui.*" --iters 100
+    python benchmarks/suite.py --session DIR            # 기록된 운전자/페달 프레임, 랜드마크, mmWave
+    python benchmarks/suite.py --save base.json         # 기준값 저장
+    python benchmarks/suite.py --compare base.json      # p50이 기준보다 --tolerance 이상 느리면 종료 코드 1
+"""
+import os, sys, time, json, struct, fnmatch, platform, argparse, importlib.util
+import numpy as np, cv2 as cv
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class Skip(Exception):
+    """이 환경에서 실행할 수 없는 항목 (사유를 메시지로)"""
+
+CASES = []   # (이름, 필요한 모듈, setup(inputs) -> fn(i))
+
+def case(name, needs=()):
+    def deco(setup):
+        CASES.append((name, tuple(needs), setup)); return setup
+    return deco
+
+
+class Inputs:
+    """항목들이 공유하는 입력 (처음 요청할 때 한 번 생성)"""
+    def __init__(self, session=None, n=120, seed=0):
+        self.session, self.n = session, int(n)
+        self.rng = np.random.default_rng(seed)
+        self._cache = {}
+
+    def _get(self, key, make):
+        if key not in self._cache: self._cache[key] = make()
+        return self._cache[key]
+
+    def _records(self, kind):
+        from common.session import SessionReader
+        out = []
+        for rec in SessionReader(self.session, kinds=[kind]):
+            if rec.value is not None: out.append(rec.value)
+            if len(out) >= self.n: break
+        return out
+
+    def driver_frames(self):
+        def make():
+            if self.session:
+                from common.session import K_DRIVER
+                frames = self._records(K_DRIVER)
+                if frames: return frames
+            # 어두운 실내 + 얼굴 크기 타원 + 센서 잡음 (1280x720, 카메라 파이프라인 출력 크기)
+            base = cv.GaussianBlur(self.rng.integers(20, 70, (720, 1280, 3), dtype=np.uint8), (0, 0), 5)
+            cv.ellipse(base, (640, 340), (150, 200), 0, 0, 360, (120, 140, 170), -1, cv.LINE_AA)
+            return [cv.add(base, self.rng.integers(0, 16, base.shape, dtype=np.uint8)) for _ in range(8)]
+        return self._get("driver", make)
+
+    def pedal_frames(self):
+        def make():
+            if self.session:
+                from common.session import K_PEDAL
+                frames = self._records(K_PEDAL)
+                if frames: return frames
+            from bench_pedal import synth_frames
+            return list(synth_frames(self.n))
+        return self._get("pedal", make)
+
+    def landmarks(self):
+        def make():
+            if self.session:
+                from common.session import K_LANDMARKS
+                lms = self._records(K_LANDMARKS)
+                if lms: return lms
+            base = (self.rng.random((478, 3)) * np.array([0.3, 0.4, 0.05]) + np.array([0.35, 0.3, 0.0])).astype(np.float32)
+            return [base + self.rng.normal(0, 0.002, base.shape).astype(np.float32) for _ in range(self.n)]
+        return self._get("landmarks", make)
+
+    def mmwave_chunks(self, chunk=64):
+        def make():
+            from sensors.mmwave import build_frame, TYPE_HEART_RATE, TYPE_BREATH_RATE
+            if self.session:
+                from common.session import K_MMWAVE
+                data = b"".join(build_frame(t, p, i & 0xFFFF) for i, (t, p) in enumerate(self._records(K_MMWAVE)))
+            else:
+                data = b""
+            if not data:
+                data = b"".join(build_frame(TYPE_HEART_RATE if i % 2 == 0 else TYPE_BREATH_RATE,
+                                            struct.pack("<f", 60.0 + i % 30), i & 0xFFFF) for i in range(4000))
+            return [data[i:i+chunk] for i in range(0, len(data), chunk)]
+        return self._get(("mmwave", chunk), make)
+
+
+def _need_font():
+    from ui.utils import KOREAN_FONT_PATH
+    if not os.path.exists(KOREAN_FONT_PATH): raise Skip("Korean font not found (--font or KOREAN_FONT_PATH)")
+
+# ── 항목
+
+@case("helpers.enhance")
+def _enhance(inp):
+    from common.helpers import enhance_frame_for_face_detection
+    frames = inp.driver_frames()
+    return lambda i: enhance_frame_for_face_detection(frames[i % len(frames)])
+
+@case("vision.facemesh", needs=("mediapipe",))
+def _facemesh(inp):
+    """main의 InferenceWorker와 같은 전처리 → FaceMesh → (478,3) 배열"""
+    import mediapipe as mp
+    from common.helpers import enhance_frame_for_face_detection, limit_size
+    from vision.landmarks import landmarks_to_array
+    mesh = mp.solutions.face_mesh.FaceMesh(max_num_faces=1, refine_landmarks=True,
+                                           min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    frames = inp.driver_frames()
+    def run(i):
+        rgb = enhance_frame_for_face_detection(limit_size(frames[i % len(frames)], 640), rgb=True)
+        rgb.flags.writeable = False
+        r = mesh.process(rgb)
+        return landmarks_to_array(r.multi_face_landmarks[0]) if r.multi_face_landmarks else None
+    return run
+
+@case("vision.modules")
+def _modules(inp):
+    """졸음/전방주시/고개 (랜드마크 입력, 매 프레임 실행되는 필수 체인)"""
+    from vision.drowsiness import DrowsinessModule
+    from vision.attention import ForwardAttentionModule
+    from vision.headpos import HeadPositionModule
+    drowsy, forward, head = DrowsinessModule(ear_thresh=0.2), ForwardAttentionModule(), HeadPositionModule()
+    frame, lms = inp.driver_frames()[0], inp.landmarks()
+    def run(i):
+        l = lms[i % len(lms)]
+        drowsy.process(frame, l); forward.process(l); head.process(l)
+    return run
+
+@case("rules.tick")
+def _rules(inp):
+    """경고 규칙 3개 증분 갱신 (30fps 샘플, 눈 감음/시선 이탈/발 뗌 구간 포함)"""
+    from common.rules import RuleEngine, driver_rules
+    engine = RuleEngine(driver_rules())
+    samples = [{"face": i % 400 < 380, "ear": 0.15 if (i // 90) % 3 == 0 else 0.3,
+                "is_forward_looking": (i // 120) % 4 != 0, "fsr_pressed": (i // 300) % 2 == 0} for i in range(1200)]
+    return lambda i: engine.tick(samples[i % len(samples)], i / 30.0)
+
+@case("vision.emotion")
+def _emotion(inp):
+    from vision.emotion import EmotionModule
+    emo, frame, lms = EmotionModule(), inp.driver_frames()[0], inp.landmarks()
+    if not emo.enabled: raise Skip("emotion model not available")
+    return lambda i: emo.infer(frame, lms[i % len(lms)])
+
+@case("pedal.update")
+def _pedal(inp):
+    from vision.pedal_tracker import PedalTracker
+    frames = inp.pedal_frames()
+    tr = PedalTracker()
+    tr.calibrate_brake_simple(frames[0])
+    return lambda i: tr.update(frames[i % len(frames)], i / 60.0)
+
+@case("mmwave.parse")
+def _mmwave(inp):
+    """64바이트 read 1회분 파싱"""
+    from sensors.mmwave import MmWaveFrameParser
+    chunks, p = inp.mmwave_chunks(64), MmWaveFrameParser()
+    return lambda i: p.feed(chunks[i % len(chunks)])
+
+@case("ui.dashboard")
+def _dashboard(inp):
+    _need_font()
+    from ui.dashboard import render_dashboard_exact
+    fd, fp = inp.driver_frames()[0], inp.pedal_frames()[0]
+    hr = 60 + 20 * np.sin(np.arange(600) / 10.0); br = 15 + 5 * np.sin(np.arange(600) / 7.0)
+    return lambda i: render_dashboard_exact(fd, fp, 3000, 80, 40, i % 100, 72, 15, hr, br, W=1366, H=768,
+                                            fsr_pressed=False, twofoot_dur=2.0, pedal_flag_active=bool(i & 1))
+
+@case("ui.overlay")
+def _overlay(inp):
+    _need_font()
+    from ui.overlay import AlertCompositor
+    dash, alerts = inp.rng.integers(0, 255, (768, 1366, 3), dtype=np.uint8), AlertCompositor("full")
+    return lambda i: alerts.draw(dash, "졸음운전이 감지되었습니다.", (0, 255, 255), alpha=0.45, font_scale=1.6, thickness=4)
+
+@case("ui.overlay_banner")
+def _overlay_banner(inp):
+    _need_font()
+    from ui.overlay import AlertCompositor
+    dash, alerts = inp.rng.integers(0, 255, (768, 1366, 3), dtype=np.uint8), AlertCompositor("banner")
+    return lambda i: alerts.draw(dash, "졸음운전이 감지되었습니다.", (0, 255, 255), alpha=0.45, font_scale=1.6, thickness=4)
+
+@case("spi.pack_unpack")
+def _spi_pack(inp):
+    from sensors.spi import pack_tx_frame, unpack_rx_frame
+    def run(i):
+        return unpack_rx_frame(pack_tx_frame(i & 0x7F, i % 5, 60 + i % 40, 12 + i % 10))
+    return run
+
+@case("spi.transfer")
+def _spi_transfer(inp):
+    """SpiLink.transfer 1회 (FPGA 소프트웨어 모델, 프레임 4개 묶음)"""
+    from sensors.spi import SpiLink
+    from sensors.fpga_model import SimulatedSpiDev
+    link = SpiLink(SimulatedSpiDev())
+    return lambda i: link.transfer([(i & 0x7F, i % 5, 72, 15)] * 4)
+
+
+# ── 실행/기록
+
+def run_case(fn, iters, warmup, min_time):
+    for i in range(warmup): fn(i)
+    ns, i = [], 0
+    t_end = time.perf_counter() + min_time
+    while i < iters or time.perf_counter() < t_end:
+        t0 = time.perf_counter_ns(); fn(i); ns.append(time.perf_counter_ns() - t0); i += 1
+    ms = np.array(ns, dtype=np.float64) / 1e6
+    p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+    return {"n": len(ms), "p50": float(p50), "p95": float(p95), "p99": float(p99),
+            "mean": float(ms.mean()), "ops": float(1e3 / ms.mean())}
+
+def host_info():
+    return {"machine": platform.machine(), "node": platform.node(), "python": platform.python_version(),
+            "numpy": np.__version__, "opencv": cv.__version__}
+
+def main():
+    ap = argparse.ArgumentParser(description="headless component benchmarks")
+    ap.add_argument("--only", action="append", help="이름 패턴 (fnmatch, 여러 번 가능)")
+    ap.add_argument("--list", action="store_true")
+    ap.add_argument("--session", help="기록된 세션 디렉터리 (없는 입력은 합성)")
+    ap.add_argument("--font", help="한글 폰트 경로 (ui.* 항목)")
+    ap.add_argument("--iters", type=int, default=200)
+    ap.add_argument("--warmup", type=int, default=10)
+    ap.add_argument("--min-time", type=float, default=0.5, help="항목당 최소 측정 시간(초)")
+    ap.add_argument("--save", metavar="JSON", help="결과를 기준값으로 저장")
+    ap.add_argument("--compare", metavar="JSON", help="기준값과 비교")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="허용 p50 증가율")
+    args = ap.parse_args()
+    if args.font: os.environ["KOREAN_FONT_PATH"] = args.font   # ui.utils import 전에 설정
+
+    selected = [c for c in CASES if not args.only or any(fnmatch.fnmatch(c[0], p) for p in args.only)]
+    if args.list:
+        for name, needs, setup in selected: print(f"{name:<20s} {(setup.__doc__ or '').strip()}")
+        return 0
+
+    base = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f: base = json.load(f)
+        if base.get("host", {}).get("machine") != platform.machine():
+            print(f"[Bench] warning: baseline from {base.get('host')} (different machine)")
+
+    inp, results, regressed = Inputs(args.session), {}, []
+    print(f"{'case':<20s} {'n':>6s} {'ops/s':>9s} {'p50':>8s} {'p95':>8s} {'p99':>8s} ms")
+    for name, needs, setup in selected:
+        missing = [m for m in needs if importlib.util.find_spec(m) is None]
+        try:
+            if missing: raise Skip("missing " + ", ".join(missing))
+            r = run_case(setup(inp), args.iters, args.warmup, args.min_time)
+        except Skip as e:
+            print(f"{name:<20s} skipped: {e}"); continue
+        except Exception as e:
+            print(f"{name:<20s} error: {e!r}"); continue
+        results[name] = r
+        line = f"{name:<20s} {r['n']:6d} {r['ops']:9.0f} {r['p50']:8.3f} {r['p95']:8.3f} {r['p99']:8.3f}"
+        ref = (base or {}).get("results", {}).get(name)
+        if ref:
+            ratio = r["p50"] / max(ref["p50"], 1e-9)
+            line += f"   p50 x{ratio:.2f} vs baseline"
+            if ratio > 1 + args.tolerance:
+                line += "  REGRESSION"; regressed.append(name)
+        print(line)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"host": host_info(), "time": time.time(), "results": results}, f, indent=1)
+        print(f"[Bench] baseline saved to {args.save}")
+    if regressed:
+        print(f"[Bench] regressions (> +{args.tolerance:.0%} p50): {', '.join(regressed)}"); return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
-import time
+from common import clock
+from common.telemetry import event
 
 class CalibrationManager:
     def __init__(self):
@@ -8,15 +9,15 @@ class CalibrationManager:
 
     def start_calibration(self):
         self.is_calibrating = True
-        self.calibration_start_time = time.time()
-        print("=== STARTING 3-SECOND CALIBRATION ===")
+        self.calibration_start_time = clock.now()
+        event("Calibration", f"=== STARTING {self.CALIBRATION_DURATION:g}-SECOND CALIBRATION ===")
 
     def update(self):
         if not self.is_calibrating: return False, 0.0
-        now = time.time(); elapsed = now - self.calibration_start_time
+        now = clock.now(); elapsed = now - self.calibration_start_time
         if elapsed >= self.CALIBRATION_DURATION:
             self.is_calibrating = False
-            print("=== CALIBRATION COMPLETE ===")
+            event("Calibration", "=== CALIBRATION COMPLETE ===")
             return False, 0.0
         remaining = self.CALIBRATION_DURATION - elapsed
         return True, remaining
@@ -0,0 +1,18 @@
+import time
+
+# 모듈 타이머가 공유하는 시계. 라이브는 monotonic, 리플레이는 기록된 타임스탬프
+_source = time.monotonic
+
+def now():
+    return _source()
+
+def set_source(fn=None):
+    """시계 교체 (None이면 time.monotonic으로 복귀)"""
+    global _source
+    _source = fn if fn is not None else time.monotonic
+
+class VirtualClock:
+    """리플레이용: set()으로 지정한 시각을 그대로 반환"""
+    def __init__(self, t=0.0): self.t = float(t)
+    def set(self, t): self.t = float(t)
+    def __call__(self): return self.t
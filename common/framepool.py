@@ -0,0 +1,38 @@
+import numpy as np
+
+class FramePool:
+    """프레임마다 새 배열을 만들지 않도록 작업 버퍼를 재사용 (OpenCV dst= 인자로 넘김).
+    get(name, shape): 이름별 버퍼 앞부분을 shape로 본 연속 뷰. 용량이 모자랄 때만 새로 할당하므로
+      얼굴/페달 ROI처럼 크기가 매 프레임 바뀌어도 재할당 없음. 같은 이름을 다시 get하면 이전 내용은 덮어써짐
+    ring(name, shape, n): 다른 스레드로 넘기는 출력용. n개를 돌아가며 써서 받는 쪽(큐, 표시)이
+      잡고 있는 동안 덮어쓰지 않음 (n = 동시에 살아 있을 수 있는 최대 개수)
+    풀 하나는 한 스레드(워커)에서만 사용. reuse=False면 매번 새로 할당 (비교 측정/디버깅용)"""
+    def __init__(self, name="pool", reuse=True):
+        self.name, self.reuse = name, reuse
+        self._bufs = {}
+        self._ring_idx = {}
+        self.allocs = 0        # 새로 할당한 횟수 (워밍업 뒤에는 늘지 않아야 함)
+        self.nbytes = 0
+
+    def get(self, name, shape, dtype=np.uint8):
+        shape = tuple(int(s) for s in shape)
+        n = int(np.prod(shape))
+        if not self.reuse:
+            self.allocs += 1; return np.empty(shape, dtype)
+        buf = self._bufs.get(name)
+        if buf is None or buf.size < n or buf.dtype != dtype:
+            if buf is not None: self.nbytes -= buf.nbytes
+            buf = self._bufs[name] = np.empty(n, dtype)
+            self.allocs += 1; self.nbytes += buf.nbytes
+        return buf[:n].reshape(shape)
+
+    def ring(self, name, shape, dtype=np.uint8, n=3):
+        i = self._ring_idx.get(name, 0)
+        self._ring_idx[name] = (i + 1) % n
+        return self.get(f"{name}#{i}", shape, dtype)
+
+    def like(self, name, arr):
+        return self.get(name, arr.shape, arr.dtype)
+
+    def stats(self):
+        return {"buffers": len(self._bufs), "allocs": self.allocs, "mb": self.nbytes / 1e6}
@@ -6,12 +6,75 @@ def denorm(x, y, w, h):
 def distance(p1, p2):
     return float(np.hypot(p1[0] - p2[0], p1[1] - p2[1]))
 
-def enhance_frame_for_face_detection(frame):
-    gray = cv.cvtColor(frame, cv.COLOR_BGR2GRAY)
-    enhanced = cv.equalizeHist(gray)
-    clahe = cv.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
-    enhanced = clahe.apply(enhanced)
-    enhanced = cv.GaussianBlur(enhanced, (3, 3), 0)
-    gamma = 1.2
-    enhanced = (np.power(enhanced / 255.0, gamma) * 255.0).astype(np.uint8)
-    return cv.cvtColor(enhanced, cv.COLOR_GRAY2BGR)
+# 전처리 상수: CLAHE 객체와 감마 LUT는 한 번만 생성
+_CLAHE = cv.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
+_GAMMA = 1.2
+_GAMMA_LUT = (np.power(np.arange(256) / 255.0, _GAMMA) * 255.0).astype(np.uint8)
+
+def enhance_frame_for_face_detection(frame, rgb=False, pool=None):
+    """BGR 또는 GRAY8 입력 → 대비 보정한 3채널 흑백. 결과가 흑백이므로 rgb=True면 바로 FaceMesh 입력(RGB)으로
+    만들어 BGR→RGB 변환을 생략 (채널 값이 모두 같아 BGR/RGB 순서 차이 없음).
+    pool(FramePool)을 주면 중간 결과와 출력을 그 버퍼에 씀 (반환값은 다음 호출 때 덮어써짐)"""
+    if pool is None:
+        gray = frame if frame.ndim == 2 else cv.cvtColor(frame, cv.COLOR_BGR2GRAY)
+        enhanced = cv.equalizeHist(gray)
+        enhanced = _CLAHE.apply(enhanced)
+        enhanced = cv.GaussianBlur(enhanced, (3, 3), 0)
+        enhanced = cv.LUT(enhanced, _GAMMA_LUT)
+        return cv.cvtColor(enhanced, cv.COLOR_GRAY2RGB if rgb else cv.COLOR_GRAY2BGR)
+    h, w = frame.shape[:2]
+    a, b = pool.get("enhance.a", (h, w)), pool.get("enhance.b", (h, w))
+    gray = frame if frame.ndim == 2 else cv.cvtColor(frame, cv.COLOR_BGR2GRAY, dst=a)
+    cv.equalizeHist(gray, dst=b)
+    _CLAHE.apply(b, dst=a)
+    cv.GaussianBlur(a, (3, 3), 0, dst=b)
+    cv.LUT(b, _GAMMA_LUT, dst=a)
+    return cv.cvtColor(a, cv.COLOR_GRAY2RGB if rgb else cv.COLOR_GRAY2BGR, dst=pool.get("enhance.out", (h, w, 3)))
+
+def limit_size(img, max_side, pool=None):
+    """긴 변이 max_side를 넘으면 비율 유지 축소 (INTER_AREA). 정규화 좌표는 그대로 유효.
+    pool을 주면 축소 결과를 그 버퍼에 씀"""
+    h, w = img.shape[:2]
+    s = max_side / float(max(h, w)) if max_side else 1.0
+    if s >= 1.0: return img
+    nw, nh = max(1, int(w * s)), max(1, int(h * s))
+    dst = pool.get("limit_size", (nh, nw) + img.shape[2:]) if pool is not None else None
+    return cv.resize(img, (nw, nh), dst=dst, interpolation=cv.INTER_AREA)
+
+class FaceROITracker:
+    """이전 프레임 랜드마크로 얼굴 박스(패딩 포함)를 잡아 그 영역만 전처리/검출.
+    얼굴을 놓치면 다음 프레임은 전체 화면으로 검출"""
+    def __init__(self, pad=0.4, min_size=96):
+        self.pad = float(pad)
+        self.min_size = int(min_size)
+        self.roi = None            # (x0, y0, x1, y1) 픽셀, None이면 전체 화면
+
+    def reset(self): self.roi = None
+
+    def crop(self, frame):
+        """검출할 영역과 그 좌표 (x0, y0, x1, y1)"""
+        H, W = frame.shape[:2]
+        if self.roi is None: return frame, (0, 0, W, H)
+        x0, y0, x1, y1 = self.roi
+        return frame[y0:y1, x0:x1], self.roi
+
+    def update(self, lms, box, frame_shape):
+        """crop 기준 정규화 랜드마크 → 전체 프레임 기준으로 변환하고 다음 ROI 갱신"""
+        if lms is None:
+            self.roi = None; return None
+        H, W = frame_shape[:2]
+        x0, y0, x1, y1 = box
+        cw, ch = x1 - x0, y1 - y0
+        if (cw, ch) != (W, H):
+            lms = lms * np.array([cw / W, ch / H, cw / W], dtype=np.float32)
+            lms[:, 0] += x0 / W; lms[:, 1] += y0 / H
+
+        # 다음 프레임 ROI: 랜드마크 박스 + 패딩 (정사각형에 가깝게)
+        px, py = lms[:, 0] * W, lms[:, 1] * H
+        bx0, bx1, by0, by1 = float(px.min()), float(px.max()), float(py.min()), float(py.max())
+        size = max(bx1 - bx0, by1 - by0, self.min_size) * (1.0 + 2 * self.pad)
+        cx, cy = (bx0 + bx1) / 2, (by0 + by1) / 2
+        nx0, ny0 = max(0, int(cx - size / 2)), max(0, int(cy - size / 2))
+        nx1, ny1 = min(W, int(cx + size / 2)), min(H, int(cy + size / 2))
+        self.roi = (nx0, ny0, nx1, ny1) if (nx1 - nx0) >= 16 and (ny1 - ny0) >= 16 else None
+        return lms
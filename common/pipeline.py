@@ -0,0 +1,117 @@
+import threading, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+class LatestQueue:
+    """크기 제한 큐: 가득 차면 가장 오래된 항목을 버림 (latest-frame-wins)"""
+    def __init__(self, maxsize=1):
+        self._items = deque(maxlen=max(1, int(maxsize)))
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) == self._items.maxlen: self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """새 항목을 꺼냄. timeout=0 이면 즉시 반환, 없거나 닫히면 None"""
+        with self._cond:
+            if timeout != 0:
+                self._cond.wait_for(lambda: self._items or self._closed, timeout)
+            return self._items.popleft() if self._items else None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self): return self._closed
+
+
+class Worker:
+    """공용 stop_event로 멈추는 백그라운드 루프. 서브클래스는 step()만 구현"""
+    def __init__(self, name, stop_event=None):
+        self.name = name
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        self._thread = None
+
+    def setup(self): pass
+    def step(self): raise NotImplementedError
+    def teardown(self): pass
+
+    def _run(self):
+        try:
+            self.setup()
+            while not self.stop_event.is_set():
+                try:
+                    self.step()
+                except Exception as e:
+                    print(f"[{self.name}] error: {e}"); time.sleep(0.1)
+        finally:
+            try: self.teardown()
+            except Exception as e: print(f"[{self.name}] teardown error: {e}")
+
+    def start(self):
+        if self._thread is not None: return
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self): self.stop_event.set()
+
+    def join(self, timeout=2.0):
+        """스레드 종료 대기. 시간 안에 끝나면 True"""
+        if self._thread is None: return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    @property
+    def alive(self): return self._thread is not None and self._thread.is_alive()
+
+
+class CaptureThread(Worker):
+    """카메라 전용 캡처 스레드: (timestamp, frame)을 LatestQueue로 발행"""
+    def __init__(self, name, cap, out_queue, stop_event=None, stop_on_eof=False, max_failures=30):
+        super().__init__(name, stop_event)
+        self.cap = cap
+        self.out = out_queue
+        self.stop_on_eof = stop_on_eof
+        self.max_failures = int(max_failures)
+        self.frames = 0
+        self._failures = 0
+
+    def step(self):
+        ok, frame = self.cap.read()
+        ts = time.monotonic()
+        if not ok:
+            self._failures += 1
+            if self.stop_on_eof and self._failures >= self.max_failures:
+                print(f"[{self.name}] capture ended"); self.stop_event.set()
+            time.sleep(0.01); return
+        self._failures = 0
+        self.frames += 1
+        self.out.put((ts, frame))
+
+    def teardown(self):
+        self.out.close()
+
+
+def init_parallel(tasks, max_workers=8):
+    """{이름: 무인자 함수}를 스레드로 동시에 실행 (카메라/직렬 장치/모델 로드 등 I/O 대기 위주 초기화).
+    {이름: 결과} 반환, 실패한 항목은 에러를 출력하고 None"""
+    t0 = time.monotonic()
+    def timed(name, fn):
+        t = time.monotonic()
+        try: return fn()
+        except Exception as e:
+            print(f"[{name}] init failed: {e}"); return None
+        finally:
+            print(f"[Init] {name} {time.monotonic() - t:.2f}s")
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tasks))), thread_name_prefix="init") as ex:
+        futs = {name: ex.submit(timed, name, fn) for name, fn in tasks.items()}
+        out = {name: f.result() for name, f in futs.items()}
+    print(f"[Init] {len(tasks)} backends ready in {time.monotonic() - t0:.2f}s")
+    return out
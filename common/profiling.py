@@ -0,0 +1,137 @@
+import time, json, csv, os, threading
+import numpy as np
+from common.pipeline import Worker
+
+_ns = time.perf_counter_ns
+
+
+class StageStats:
+    """스테이지 하나의 최근 size개 소요 시간(ns) 링 버퍼. 기록은 리스트 대입 1회, 백분위는 읽을 때만 계산"""
+    __slots__ = ("name", "size", "buf", "n")
+    def __init__(self, name, size=512):
+        self.name, self.size = name, int(size)
+        self.buf = [0] * self.size
+        self.n = 0
+
+    def add(self, ns):
+        self.buf[self.n % self.size] = ns; self.n += 1
+
+    def summary(self):
+        """최근 구간 통계 (ms)"""
+        k = min(self.n, self.size)
+        if not k: return {"count": 0}
+        ms = np.array(self.buf[:k], dtype=np.float64) / 1e6
+        p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+        return {"count": self.n, "p50": float(p50), "p95": float(p95), "p99": float(p99),
+                "max": float(ms.max()), "mean": float(ms.mean())}
+
+
+class _Span:
+    __slots__ = ("stats", "t0")
+    def __init__(self, stats): self.stats = stats
+    def __enter__(self): self.t0 = _ns(); return self
+    def __exit__(self, *exc): self.stats.add(_ns() - self.t0)
+
+class _NullSpan:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): pass
+
+_NULL = _NullSpan()
+
+
+class Profiler:
+    """이름 붙은 구간(span) 소요 시간 + 카운터 + 게이지(읽을 때 호출되는 함수, 예: 큐 drop 수).
+    with prof.span("infer.facemesh"): ...  /  prof.add_latency("glass_to_display", 초)"""
+    def __init__(self, size=512, enabled=True):
+        self.size = int(size)
+        self.enabled = enabled
+        self._stages = {}
+        self._counters = {}
+        self._gauges = {}
+        self._lock = threading.Lock()   # 새 이름 등록 시에만 사용
+
+    def stage(self, name):
+        st = self._stages.get(name)
+        if st is None:
+            with self._lock:
+                st = self._stages.setdefault(name, StageStats(name, self.size))
+        return st
+
+    def span(self, name):
+        return _Span(self.stage(name)) if self.enabled else _NULL
+
+    def add(self, name, ns):
+        if self.enabled: self.stage(name).add(int(ns))
+
+    def add_latency(self, name, seconds):
+        """다른 시계(예: 캡처 time.monotonic)로 잰 구간을 초 단위로 기록"""
+        if self.enabled: self.stage(name).add(int(seconds * 1e9))
+
+    def count(self, name, n=1):
+        self._counters[name] = self._counters.get(name, 0) + n
+
+    def gauge(self, name, fn): self._gauges[name] = fn
+
+    def snapshot(self):
+        counters = dict(self._counters)
+        for name, fn in list(self._gauges.items()):
+            try: counters[name] = fn()
+            except Exception: counters[name] = None
+        return {"time": time.time(),
+                "stages": {n: s.summary() for n, s in sorted(self._stages.items())},
+                "counters": counters}
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear(); self._counters.clear()
+
+
+# 프로세스 공용 프로파일러 (모든 스테이지가 같은 인스턴스에 기록)
+PROFILER = Profiler()
+
+def span(name): return PROFILER.span(name)
+
+
+def format_snapshot(snap):
+    """HUD/콘솔용 텍스트 줄 목록 (열은 '\t' 구분, 콘솔은 expandtabs()로 출력)"""
+    lines = ["stage\tn\tp50\tp95\tp99 ms"]
+    for name, s in snap["stages"].items():
+        if not s.get("count"): continue
+        lines.append(f"{name}\t{s['count']}\t{s['p50']:.1f}\t{s['p95']:.1f}\t{s['p99']:.1f}")
+    if snap["counters"]:
+        lines.append("  ".join(f"{k}={v}" for k, v in sorted(snap["counters"].items())))
+    return lines
+
+def write_stats(path, snap):
+    """.json이면 최신 스냅샷으로 덮어쓰기(원자적 교체), 그 외(.csv)는 스테이지/카운터별 행 추가"""
+    if path.endswith(".json"):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f: json.dump(snap, f, indent=1)
+        os.replace(tmp, path); return
+    new = not os.path.exists(path)
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if new: w.writerow(["time", "name", "count", "p50_ms", "p95_ms", "p99_ms", "max_ms", "mean_ms"])
+        t = f"{snap['time']:.3f}"
+        for name, s in snap["stages"].items():
+            w.writerow([t, name, s.get("count", 0)] + [f"{s[k]:.3f}" if k in s else "" for k in ("p50", "p95", "p99", "max", "mean")])
+        for name, v in snap["counters"].items():
+            w.writerow([t, name, v, "", "", "", "", ""])
+
+
+class StatsDumper(Worker):
+    """period초마다 프로파일러 스냅샷을 파일로 저장 (종료 시 한 번 더)"""
+    def __init__(self, path, stop_event=None, period=5.0, profiler=None):
+        super().__init__("Stats", stop_event)
+        self.path, self.period = path, float(period)
+        self.profiler = profiler or PROFILER
+
+    def dump(self):
+        write_stats(self.path, self.profiler.snapshot())
+
+    def step(self):
+        if self.stop_event.wait(self.period): return
+        self.dump()
+
+    def teardown(self): self.dump()
@@ -0,0 +1,220 @@
+"""경고 규칙 엔진: 조건(샘플 → bool)마다 디바운스/히스테리시스/우선순위/에스컬레이션을 선언하고,
+tick(샘플, ts)마다 규칙당 O(1)로 갱신해 상태가 바뀔 때 타임스탬프 이벤트를 구독자(UI, 로거, 기록기 …)에 전달.
+
+    engine = RuleEngine(driver_rules())
+    engine.subscribe(print_event)
+    engine.tick({"face": True, "ear": 0.15, "is_forward_looking": True, "fsr_pressed": True}, ts)
+    engine.top()          # 표시할 최우선 활성 규칙 상태 (없으면 None)
+
+기록된 프레임별 결과(main.py --replay ... --out CSV)로 임계값 튜닝 (영상 처리 없이 규칙만 재실행):
+    python -m common.rules out.csv --set drowsy_sec=4,5,6 --set ear_thresh=0.18,0.2
+"""
+import sys, csv, itertools, argparse
+
+LEVEL_WARN, LEVEL_EMERGENCY = "warn", "emergency"
+RAISE, ESCALATE, CLEAR = "raise", "escalate", "clear"
+
+
+class Rule:
+    """when(s): 조건 시작, clear(s): 조건 끝 (None이면 not when). 둘 다 아닌 구간은 이전 상태 유지 (히스테리시스)
+    on_after: 조건이 이 시간(초) 계속되면 발생 (디바운스), off_after: 조건이 끝난 뒤 이 시간 지나야 해제
+    levels: ((레벨, 발생 후 초), ...) 에스컬레이션 순서. 첫 레벨이 발생 시 레벨
+    priority: 동시에 활성이면 큰 값이 우선"""
+    def __init__(self, name, when, clear=None, on_after=0.0, off_after=0.0, priority=0,
+                 levels=((LEVEL_WARN, 0.0),), message=None):
+        self.name, self.when, self.clear = name, when, clear
+        self.on_after, self.off_after = float(on_after), float(off_after)
+        self.priority = int(priority)
+        self.levels = tuple((lv, float(t)) for lv, t in levels)
+        self.message = message or name
+
+    def __repr__(self):
+        return f"Rule({self.name}, on_after={self.on_after}, priority={self.priority})"
+
+
+class Event:
+    __slots__ = ("ts", "rule", "kind", "level", "message", "held")
+    def __init__(self, ts, rule, kind, level, message, held):
+        self.ts, self.rule, self.kind, self.level, self.message, self.held = ts, rule, kind, level, message, held
+
+    def as_dict(self):
+        return {"ts": self.ts, "rule": self.rule, "kind": self.kind, "level": self.level, "held": self.held}
+
+    def __repr__(self):
+        return f"Event({self.ts:.3f} {self.rule} {self.kind} {self.level} held={self.held:.2f}s)"
+
+
+class RuleState:
+    """규칙 하나의 증분 상태: 조건 on/off와 그 시작 시각, 활성 여부와 현재 레벨"""
+    __slots__ = ("rule", "cond", "since", "active", "level_idx", "raised_at")
+    def __init__(self, rule):
+        self.rule = rule
+        self.reset()
+
+    def reset(self):
+        self.cond, self.since = False, None
+        self.active, self.level_idx, self.raised_at = False, -1, None
+
+    @property
+    def level(self): return self.rule.levels[self.level_idx][0] if self.active else None
+
+    def held(self, ts):
+        """조건이 지금까지 계속된 시간 (조건이 꺼져 있으면 0)"""
+        return ts - self.since if self.cond else 0.0
+
+    def update(self, s, ts):
+        """샘플 하나 반영. 상태가 바뀌면 Event, 아니면 None"""
+        r = self.rule
+        if self.cond:
+            ended = r.clear(s) if r.clear is not None else not r.when(s)
+            if ended: self.cond, self.since = False, ts
+        elif r.when(s):
+            self.cond, self.since = True, ts
+
+        if not self.active:
+            if self.cond and ts - self.since >= r.on_after:
+                self.active, self.level_idx, self.raised_at = True, 0, ts
+                return Event(ts, r.name, RAISE, r.levels[0][0], r.message, ts - self.since)
+            return None
+        if not self.cond:
+            if ts - self.since >= r.off_after:
+                level = self.level
+                self.active, self.level_idx, self.raised_at = False, -1, None
+                return Event(ts, r.name, CLEAR, level, r.message, 0.0)
+            return None
+        nxt = self.level_idx + 1
+        if nxt < len(r.levels) and ts - self.raised_at >= r.levels[nxt][1]:
+            self.level_idx = nxt
+            return Event(ts, r.name, ESCALATE, r.levels[nxt][0], r.message, ts - self.since)
+        return None
+
+
+class RuleEngine:
+    """규칙 목록을 샘플마다 갱신. 구독자는 tick을 호출한 스레드에서 바로 호출되므로 가볍게 (큐에 넣기 등)"""
+    def __init__(self, rules):
+        self.states = {r.name: RuleState(r) for r in rules}
+        self._by_priority = sorted(self.states.values(), key=lambda st: -st.rule.priority)
+        self._subs = []
+
+    def subscribe(self, fn):
+        self._subs.append(fn); return fn
+
+    def _emit(self, ev):
+        for fn in self._subs:
+            try: fn(ev)
+            except Exception as e: print(f"[Rules] subscriber error: {e}")
+
+    def tick(self, s, ts):
+        """샘플 하나 반영. 이번에 생긴 이벤트 목록"""
+        events = []
+        for st in self._by_priority:
+            ev = st.update(s, ts)
+            if ev is not None:
+                events.append(ev); self._emit(ev)
+        return events
+
+    def top(self):
+        for st in self._by_priority:
+            if st.active: return st
+        return None
+
+    def active(self, name): return self.states[name].active
+    def held(self, name, ts): return self.states[name].held(ts)
+
+    def reset(self, ts):
+        """모든 규칙 초기화 (재캘리브레이션). 활성 규칙은 clear 이벤트"""
+        for st in self._by_priority:
+            if st.active: self._emit(Event(ts, st.rule.name, CLEAR, st.level, st.rule.message, 0.0))
+            st.reset()
+
+
+def print_event(ev):
+    print(f"[Alert] {ev.rule} {ev.kind} ({ev.level}, held {ev.held:.1f}s)")
+
+
+# ── 운전자 경고 규칙 (기본값은 기존 타이머와 같은 판정 시간)
+DRIVER_RULE_DEFAULTS = {
+    "ear_thresh": 0.2,      # EAR이 이보다 작으면 눈 감음
+    "ear_hyst": 0.02,       # 눈 뜸 판정은 ear_thresh + ear_hyst 이상 (경계에서 깜빡이는 값으로 타이머가 끊기지 않게)
+    "drowsy_sec": 5.0,      # 눈 감음 지속 → 졸음 경고 (기존 DrowsinessModule 2초 + 경고 3초)
+    "forward_sec": 3.0,     # 전방 미주시(얼굴 없음 포함) 지속
+    "twofoot_sec": 5.0,     # 발판 FSR 뗌(양발운전) 지속
+    "emergency_sec": 10.0,  # 졸음/전방미주시 경고 후 계속되면 긴급 단계
+}
+
+def driver_rules(**params):
+    p = dict(DRIVER_RULE_DEFAULTS)
+    unknown = set(params) - set(p)
+    if unknown: raise ValueError(f"unknown rule parameter(s): {', '.join(sorted(unknown))}")
+    p.update(params)
+    th, th_open = p["ear_thresh"], p["ear_thresh"] + p["ear_hyst"]
+    escalate = ((LEVEL_WARN, 0.0), (LEVEL_EMERGENCY, p["emergency_sec"]))
+    return [
+        Rule("drowsy", when=lambda s: bool(s["face"]) and s["ear"] < th,
+             clear=lambda s: not s["face"] or s["ear"] >= th_open,
+             on_after=p["drowsy_sec"], priority=3, levels=escalate, message="졸음운전이 감지되었습니다."),
+        Rule("forward", when=lambda s: not s["is_forward_looking"],
+             on_after=p["forward_sec"], priority=2, levels=escalate, message="전방미주시 상태입니다. 전방을 주시해주세요."),
+        Rule("twofoot", when=lambda s: s["fsr_pressed"] is False,
+             on_after=p["twofoot_sec"], priority=1, message="양발운전이 감지되었습니다."),
+    ]
+
+
+# ── 기록된 프레임별 결과로 규칙만 다시 실행 (임계값 튜닝)
+def run(rules, samples):
+    """samples: (ts, dict) 반복. (이벤트 목록, 마지막 ts)"""
+    engine, events, ts = RuleEngine(rules), [], 0.0
+    for ts, s in samples:
+        events += engine.tick(s, ts)
+    return events, ts
+
+def summarize(events, end_ts):
+    """규칙별 {raises, emergencies, active_sec}"""
+    out, open_at = {}, {}
+    for ev in events:
+        d = out.setdefault(ev.rule, {"raises": 0, "emergencies": 0, "active_sec": 0.0})
+        if ev.kind == RAISE: d["raises"] += 1; open_at[ev.rule] = ev.ts
+        elif ev.kind == ESCALATE and ev.level == LEVEL_EMERGENCY: d["emergencies"] += 1
+        elif ev.kind == CLEAR and ev.rule in open_at: d["active_sec"] += ev.ts - open_at.pop(ev.rule)
+    for name, t0 in open_at.items(): out[name]["active_sec"] += end_ts - t0
+    return out
+
+def _cell(v):
+    if v in ("", "None"): return None
+    if v in ("True", "False"): return v == "True"
+    try: return float(v)
+    except ValueError: return v
+
+def load_samples(path):
+    """main.py --replay --out 으로 만든 CSV → [(ts, dict)]"""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [{k: _cell(v) for k, v in r.items()} for r in csv.DictReader(f)]
+    missing = {"ts", "face", "ear", "is_forward_looking", "fsr_pressed"} - set(rows[0] if rows else ())
+    if missing: raise ValueError(f"{path}: missing column(s) {', '.join(sorted(missing))}")
+    return [(r["ts"], r) for r in rows]
+
+def main():
+    ap = argparse.ArgumentParser(description="Re-run driver alert rules over a replay CSV (threshold tuning)")
+    ap.add_argument("csv", help="main.py --replay DIR --out CSV 결과")
+    ap.add_argument("--set", action="append", default=[], metavar="PARAM=V1,V2,...",
+                    help=f"규칙 파라미터 값 목록 (조합 전부 실행): {', '.join(DRIVER_RULE_DEFAULTS)}")
+    args = ap.parse_args()
+    grid = {}
+    for spec in args.set:
+        k, _, vals = spec.partition("=")
+        if k not in DRIVER_RULE_DEFAULTS: ap.error(f"unknown parameter '{k}'")
+        grid[k] = [float(v) for v in vals.split(",") if v]
+    samples = load_samples(args.csv)
+    if not samples: ap.error("no rows")
+    print(f"{len(samples)} frames, {samples[-1][0] - samples[0][0]:.1f}s")
+    for combo in itertools.product(*grid.values()):
+        params = dict(zip(grid, combo))
+        events, end = run(driver_rules(**params), samples)
+        summary = summarize(events, end)
+        label = " ".join(f"{k}={v:g}" for k, v in params.items()) or "defaults"
+        cols = "  ".join(f"{name}: {d['raises']}x {d['active_sec']:.1f}s" + (f" ({d['emergencies']} emergency)" if d["emergencies"] else "")
+                         for name, d in sorted(summary.items())) or "no alerts"
+        print(f"{label:<40s} {cols}")
+
+if __name__ == "__main__":
+    sys.exit(main())
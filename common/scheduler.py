@@ -0,0 +1,59 @@
+import time
+
+class _Task:
+    __slots__ = ("name", "period", "critical", "last_run", "last_result", "cost", "runs", "skips")
+    def __init__(self, name, rate_hz, critical, default):
+        self.name = name
+        self.period = 0.0 if not rate_hz else 1.0 / float(rate_hz)
+        self.critical = critical
+        self.last_run = None
+        self.last_result = default
+        self.cost = 0.0          # 실행 시간 EMA (초)
+        self.runs = self.skips = 0
+
+class ModuleScheduler:
+    """모듈별 목표 주기(Hz)로 실행하고 사이 프레임에는 마지막 결과를 재사용.
+    프레임 예산을 넘기면 critical 모듈만 실행하고 나머지는 다음 프레임으로 미룸"""
+    MAX_DELAY = 5.0   # 목표 주기의 이 배수 이상 밀리면 예산과 무관하게 실행
+
+    def __init__(self, frame_budget=1/30.0, clock=time.perf_counter):
+        self.frame_budget = float(frame_budget)
+        self.clock = clock
+        self._tasks = {}
+        self._frame_start = clock()
+
+    def add(self, name, rate_hz=None, critical=False, default=None):
+        """rate_hz=None → 매 프레임 실행"""
+        self._tasks[name] = _Task(name, rate_hz, critical, default)
+
+    def begin_frame(self):
+        """프레임 처리 시작 시점 (캡처 직후) 기록"""
+        self._frame_start = self.clock()
+
+    def remaining(self):
+        return self.frame_budget - (self.clock() - self._frame_start)
+
+    def reset(self, name):
+        """다음 호출에서 바로 다시 실행 (예: 얼굴을 놓쳤다 다시 찾은 경우)"""
+        self._tasks[name].last_run = None
+
+    def run(self, name, fn, *args):
+        t = self._tasks[name]
+        now = self.clock()
+        waited = None if t.last_run is None else now - t.last_run
+        # 반 프레임 여유: 카메라 주기에 맞물려 목표 Hz보다 느려지지 않게
+        skip = waited is not None and waited < t.period - 0.5 * self.frame_budget
+        if not skip and not t.critical and waited is not None and waited < self.MAX_DELAY * t.period:
+            # 비필수 모듈은 예산 안에 끝날 것 같을 때만 실행 (너무 오래 밀리면 강제 실행)
+            skip = t.cost > self.remaining()
+        if skip:
+            t.skips += 1
+            return t.last_result
+        t.last_result = fn(*args)
+        end = self.clock()
+        t.cost = (end - now) if t.runs == 0 else 0.8*t.cost + 0.2*(end - now)
+        t.last_run = now; t.runs += 1
+        return t.last_result
+
+    def stats(self):
+        return {n: {"runs": t.runs, "skips": t.skips, "cost_ms": t.cost * 1e3} for n, t in self._tasks.items()}
@@ -0,0 +1,238 @@
+import os, json, glob, queue, struct, threading, time
+import cv2 as cv, numpy as np
+from common import clock
+from common.pipeline import Worker
+
+# ── 세션 파일 형식
+# DIR/session.json          메타데이터 (mode, 해상도, 생성 시각 …)
+# DIR/chunk_00000.bin …     [MAGIC] + 레코드 반복: <kind:u8, ts:f64, len:u32> + payload
+#                           ts는 세션 시작 기준 초 (monotonic)
+MAGIC = b"DMSSESS1"
+_REC = struct.Struct("<BdI")
+
+K_DRIVER, K_PEDAL, K_LANDMARKS, K_MMWAVE, K_FSR, K_OBD, K_SPI_RX, K_EVENT = 1, 2, 3, 4, 5, 6, 7, 8
+KIND_NAMES = {K_DRIVER: "driver", K_PEDAL: "pedal", K_LANDMARKS: "landmarks", K_MMWAVE: "mmwave",
+              K_FSR: "fsr", K_OBD: "obd", K_SPI_RX: "spi_rx", K_EVENT: "event"}
+
+_FSR = struct.Struct("<if")      # raw, voltage
+_OBD = struct.Struct("<fff")     # rpm, speed, accel (없으면 NaN)
+_SPI = struct.Struct("<Q")       # rx 64비트 워드
+_U16 = struct.Struct("<H")
+
+def _f(v): return float("nan") if v is None else float(v)
+def _unf(v): return None if v != v else v
+
+
+class SessionRecorder:
+    """주행 세션 기록기. write 호출은 큐에 넣기만 하고, JPEG 인코딩/디스크 쓰기는 전용 스레드에서.
+    mode="video": 운전자/페달 영상 + 랜드마크, mode="landmarks": 랜드마크만 (영상 생략)"""
+    def __init__(self, path, mode="video", jpeg_quality=85, chunk_seconds=60.0, chunk_bytes=256<<20,
+                 max_queue=256, meta=None):
+        self.path = path
+        self.mode = mode
+        self.jpeg_quality = int(jpeg_quality)
+        self.chunk_seconds = float(chunk_seconds)
+        self.chunk_bytes = int(chunk_bytes)
+        self.dropped = 0
+        self.t0 = clock.now()
+        os.makedirs(path, exist_ok=True)
+        info = {"version": 1, "mode": mode, "created": time.time()}
+        info.update(meta or {})
+        with open(os.path.join(path, "session.json"), "w", encoding="utf-8") as f:
+            json.dump(info, f, indent=2)
+        self._q = queue.Queue(maxsize=max_queue)
+        self._f = None; self._chunk_idx = -1; self._chunk_t0 = 0.0; self._chunk_size = 0
+        self._thread = threading.Thread(target=self._loop, name="SessionRecorder", daemon=True)
+        self._thread.start()
+
+    # ── 기록 API (호출 스레드는 막히지 않음; 큐가 가득 차면 버리고 dropped 증가)
+    def _put(self, kind, value, ts):
+        ts = (clock.now() if ts is None else ts) - self.t0
+        try: self._q.put_nowait((kind, ts, value))
+        except queue.Full: self.dropped += 1
+
+    def driver_frame(self, frame, ts=None):
+        if self.mode == "video": self._put(K_DRIVER, frame, ts)
+
+    def pedal_frame(self, frame, ts=None):
+        if self.mode == "video": self._put(K_PEDAL, frame, ts)
+
+    def landmarks(self, lms, ts=None):
+        self._put(K_LANDMARKS, None if lms is None else np.array(lms, dtype=np.float32), ts)
+
+    def mmwave(self, dtype, payload, ts=None):
+        self._put(K_MMWAVE, _U16.pack(dtype) + bytes(payload), ts)
+
+    def fsr(self, raw, voltage, ts=None):
+        self._put(K_FSR, _FSR.pack(int(raw), float(voltage)), ts)
+
+    def obd(self, rpm, speed, accel_pos, ts=None):
+        self._put(K_OBD, _OBD.pack(_f(rpm), _f(speed), _f(accel_pos)), ts)
+
+    def spi_rx(self, word, ts=None):
+        self._put(K_SPI_RX, _SPI.pack(int(word) & 0xFFFFFFFFFFFFFFFF), ts)
+
+    def event(self, ev):
+        """경고 규칙 이벤트 (common.rules.Event, RuleEngine 구독자로 등록)"""
+        self._put(K_EVENT, json.dumps({"rule": ev.rule, "kind": ev.kind, "level": ev.level, "held": ev.held}).encode(), ev.ts)
+
+    # ── writer 스레드
+    def _encode(self, kind, value):
+        if kind in (K_DRIVER, K_PEDAL):
+            ok, buf = cv.imencode(".jpg", value, [cv.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            return buf.tobytes() if ok else None
+        if kind == K_LANDMARKS:
+            if value is None: return _U16.pack(0)
+            return _U16.pack(value.shape[0]) + value.tobytes()
+        return value
+
+    def _roll(self, ts):
+        if self._f: self._f.close()
+        self._chunk_idx += 1
+        self._f = open(os.path.join(self.path, f"chunk_{self._chunk_idx:05d}.bin"), "wb")
+        self._f.write(MAGIC)
+        self._chunk_t0, self._chunk_size = ts, len(MAGIC)
+
+    def _loop(self):
+        while True:
+            item = self._q.get()
+            if item is None: break
+            kind, ts, value = item
+            try:
+                data = self._encode(kind, value)
+                if data is None: continue
+                if (self._f is None or ts - self._chunk_t0 >= self.chunk_seconds
+                        or self._chunk_size >= self.chunk_bytes):
+                    self._roll(ts)
+                self._f.write(_REC.pack(kind, ts, len(data))); self._f.write(data)
+                self._chunk_size += _REC.size + len(data)
+            except Exception as e:
+                print(f"[Recorder] write error: {e}")
+        if self._f: self._f.close(); self._f = None
+
+    def close(self, timeout=5.0):
+        """큐에 남은 레코드를 모두 쓰고 종료"""
+        self._q.put(None)
+        self._thread.join(timeout)
+
+
+class Record:
+    __slots__ = ("kind", "ts", "value")
+    def __init__(self, kind, ts, value): self.kind, self.ts, self.value = kind, ts, value
+    def __repr__(self): return f"Record({KIND_NAMES.get(self.kind, self.kind)}, {self.ts:.3f})"
+
+
+class SessionReader:
+    """세션 디렉터리의 레코드를 기록 순서(=시간 순서)대로 디코드해서 반환"""
+    def __init__(self, path, kinds=None):
+        self.path = path
+        with open(os.path.join(path, "session.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.chunks = sorted(glob.glob(os.path.join(path, "chunk_*.bin")))
+        self.kinds = None if kinds is None else set(kinds)
+
+    @staticmethod
+    def decode(kind, data):
+        if kind in (K_DRIVER, K_PEDAL):
+            return cv.imdecode(np.frombuffer(data, np.uint8), cv.IMREAD_COLOR)
+        if kind == K_LANDMARKS:
+            n = _U16.unpack_from(data)[0]
+            return np.frombuffer(data, np.float32, n * 3, _U16.size).reshape(n, 3) if n else None
+        if kind == K_MMWAVE:
+            return _U16.unpack_from(data)[0], bytes(data[_U16.size:])
+        if kind == K_FSR: return _FSR.unpack(data)
+        if kind == K_OBD: return tuple(_unf(v) for v in _OBD.unpack(data))
+        if kind == K_SPI_RX: return _SPI.unpack(data)[0]
+        if kind == K_EVENT: return json.loads(bytes(data))
+        return bytes(data)
+
+    def __iter__(self):
+        for path in self.chunks:
+            with open(path, "rb") as f:
+                buf = f.read()
+            if not buf.startswith(MAGIC):
+                print(f"[Replay] skip bad chunk: {path}"); continue
+            off, end = len(MAGIC), len(buf)
+            while off + _REC.size <= end:
+                kind, ts, n = _REC.unpack_from(buf, off); off += _REC.size
+                if off + n > end: break        # 기록 중 끊긴 마지막 레코드
+                if self.kinds is None or kind in self.kinds:
+                    yield Record(kind, ts, self.decode(kind, memoryview(buf)[off:off+n]))
+                off += n
+
+
+# ── 리플레이용 장치 대역: 라이브 장치와 같은 getter 인터페이스
+class ReplayMmWave:
+    """기록된 mmWave 페이로드를 MmWaveSensor의 파서에 그대로 통과시킴"""
+    def __init__(self):
+        from sensors.mmwave import MmWaveSensor
+        self._sensor = MmWaveSensor()
+    def feed(self, value):
+        dtype, payload = value
+        self._sensor._parse_payload(dtype, payload)
+    def start(self): pass
+    def stop(self): pass
+    def get_heart_rate(self):  return self._sensor.get_heart_rate()
+    def get_breath_rate(self): return self._sensor.get_breath_rate()
+    def heart_rate_series(self):  return self._sensor.heart_rate_series()
+    def breath_rate_series(self): return self._sensor.breath_rate_series()
+
+class ReplayFSR:
+    """기록된 원시 샘플을 FSRMonitor와 같은 히스테리시스/디바운스 판정에 통과시킴"""
+    def __init__(self, threshold=2000, hysteresis=200, debounce=0.02):
+        from sensors.fsr import PressDetector
+        self.threshold = int(threshold)
+        self.detector = PressDetector(threshold, threshold - hysteresis, debounce, debounce)
+        self.available = False
+        self._raw, self._voltage = 0, 0.0
+    def feed(self, value):
+        self._raw, self._voltage = value
+        self.detector.update(self._raw, clock.now())
+        self.available = True
+    def get_pressed(self): return self.detector.pressed
+    def get_raw(self):     return int(self._raw), float(self._voltage)
+    def start(self): pass
+    def stop(self): pass
+
+class ReplayOBD:
+    def __init__(self): self._rpm = self._speed = self._accel = None
+    def feed(self, value): self._rpm, self._speed, self._accel = value
+    def get_rpm(self):       return self._rpm
+    def get_speed(self):     return self._speed
+    def get_accel_pos(self): return self._accel
+    def stop(self): pass
+
+class ReplaySpiLink:
+    """기록된 FPGA rx 워드 → SpiLink.flags와 같은 RxFrame"""
+    def __init__(self):
+        from sensors.spi import RX_IDLE
+        self.flags = RX_IDLE
+    def feed(self, word):
+        from sensors.spi import RxFrame
+        self.flags = RxFrame(word)
+
+class ReplaySpiDev(ReplaySpiLink):
+    """spidev 대역 (spi=replay 백엔드): 라이브 SpiLink가 보낸 프레임마다 지금까지 재생된 마지막 rx 워드로 응답"""
+    def xfer2(self, tx):
+        return list(self.flags.word.to_bytes(8, "big")) * (len(tx) // 8)
+    def close(self): pass
+
+
+class SessionPlayer(Worker):
+    """라이브 파이프라인에서 세션의 센서 레코드를 기록 시각에 맞춰 feeds[kind](value)로 전달
+    (replay 백엔드용. start: 세션 0초에 해당하는 monotonic 시각, 카메라 재생과 공유)"""
+    def __init__(self, session_dir, feeds, stop_event=None, start=None):
+        super().__init__("SessionPlayer", stop_event)
+        self.feeds = dict(feeds)
+        self.start_at = time.monotonic() if start is None else start
+        self._it = iter(SessionReader(session_dir, kinds=list(self.feeds)))
+        self.done = False
+
+    def step(self):
+        rec = None if self.done else next(self._it, None)
+        if rec is None:
+            if not self.done: print("[SessionPlayer] end of session")
+            self.done = True; self.stop_event.wait(0.5); return
+        dt = self.start_at + rec.ts - time.monotonic()
+        if dt > 0 and self.stop_event.wait(dt): return
+        self.feeds[rec.kind](rec.value)
@@ -0,0 +1,265 @@
+"""주행 텔레메트리 기록: 프레임별 고정 크기 바이너리 레코드 + 구조화 이벤트(JSON Lines).
+프레임 루프는 미리 할당한 배치 배열에 한 행을 대입만 하고, 디스크 쓰기/fsync/파일 교체는 전용 스레드에서.
+SD 카드가 느려 빈 배치가 없으면 그 프레임은 버리고 dropped_frames만 증가 (호출 스레드는 절대 대기하지 않음).
+
+# DIR/<run>_<nnn>.tlm           [MAGIC][u32 헤더 길이][JSON 헤더: dtype, enums, meta] + 레코드 배열 (FRAME_DTYPE)
+# DIR/<run>_<nnn>.events.jsonl  {"ts", "wall", "source", "message", ...} 한 줄에 하나
+# run = 시작 시각 "YYYYmmdd-HHMMSS", nnn = 크기 기준 교체 번호
+
+    arr = load("DIR", day="20261018")          # 하루치 → NumPy 구조체 배열 (np.fromfile)
+    df  = to_dataframe(arr)                    # pandas (설치된 경우)
+    python -m common.telemetry DIR [--day YYYYmmdd] [--csv out.csv]
+"""
+import os, sys, json, glob, time, queue, struct, threading, argparse
+from collections import deque
+import numpy as np
+from common import clock
+
+MAGIC = b"DMSTLM01"
+_HLEN = struct.Struct("<I")
+
+# 프레임 레코드 (75바이트/프레임 → 30fps 8시간 약 65MB)
+FRAME_DTYPE = np.dtype([
+    ("ts", "<f8"), ("wall", "<f8"),                      # 캡처 시각 (monotonic), 기록 시각 (epoch)
+    ("face", "u1"), ("ear", "<f4"), ("eyes_closed", "u1"),
+    ("forward_ratio", "<f4"), ("forward", "u1"), ("head_down", "u1"), ("emotion", "u1"),
+    ("hr", "<f4"), ("br", "<f4"),                        # 없으면 NaN
+    ("rpm", "<f4"), ("speed", "<f4"), ("accel", "<f4"), ("brake", "<f4"), ("brake_rate", "<f4"),
+    ("fsr", "i1"),                                       # 1 밟음, 0 뗌, -1 센서 없음
+    ("pedal_flag", "u1"), ("cond_flags", "u1"), ("pm", "u1"),   # SPI 플래그
+    ("alert_level", "u1"), ("alert_rule", "u1"),         # 코드는 헤더 enums (0 = 없음)
+    ("infer_ms", "<f4"), ("render_ms", "<f4"), ("latency_ms", "<f4"),   # 추론, 평가+그리기, 캡처→렌더 완료
+])
+NO_FACE_CODE = 255
+
+
+def _nan(v): return np.nan if v is None else v
+
+def frame_row(res, st, enums, infer_ms, render_ms, latency_ms):
+    """InferenceWorker 결과(res) + RenderWorker.evaluate 결과(st) → FRAME_DTYPE 순서 튜플"""
+    fsr = st["fsr_pressed"]
+    return (res["ts"], time.time(),
+            res["face"], res["ear"], res["eyes_closed"],
+            res["forward_ratio"], res["is_forward_looking"], res["is_head_down"],
+            enums["emotion"].get(res["emotion"], NO_FACE_CODE),
+            _nan(st["heart_rate"]), _nan(st["resp_rate"]),
+            _nan(st["rpm"]), _nan(st["speed"]), _nan(st["accel_percent"]), res["brake_percent"], res["brake_rate"],
+            -1 if fsr is None else int(fsr),
+            st["pedal_flag_active"], st["condition_flags_active"], st["pedal_misuse_detected"],
+            enums["alert_level"].get(st["alert_level"], 0), enums["alert_rule"].get(st.get("alert_rule"), 0),
+            infer_ms, render_ms, latency_ms)
+
+
+class TelemetryLogger:
+    """batch행 배열 n_batches개를 돌려 씀. log()는 렌더 스레드 하나에서만, event()는 아무 스레드에서나.
+    flush_sec: 덜 찬 배치도 이 주기로 넘김, fsync_sec: fsync 주기 (매 쓰기마다 하지 않음),
+    max_bytes: 프레임 파일이 이 크기를 넘으면 새 파일 (이벤트 파일도 같이)"""
+    def __init__(self, path, dtype=FRAME_DTYPE, enums=None, meta=None, batch=256, n_batches=8,
+                 flush_sec=1.0, fsync_sec=5.0, max_bytes=64 << 20, max_events=1024):
+        self.path, self.dtype = path, np.dtype(dtype)
+        self.enums, self.meta = enums or {}, meta or {}
+        self.flush_sec, self.fsync_sec, self.max_bytes = float(flush_sec), float(fsync_sec), int(max_bytes)
+        self.run = time.strftime("%Y%m%d-%H%M%S")
+        os.makedirs(path, exist_ok=True)
+        self._free = deque(np.zeros(int(batch), self.dtype) for _ in range(max(2, int(n_batches))))
+        self._cur, self._n = self._free.popleft(), 0
+        self._t_handoff = time.monotonic()
+        self._q = queue.Queue(maxsize=int(n_batches) + int(max_events))
+        self.frames = self.dropped_frames = self.dropped_events = 0
+        self.bytes = self.files = self.fsyncs = 0
+        self._f = self._ev = None; self._idx = -1; self._size = 0
+        self._thread = threading.Thread(target=self._loop, name="Telemetry", daemon=True)
+        self._thread.start()
+
+    # ── 호출 스레드 쪽 (대기 없음)
+    def log(self, row):
+        """FRAME_DTYPE 순서 튜플 한 행"""
+        if self._cur is None and not self._take():
+            self.dropped_frames += 1; return
+        self._cur[self._n] = row; self._n += 1
+        if self._n == len(self._cur) or time.monotonic() - self._t_handoff >= self.flush_sec: self._handoff()
+
+    def log_frame(self, res, st, infer_ms=np.nan, render_ms=np.nan, latency_ms=np.nan):
+        self.log(frame_row(res, st, self.enums, infer_ms, render_ms, latency_ms))
+
+    def event(self, source, message, **fields):
+        rec = {"ts": clock.now(), "wall": time.time(), "source": source, "message": message}
+        rec.update(fields)
+        try: self._q.put_nowait(("event", rec))
+        except queue.Full: self.dropped_events += 1
+
+    def _take(self):
+        try: self._cur = self._free.popleft(); return True
+        except IndexError: return False
+
+    def _handoff(self):
+        if self._cur is None or not self._n: return
+        try: self._q.put_nowait(("frames", (self._cur, self._n)))
+        except queue.Full:                    # 이벤트가 큐를 채운 경우: 이 배치는 버림
+            self.dropped_frames += self._n; self._free.append(self._cur)
+        self._cur, self._n = None, 0
+        self._t_handoff = time.monotonic()
+        self._take()
+
+    # ── writer 스레드
+    def _header(self):
+        h = json.dumps({"version": 1, "run": self.run, "index": self._idx, "created": time.time(),
+                        "dtype": self.dtype.descr, "enums": self.enums, "meta": self.meta}, ensure_ascii=False).encode()
+        return MAGIC + _HLEN.pack(len(h)) + h
+
+    def _roll(self):
+        self._close_files()
+        self._idx += 1
+        base = os.path.join(self.path, f"{self.run}_{self._idx:03d}")
+        self._f = open(base + ".tlm", "wb"); self._ev = open(base + ".events.jsonl", "w", encoding="utf-8")
+        self._size = self._f.write(self._header())
+        self.files += 1
+
+    def _close_files(self):
+        for f in (self._f, self._ev):
+            if f is None: continue
+            f.flush(); os.fsync(f.fileno()); f.close()
+        self._f = self._ev = None
+
+    def _write(self, kind, value):
+        if self._f is None or self._size >= self.max_bytes: self._roll()
+        if kind == "frames":
+            arr, n = value
+            try:
+                self._size += self._f.write(memoryview(arr[:n]).cast("B"))
+                self.frames += n
+            finally:
+                self._free.append(arr)        # 쓰기 실패해도 배치는 돌려줌
+        else:
+            self._ev.write(json.dumps(value, ensure_ascii=False, default=str) + "\n")
+
+    def _loop(self):
+        last_sync = time.monotonic()
+        while True:
+            try: item = self._q.get(timeout=self.fsync_sec)
+            except queue.Empty: item = ()
+            if item is None: break
+            if item:
+                try: self._write(*item)
+                except Exception as e: print(f"[Telemetry] write error: {e}")
+            if self._f is not None and time.monotonic() - last_sync >= self.fsync_sec:
+                try:
+                    self._f.flush(); self._ev.flush()
+                    os.fsync(self._f.fileno()); os.fsync(self._ev.fileno()); self.fsyncs += 1
+                except Exception as e: print(f"[Telemetry] fsync error: {e}")
+                last_sync = time.monotonic()
+        try: self._close_files()
+        except Exception as e: print(f"[Telemetry] close error: {e}")
+        self.bytes = sum(os.path.getsize(p) for p in glob.glob(os.path.join(self.path, f"{self.run}_*.tlm")))
+
+    def close(self, timeout=5.0):
+        """남은 배치를 쓰고 종료 (log()를 부르는 스레드가 멈춘 뒤 호출)"""
+        self._handoff()
+        self._q.put(None)
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {"frames": self.frames, "dropped_frames": self.dropped_frames, "dropped_events": self.dropped_events,
+                "files": self.files, "fsyncs": self.fsyncs}
+
+
+# ── 이벤트: 콘솔 출력 + (켜져 있으면) 텔레메트리 기록
+_LOGGER = None
+
+def set_logger(logger):
+    global _LOGGER
+    _LOGGER = logger
+
+def event(source, message, echo=True, **fields):
+    """print(f"[source] message")를 대신하는 구조화 이벤트. echo=False면 기록만 (디버그 출력용)"""
+    if echo: print(f"[{source}] {message}")
+    logger = _LOGGER
+    if logger is not None: logger.event(source, message, **fields)
+
+
+# ── 읽기
+def _read_header(f):
+    if f.read(len(MAGIC)) != MAGIC: raise ValueError("not a telemetry file")
+    n = _HLEN.unpack(f.read(_HLEN.size))[0]
+    return json.loads(f.read(n)), len(MAGIC) + _HLEN.size + n
+
+def _files(path, day, suffix):
+    pat = os.path.join(path, "**", f"{day or ''}*{suffix}")
+    return sorted(glob.glob(pat, recursive=True), key=os.path.basename)
+
+def read_file(path):
+    """(헤더, 레코드 배열). 기록 중 끊긴 마지막 레코드는 버림"""
+    with open(path, "rb") as f:
+        header, off = _read_header(f)
+    dtype = np.dtype([tuple(d) for d in header["dtype"]])
+    count = (os.path.getsize(path) - off) // dtype.itemsize
+    return header, np.fromfile(path, dtype, count=count, offset=off)
+
+def _conform(arr, dtype):
+    """예전 형식 파일을 dtype에 맞춤 (없는 열은 0/NaN)"""
+    if arr.dtype == dtype: return arr
+    out = np.zeros(len(arr), dtype)
+    for name in dtype.names:
+        if name in arr.dtype.names: out[name] = arr[name]
+        elif out[name].dtype.kind == "f": out[name] = np.nan
+    return out
+
+def load(path, day=None, with_headers=False):
+    """path 아래(하위 폴더 포함)의 .tlm 파일을 시간 순으로 이어 붙인 구조체 배열. day: "YYYYmmdd" 접두어"""
+    parts, headers = [], []
+    for p in _files(path, day, ".tlm"):
+        try: h, a = read_file(p)
+        except Exception as e:
+            print(f"[Telemetry] skip {p}: {e}"); continue
+        parts.append(a); headers.append(h)
+    dtype = parts[-1].dtype if parts else FRAME_DTYPE
+    arr = np.concatenate([_conform(a, dtype) for a in parts]) if parts else np.zeros(0, dtype)
+    return (arr, headers) if with_headers else arr
+
+def load_events(path, day=None):
+    out = []
+    for p in _files(path, day, ".events.jsonl"):
+        with open(p, encoding="utf-8") as f:
+            for line in f:
+                try: out.append(json.loads(line))
+                except ValueError: pass        # 기록 중 끊긴 마지막 줄
+    return out
+
+def to_dataframe(arr, enums=None):
+    """pandas DataFrame (enums를 주면 emotion/alert 코드를 이름으로)"""
+    import pandas as pd
+    df = pd.DataFrame(arr)
+    for col, mapping in (enums or {}).items():
+        if col in df:
+            names = {v: k for k, v in mapping.items()}; names.setdefault(0 if col.startswith("alert") else NO_FACE_CODE, None)
+            df[col] = pd.Categorical(df[col].map(names))
+    return df
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Summarise recorded telemetry")
+    ap.add_argument("path")
+    ap.add_argument("--day", help="YYYYmmdd")
+    ap.add_argument("--csv", help="전체 레코드를 CSV로 저장")
+    args = ap.parse_args()
+    t0 = time.perf_counter()
+    arr, headers = load(args.path, args.day, with_headers=True)
+    events = load_events(args.path, args.day)
+    dt = time.perf_counter() - t0
+    if not len(arr): print("no telemetry"); return 1
+    dur = float(arr["ts"][-1] - arr["ts"][0])
+    print(f"{len(arr)} frames in {len(headers)} files ({len(events)} events), loaded in {dt:.2f}s; "
+          f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(arr['wall'][0]))} +{dur / 60:.1f} min")
+    for name in ("ear", "forward_ratio", "hr", "br", "speed", "brake", "infer_ms", "render_ms", "latency_ms"):
+        v = arr[name][np.isfinite(arr[name])]
+        if len(v): print(f"  {name:<14s} mean {v.mean():8.2f}  p95 {np.percentile(v, 95):8.2f}  max {v.max():8.2f}")
+    rules = {v: k for k, v in (headers[-1]["enums"].get("alert_rule") or {}).items()}
+    for code in np.unique(arr["alert_rule"][arr["alert_rule"] > 0]):
+        print(f"  alert {rules.get(int(code), code)}: {np.count_nonzero(arr['alert_rule'] == code) / max(len(arr), 1) * 100:.1f}% of frames")
+    if args.csv:
+        np.savetxt(args.csv, arr, delimiter=",", header=",".join(arr.dtype.names), comments="",
+                   fmt=["%.6f" if arr.dtype[n].kind == "f" else "%d" for n in arr.dtype.names])
+        print(f"[Telemetry] wrote {args.csv}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import threading
+import numpy as np
+from common import clock
+
+def minmax_decimate(values, ncols):
+    """값 배열을 ncols개 구간으로 나눠 구간별 (min, max). 픽셀 열 단위 그래프용"""
+    n = len(values)
+    edges = (np.arange(ncols) * n) // ncols
+    return np.minimum.reduceat(values, edges), np.maximum.reduceat(values, edges)
+
+
+class RingSeries:
+    """고정 용량 시계열 (타임스탬프 + 값). 배열을 두 번 이어 쓰는 방식이라
+    최근 n개 구간이 항상 연속 → window()/since()는 복사 없는 뷰.
+    쓰기는 한 스레드(센서)만, 읽기는 여러 스레드 가능 (뷰는 다음 쓰기로 덮일 수 있으니 바로 사용)"""
+    def __init__(self, capacity=4096, width=None, dtype=np.float32):
+        self.capacity = int(capacity)
+        self.width = width
+        shape = (2 * self.capacity,) if width is None else (2 * self.capacity, int(width))
+        self._t = np.zeros(2 * self.capacity, np.float64)
+        self._v = np.zeros(shape, dtype)
+        self._count = 0
+
+    def __len__(self): return min(self._count, self.capacity)
+
+    @property
+    def total(self): return self._count
+
+    def append(self, value, ts=None):
+        ts = clock.now() if ts is None else ts
+        i = self._count % self.capacity
+        self._t[i] = self._t[i + self.capacity] = ts
+        self._v[i] = self._v[i + self.capacity] = value
+        self._count += 1
+
+    def extend(self, values, ts):
+        """블록 추가 (values, ts 길이 같음)"""
+        v, t = np.asarray(values), np.asarray(ts, np.float64)
+        n = len(v)
+        if n > self.capacity:
+            v, t = v[-self.capacity:], t[-self.capacity:]
+            self._count += n - self.capacity; n = self.capacity
+        idx = (self._count + np.arange(n)) % self.capacity
+        self._t[idx] = t; self._t[idx + self.capacity] = t
+        self._v[idx] = v; self._v[idx + self.capacity] = v
+        self._count += n
+
+    def _range(self, n):
+        n = min(len(self), self.capacity if n is None else int(n))
+        end = (self._count - 1) % self.capacity + 1 + self.capacity if self._count else self.capacity
+        return end - n, end
+
+    def window(self, n=None):
+        """최근 n개 (t, v) 뷰 (오래된 → 최신 순)"""
+        a, b = self._range(n)
+        return self._t[a:b], self._v[a:b]
+
+    def since(self, t0):
+        """t0 이후 샘플 (t, v) 뷰"""
+        t, v = self.window()
+        k = int(np.searchsorted(t, t0, side="left"))
+        return t[k:], v[k:]
+
+    def last(self, default=None):
+        """가장 최근 (t, v), 없으면 default"""
+        if not self._count: return default
+        i = (self._count - 1) % self.capacity
+        return float(self._t[i]), self._v[i]
+
+    def minmax(self, ncols, n=None):
+        """최근 n개를 ncols 열로 줄인 (min, max). 샘플이 ncols보다 적으면 (v, v)"""
+        _, v = self.window(n)
+        if len(v) <= ncols: return v, v
+        return minmax_decimate(v, ncols)
+
+
+class TelemetryStore:
+    """데이터 타입(키)별 RingSeries 모음. 파서가 쓰고 UI/분석이 같은 버퍼를 읽음"""
+    def __init__(self, capacity=4096):
+        self.capacity = int(capacity)
+        self._series = {}
+        self._lock = threading.Lock()     # 시리즈 생성만 보호 (append는 단일 writer)
+
+    def series(self, key, width=None, dtype=np.float32):
+        s = self._series.get(key)
+        if s is None:
+            with self._lock:
+                s = self._series.get(key)
+                if s is None:
+                    s = self._series[key] = RingSeries(self.capacity, width, dtype)
+        return s
+
+    def append(self, key, value, ts=None, width=None, dtype=np.float32):
+        self.series(key, width, dtype).append(value, ts)
+
+    def latest(self, key, default=None):
+        s = self._series.get(key)
+        return default if s is None else s.last(default)
+
+    def keys(self): return list(self._series)
+    def __contains__(self, key): return key in self._series
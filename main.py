@@ -1,251 +1,636 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import time, math, copy, itertools, csv
-from collections import deque
+import time, math, copy, itertools, csv, threading, argparse
 
 import cv2 as cv
 import numpy as np
 from PIL import ImageFont, ImageDraw, Image
 
-# 내부 모듈
-from sensors.mmwave import MmWaveSensor
-from sensors.fsr import FSRMonitor
-from sensors.spi import open_spi, xfer_once
-from sensors.obd_client import OBDClient, OBD_AVAILABLE
+# 내부 모듈 (하드웨어 라이브러리는 sensors.backends 팩토리에서 필요할 때만 import)
+from sensors.spi import SpiLink
+from sensors.backends import BackendContext, parse_backends, create as create_backend, KINDS as BACKEND_KINDS
+from sensors.camera import CAPTURE_PROFILES
 
 from vision.emotion import EmotionModule
 from vision.drowsiness import DrowsinessModule
 from vision.attention import ForwardAttentionModule
 from vision.headpos import HeadPositionModule
 from vision.pedal_tracker import PedalTracker
+from vision.landmarks import landmarks_to_array
 
 from ui.dashboard import render_dashboard_exact
-from ui.overlay import draw_fullscreen_overlay_center_text
+from ui.overlay import AlertCompositor, draw_hud
 from common.calibration import CalibrationManager
-from common.helpers import enhance_frame_for_face_detection
-
-# Mediapipe FaceMesh
-import mediapipe as mp
-mp_face_mesh = mp.solutions.face_mesh
-FACE_MESH = mp_face_mesh.FaceMesh(
-    max_num_faces=1, refine_landmarks=True,
-    min_detection_confidence=0.5, min_tracking_confidence=0.5
-)
-
-def create_jetson_csi_pipeline(camera_id=0, capture_width=1280, capture_height=720,
-                               display_width=1280, display_height=720, framerate=30, flip_method=2):
-    return (
-        f"nvarguscamerasrc sensor-id={camera_id} ! "
-        f"video/x-raw(memory:NVMM), width=(int){capture_width}, height=(int){capture_height}, "
-        f"format=(string)NV12, framerate=(fraction){framerate}/1 ! "
-        f"nvvidconv flip-method={flip_method} ! "
-        f"video/x-raw, width=(int){display_width}, height=(int){display_height}, format=(string)BGRx ! "
-        f"videoconvert ! video/x-raw, format=(string)BGR ! appsink drop=True"
+from common.helpers import enhance_frame_for_face_detection, limit_size, FaceROITracker
+from common.pipeline import LatestQueue, Worker, CaptureThread, init_parallel
+from common.framepool import FramePool
+from common.scheduler import ModuleScheduler
+from common import clock, telemetry
+from common.telemetry import TelemetryLogger, NO_FACE_CODE
+from common.rules import RuleEngine, driver_rules, print_event, DRIVER_RULE_DEFAULTS, LEVEL_EMERGENCY, ESCALATE
+from common.profiling import PROFILER, span, format_snapshot, write_stats, StatsDumper
+from common.session import (SessionRecorder, SessionReader, ReplayMmWave, ReplayFSR, ReplayOBD, ReplaySpiLink,
+                            K_DRIVER, K_PEDAL, K_LANDMARKS, K_MMWAVE, K_FSR, K_OBD, K_SPI_RX)
+
+def create_face_mesh():
+    """Mediapipe FaceMesh (import와 그래프 초기화가 무거워 처음 필요할 때 생성)"""
+    import mediapipe as mp
+    return mp.solutions.face_mesh.FaceMesh(
+        max_num_faces=1, refine_landmarks=True,
+        min_detection_confidence=0.5, min_tracking_confidence=0.5
     )
 
-def main():
-    # 운전자 카메라 열기 (Jetson 파이프라인 → 실패시 0번)
-    pipeline = create_jetson_csi_pipeline(flip_method=4)
-    cap_driver = cv.VideoCapture(pipeline, cv.CAP_GSTREAMER)
-    if not cap_driver.isOpened():
-        cap_driver = cv.VideoCapture(0)
-        if not cap_driver.isOpened():
-            print("Error: cannot open any camera"); return
-
-    # 페달 카메라
-    pedal_cap = cv.VideoCapture(1)
-    pedal_connected = pedal_cap.isOpened()
-
-    # ── 모듈 준비
-    emo           = EmotionModule()
-    drowsy        = DrowsinessModule(ear_thresh=0.2, wait_time=2.0)
-    forward       = ForwardAttentionModule()
-    head_pos      = HeadPositionModule()
-    emergency     = None  # 대시보드에서 오버레이 처리
-    calibration   = CalibrationManager()
-    pedal_tracker = PedalTracker()
-    mmwave_sensor = MmWaveSensor(debug=False)
-    fsr           = FSRMonitor(threshold=2000, check_interval=0.05, not_pressed_duration=5.0, debug=False)
+EMOTION_CODES = {"Neutral":0, "Happy":1, "Sad":2, "Surprise":4, "Angry":3}
+
+# 모듈별 목표 실행 주기(Hz). None = 카메라 프레임마다 (안전 필수 모듈)
+MODULE_RATES = {"drowsy": None, "forward": None, "head_pos": 10, "emotion": 5}
+FRAME_BUDGET = 1 / 30.0
+PEDAL_FPS = 60
+
+PLOT_WINDOW_SEC = 60.0   # 심박/호흡 그래프 표시 구간(초)
+HUD_REFRESH_SEC = 0.5    # 'h' 프로파일링 HUD 갱신 주기 (백분위 계산은 이 주기로만)
+DASH_W, DASH_H = 1366, 768
+# 다른 스레드로 넘기는 풀 버퍼 개수: 만드는 중 1 + 큐(LatestQueue(1)) 1 + 받는 쪽이 쓰는 중 1 (+여유)
+FRAME_RING = 4
+
+# 경고 판정 시간/임계값은 common.rules.DRIVER_RULE_DEFAULTS (--rule로 변경). 레벨별 오버레이 (BGR, 알파)
+ALERT_STYLE = {"warn": ((0,255,255), 0.45), LEVEL_EMERGENCY: ((0,0,255), 0.55)}
+EMERGENCY_TEXT = "긴급: 운전자 반응이 없습니다."
+
+
+class VehicleState:
+    """OBD 값(없으면 데모 값) + 마지막 가속 페달량 유지"""
+    def __init__(self, obd, recorder=None):
+        self.obd = obd
+        self.recorder = recorder
+        self.t0 = clock.now()
+        self.accel_percent = 0
+
+    def poll(self):
+        if self.obd:
+            rpm   = self.obd.get_rpm()
+            speed = self.obd.get_speed()
+            accel_pos = self.obd.get_accel_pos()
+            if self.recorder: self.recorder.obd(rpm, speed, accel_pos)
+        else:
+            rpm = speed = accel_pos = None
 
-    fsr.start()
-    mmwave_sensor.start()
+        if rpm   is None:
+            t = clock.now() - self.t0
+            rpm = max(0, min(8000, int(1500 + 1200*math.sin(t*1.2) + 500*math.sin(t*0.3))))
+        if speed is None:
+            t = clock.now() - self.t0
+            speed = max(0, min(200, int(60 + 40*math.sin(t*0.8))))
 
-    obd = None
-    if OBD_AVAILABLE:
-        try:
-            tmp = OBDClient(port='/dev/ttyACM0', baudrate=9600, timeout=1.0, debug=False)
-            if tmp.start():
-                obd = tmp
+        if accel_pos is not None: self.accel_percent = int(max(0, min(100, accel_pos)))
+        return rpm, speed, self.accel_percent
+
+
+class InferenceWorker(Worker):
+    """운전자 프레임 → 전처리/FaceMesh/비전 모듈, 페달 프레임 → PedalTracker"""
+    def __init__(self, stop_event, q_driver, q_out,
+                 emo, drowsy, forward, head_pos, pedal=None, recorder=None, face_mesh=None,
+                 infer_max=640, flip_input=False):
+        super().__init__("Inference", stop_event)
+        self.recorder = recorder
+        self.infer_max = int(infer_max)     # FaceMesh 입력(얼굴 ROI) 최대 변 길이
+        self.flip_input = flip_input        # 캡처가 좌우 반전을 못 한 입력 (예전 형식 세션 리플레이)
+        self.face_mesh = face_mesh   # None이면 첫 검출 때 생성, False면 사용 불가 (랜드마크 없이 동작)
+        self.q_driver, self.q_out = q_driver, q_out
+        self.emo, self.drowsy, self.forward, self.head_pos = emo, drowsy, forward, head_pos
+        self.pedal = pedal   # PedalWorker (페달 카메라 없으면 None)
+        self.latest = None   # SPI 워커가 읽는 최신 결과 (참조 교체로 발행)
+        self._recal = threading.Event()
+        self.roi_tracker = FaceROITracker()
+        self.pool = FramePool("infer")     # 전처리 버퍼 (FaceMesh 입력은 process 안에서만 쓰므로 1벌)
+
+        # 느리게 변하는 신호는 낮은 주기로, 졸음/전방주시는 매 프레임 (예산 초과 시 우선)
+        self.sched = ModuleScheduler(frame_budget=FRAME_BUDGET, clock=clock.now)
+        self.sched.add("drowsy",   MODULE_RATES["drowsy"],   critical=True,  default=(0.0, False))
+        self.sched.add("forward",  MODULE_RATES["forward"],  critical=True,  default=(0.0, "DANGER", False))
+        self.sched.add("head_pos", MODULE_RATES["head_pos"], critical=False, default=(False, "No_Face"))
+        self.sched.add("emotion",  MODULE_RATES["emotion"],  critical=False, default="Neutral")
+
+    def _face_mesh(self):
+        if self.face_mesh is None:
+            try: self.face_mesh = create_face_mesh()
+            except Exception as e:
+                print(f"[FaceMesh] unavailable ({e}); running without landmarks"); self.face_mesh = False
+        return self.face_mesh
+
+    def request_recalibration(self):
+        self._recal.set()
+        if self.pedal: self.pedal.request_recalibration()
+
+    def step(self):
+        item = self.q_driver.get(timeout=0.1)
+        if item is None: return
+        ts, frame = item
+        if self.recorder: self.recorder.driver_frame(frame, ts)
+
+        t0 = time.perf_counter()
+        with span("infer.total"):
+            result = self.process(ts, frame)
+        result["infer_ms"] = (time.perf_counter() - t0) * 1e3
+        self.latest = result
+        self.q_out.put(result)
+
+    def process(self, ts, frame, landmarks=None, detect=True):
+        """운전자 원본 프레임 1장 처리. detect=False면 FaceMesh 대신 주어진 landmarks 사용 (리플레이)"""
+        self.sched.begin_frame()
+        if self.flip_input:       # 라이브는 캡처 파이프라인에서 이미 방향 보정 (결과에 실려 렌더로 넘어가므로 링 버퍼)
+            frame = cv.flip(frame, 1, dst=self.pool.ring("flip", frame.shape, n=FRAME_RING))
+
+        if self._recal.is_set():
+            self._recal.clear(); self.roi_tracker.reset()
+            self.forward.recalibrate(); self.head_pos.recalibrate()
+
+        if detect and self._face_mesh():
+            # 전처리 & 랜드마크 (이전 얼굴 주변 ROI만, 놓치면 전체 화면)
+            with span("infer.enhance"):
+                face_img, box = self.roi_tracker.crop(frame)
+                rgb = enhance_frame_for_face_detection(limit_size(face_img, self.infer_max, self.pool), rgb=True, pool=self.pool)
+                rgb.flags.writeable = False
+            with span("infer.facemesh"):
+                results = self.face_mesh.process(rgb)
+            # 프레임당 한 번 (478,3) float32 배열로 변환 → 모든 모듈이 공유 (전체 프레임 좌표)
+            lms = landmarks_to_array(results.multi_face_landmarks[0]) if results.multi_face_landmarks else None
+            lms = self.roi_tracker.update(lms, box, frame.shape)
+            if self.recorder: self.recorder.landmarks(lms, ts)
+        else:
+            lms = None if detect else landmarks       # FaceMesh 사용 불가면 얼굴 없음으로 처리
+
+        # 각 모듈 (필수 모듈 먼저 → 남은 예산으로 나머지)
+        sched = self.sched
+        with span("infer.modules"):
+            ear, eyes_closed = sched.run("drowsy", self.drowsy.process, frame, lms)
+            forward_ratio, attn_status, is_forward_looking = sched.run("forward", self.forward.process, lms)
+            if lms is not None:
+                is_head_down, head_status = sched.run("head_pos", self.head_pos.process, lms)
+                emotion = sched.run("emotion", self.emo.infer, frame, lms)
             else:
-                print("[OBD] not started; continue without OBD")
-        except Exception as e:
-            print(f"[OBD] init error: {e}")
-
-    # 그래프 히스토리
-    hr_hist, br_hist = deque(maxlen=200), deque(maxlen=200)
-
-    # 경과 타이머 상태
-    drowsy_on_since = None
-    twofoot_on_since = None
-    forward_off_since = None
-
-    # 임계값(초)
-    DROWSY_WARN_SEC, TWOFOOT_WARN_SEC, FORWARD_WARN_SEC = 3.0, 5.0, 3.0
-
-    # SPI 준비
-    spi = open_spi()
-    last_accel_percent = 0
-    t0 = time.time()
-
-    window = "Enhanced Driver Dashboard"
-    cv.namedWindow(window, cv.WINDOW_NORMAL)
-    cv.setWindowProperty(window, cv.WND_PROP_FULLSCREEN, cv.WINDOW_FULLSCREEN)
-
-    print("Press ESC to exit, 'r' for 3s recalibration, 'p' for pedal calibration")
-
-    while True:
-        ok, frame = cap_driver.read()
-        if not ok: break
-        frame = cv.flip(frame, 1)
-
-        # 전처리 & 랜드마크
-        enhanced = enhance_frame_for_face_detection(frame)
-        rgb = cv.cvtColor(enhanced, cv.COLOR_BGR2RGB); rgb.flags.writeable = False
-        results = FACE_MESH.process(rgb); rgb.flags.writeable = True
-        face_lms = results.multi_face_landmarks[0] if results.multi_face_landmarks else None
-        lm_raw = face_lms.landmark if face_lms else None
+                # 얼굴이 없으면 이전 결과를 재사용하지 않음
+                is_head_down, head_status = self.head_pos.process(None)
+                emotion = "No Face"
+                sched.reset("head_pos"); sched.reset("emotion")
+
+        return {
+            "ts": ts, "frame": frame, "pedal_view": self.pedal.view if self.pedal else None, "landmarks": lms,
+            "face": lms is not None, "emotion": emotion, "ear": ear, "eyes_closed": eyes_closed,
+            "is_head_down": is_head_down, "head_status": head_status,
+            "forward_ratio": forward_ratio, "attn_status": attn_status,
+            "is_forward_looking": is_forward_looking,
+            "brake_percent": self.pedal.tracker.get_brake_percent() if self.pedal else 0.0,
+            "brake_rate": self.pedal.tracker.get_brake_rate() if self.pedal else 0.0,
+        }
+
+
+class PedalWorker(Worker):
+    """페달 카메라 프레임마다 마커 추적 (운전자 카메라 FPS와 독립, 캡처 타임스탬프 기준)"""
+    def __init__(self, stop_event, q_in, tracker, recorder=None):
+        super().__init__("Pedal", stop_event)
+        self.q_in, self.tracker, self.recorder = q_in, tracker, recorder
+        self.view = None       # 마지막 표시용 프레임 (참조 교체로 발행)
+        self.frames = 0
+        self._recal = threading.Event()
+        self._cal = threading.Event()
+        self._cal_next = "zero"    # 'p' 키: 놓은 위치(0%) → 끝까지 밟은 위치(100%) 순서
+
+    def request_recalibration(self): self._recal.set()
+    def request_calibration(self): self._cal.set()
+
+    def process(self, pf, ts=None):
+        if self.recorder: self.recorder.pedal_frame(pf, ts)
+        if self._recal.is_set():
+            self._recal.clear(); self.tracker.recalibrate()
+        if self._cal.is_set():
+            self._cal.clear()
+            kind = self._cal_next
+            self.tracker.begin_capture(kind)
+            self._cal_next = "full" if kind == "zero" else "zero"
+            print(f"[Pedal] capturing {kind} position" +
+                  (" (then press the brake fully and hit 'p' again)" if kind == "zero" else ""))
+        if not self.tracker.is_calibrated:
+            self.tracker.calibrate_brake_simple(pf)
+        with span("pedal.track"):
+            self.view, _ = self.tracker.update(pf, ts)
+        self.frames += 1
+
+    def step(self):
+        item = self.q_in.get(timeout=0.1)
+        if item is None: return
+        self.process(item[1], item[0])
+
+
+def make_spi_source(inference, vehicle, mmwave_sensor):
+    """SPI 워커가 10Hz마다 읽는 FPGA 입력 (pedal, expression, bpm, rr)"""
+    def source():
+        latest = inference.latest
+        emotion = latest["emotion"] if latest else "Neutral"
+        return (int(vehicle.accel_percent), int(EMOTION_CODES.get(emotion, 0)),
+                int(mmwave_sensor.get_heart_rate() or 0), int(mmwave_sensor.get_breath_rate() or 0))
+    return source
+
+
+class RenderWorker(Worker):
+    """추론 결과 + 센서 값 → 대시보드/경고 오버레이 합성"""
+    def __init__(self, stop_event, q_in, q_out, calibration, vehicle, mmwave_sensor, fsr, spi_link, alert_style="full",
+                 rules=None, telemetry=None):
+        super().__init__("Render", stop_event)
+        self.q_in, self.q_out = q_in, q_out
+        self.calibration, self.vehicle = calibration, vehicle
+        self.mmwave, self.fsr, self.spi_link = mmwave_sensor, fsr, spi_link
+        self.show_hud = False            # 'h' 키로 토글
+        self._hud_lines, self._hud_at = [], -1e9
+        self.alerts = AlertCompositor(alert_style)   # 경고 틴트/문구 캐시 ("banner"면 가운데 띠만)
+        self.pool = FramePool("render")  # 대시보드 출력 링 (화면 스레드가 표시하는 동안 덮어쓰지 않게) + 변환 버퍼
+        self.rules = RuleEngine(rules if rules is not None else driver_rules())   # 졸음/전방미주시/양발운전 타이머
+        self._recal = threading.Event()
+        self.telemetry = telemetry       # TelemetryLogger: 프레임별 레코드 (대기 없이 배치에 대입만)
+
+    def request_recalibration(self): self._recal.set()
+
+    def step(self):
+        res = self.q_in.get(timeout=0.1)
+        if res is None: return
+        t0 = time.perf_counter()
+        with span("render.evaluate"):
+            st = self.evaluate(res)
+        dash = self.draw(res, st)
+        if self.telemetry is not None:
+            self.telemetry.log_frame(res, st, res.get("infer_ms", np.nan), (time.perf_counter() - t0) * 1e3,
+                                     (clock.now() - res["ts"]) * 1e3)
+        self.q_out.put((res["ts"], dash, st["alert_text"]))
+
+    def evaluate(self, res):
+        """센서 값 읽기 + 경고 규칙 갱신 + 경고 문구 결정 (그리기 없음)"""
+        is_forward_looking = res["is_forward_looking"]
 
         # 캘리브레이션 진행 상태
-        is_calibrating, cal_remaining = calibration.update()
-
-        # 각 모듈
-        emotion = emo.infer(frame, face_lms) if face_lms is not None else "No Face"
-        ear, is_drowsy = drowsy.process(frame, lm_raw)
-        is_head_down, head_status = head_pos.process(lm_raw)
-        forward_ratio, attn_status, is_forward_looking = forward.process(lm_raw)
+        is_calibrating, cal_remaining = self.calibration.update()
 
         # mmWave 센서(심박수,호흡수)
-        heart_rate = mmwave_sensor.get_heart_rate()
-        resp_rate  = mmwave_sensor.get_breath_rate()
-        if heart_rate is not None: hr_hist.append(float(heart_rate))
-        if resp_rate  is not None: br_hist.append(float(resp_rate))
-
-        # 페달 카메라
-        pedal_view = None
-        if pedal_connected:
-            ok_p, pf = pedal_cap.read()
-            if ok_p:
-                if not pedal_tracker.is_calibrated:
-                    pedal_tracker.calibrate_brake_simple(pf)
-                pedal_view, _ = pedal_tracker.update(pf)
+        heart_rate = self.mmwave.get_heart_rate()
+        resp_rate  = self.mmwave.get_breath_rate()
 
         # OBD (없으면 데모 값)
-        if obd:
-            rpm   = obd.get_rpm()
-            speed = obd.get_speed()
-            accel_pos = obd.get_accel_pos()
-        else:
-            rpm = speed = accel_pos = None
-
-        if rpm   is None:
-            t = time.time() - t0
-            rpm = max(0, min(8000, int(1500 + 1200*math.sin(t*1.2) + 500*math.sin(t*0.3))))
-        if speed is None:
-            t = time.time() - t0
-            speed = max(0, min(200, int(60 + 40*math.sin(t*0.8))))
-
-        accel_percent = int(max(0, min(100, accel_pos))) if accel_pos is not None else last_accel_percent
-        last_accel_percent = accel_percent
-        brake_percent = pedal_tracker.get_brake_percent()
-
-        # SPI 전송/수신
-        emotion_map = {"Neutral":0, "Happy":1, "Sad":2, "Surprise":4, "Angry":3}
-        expression_code = emotion_map.get(emotion, 0)
-        try:
-            spi_result = xfer_once(
-                spi,
-                int(accel_percent),
-                int(expression_code),
-                int(heart_rate or 0),
-                int(resp_rate or 0),
-            )
-        except Exception as e:
-            print(f"[SPI] error: {e}")
-            spi_result = {"pedal_flag":0, "cond_flags":0, "pm":0}
+        rpm, speed, accel_percent = self.vehicle.poll()
 
+        # SPI 플래그 (SPI 워커가 발행한 최신 값)
+        spi_result = self.spi_link.flags
         pedal_flag_active     = bool(spi_result.get("pedal_flag", 0))
         condition_flags_active= bool(spi_result.get("cond_flags", 0))
         pedal_misuse_detected = bool(spi_result.get("pm", 0))
 
         # FSR 상태
-        fsr_pressed = fsr.get_pressed() if fsr.available else None
-        now_ts = time.time()
-
-        # 타이머 누적
-        drowsy_on_since   = drowsy_on_since   or (now_ts if is_drowsy else None)
-        if not is_drowsy: drowsy_on_since = None
-
-        twofoot_on_since  = twofoot_on_since  or (now_ts if fsr_pressed is False else None)
-        if fsr_pressed is not False: twofoot_on_since = None
-
-        forward_off_since = forward_off_since or (now_ts if not is_forward_looking else None)
-        if is_forward_looking: forward_off_since = None
-
-        drowsy_dur  = (now_ts - drowsy_on_since)   if drowsy_on_since   else 0.0
-        twofoot_dur = (now_ts - twofoot_on_since)  if twofoot_on_since  else 0.0
-        forward_dur = (now_ts - forward_off_since) if forward_off_since else 0.0
-
-        # 대시보드 렌더
-        dash = render_dashboard_exact(
-            frame_driver=frame,
-            frame_pedal=pedal_view,
-            rpm=rpm, speed=speed,
-            accel_percent=accel_percent, brake_percent=brake_percent,
-            heart_rate=heart_rate, breath_rate=resp_rate,
-            hr_hist=list(hr_hist), br_hist=list(br_hist),
-            W=1366, H=768,
-            fsr_pressed=fsr_pressed, twofoot_dur=twofoot_dur,
-            pedal_flag_active=pedal_flag_active,
-            condition_flags_active=condition_flags_active,
-            pedal_misuse_detected=pedal_misuse_detected
-        )
+        fsr_pressed = self.fsr.get_pressed() if self.fsr.available else None
+        now_ts = clock.now()
+
+        # 경고 규칙 (캘리브레이션 중에도 타이머는 진행, 표시만 보류)
+        rules = self.rules
+        if self._recal.is_set():
+            self._recal.clear(); rules.reset(now_ts)
+        rules.tick({"face": res["face"], "ear": res["ear"], "is_forward_looking": is_forward_looking,
+                    "fsr_pressed": fsr_pressed}, now_ts)
+        top = rules.top()
+        alert_text = alert_level = alert_rule = None
+        if top is not None and not is_calibrating:
+            alert_level, alert_rule = top.level, top.rule.name
+            alert_text = EMERGENCY_TEXT if alert_level == LEVEL_EMERGENCY else top.rule.message
+
+        return {
+            "rpm": rpm, "speed": speed, "accel_percent": accel_percent,
+            "heart_rate": heart_rate, "resp_rate": resp_rate,
+            "fsr_pressed": fsr_pressed, "twofoot_dur": rules.held("twofoot", now_ts),
+            "is_drowsy": rules.active("drowsy"),
+            "attn_status": "DANGER" if rules.active("forward") else res["attn_status"],
+            "pedal_flag_active": pedal_flag_active, "condition_flags_active": condition_flags_active,
+            "pedal_misuse_detected": pedal_misuse_detected,
+            "is_calibrating": is_calibrating, "cal_remaining": cal_remaining,
+            "alert_text": alert_text, "alert_level": alert_level, "alert_rule": alert_rule,
+        }
+
+    def draw(self, res, st):
+        # 대시보드 렌더 (그래프는 mmWave 시계열 버퍼의 최근 구간 뷰를 그대로 사용)
+        t0 = clock.now() - PLOT_WINDOW_SEC
+        with span("render.dashboard"):
+            dash = render_dashboard_exact(
+                frame_driver=res["frame"],
+                frame_pedal=res["pedal_view"],
+                rpm=st["rpm"], speed=st["speed"],
+                accel_percent=st["accel_percent"], brake_percent=res["brake_percent"],
+                heart_rate=st["heart_rate"], breath_rate=st["resp_rate"],
+                hr_hist=self.mmwave.heart_rate_series().since(t0)[1],
+                br_hist=self.mmwave.breath_rate_series().since(t0)[1],
+                W=DASH_W, H=DASH_H,
+                fsr_pressed=st["fsr_pressed"], twofoot_dur=st["twofoot_dur"],
+                pedal_flag_active=st["pedal_flag_active"],
+                condition_flags_active=st["condition_flags_active"],
+                pedal_misuse_detected=st["pedal_misuse_detected"],
+                out=self.pool.ring("dash", (DASH_H, DASH_W, 3), n=FRAME_RING), pool=self.pool
+            )
 
         # 경고/오버레이
-        overlay_active = False
-        if is_calibrating:
-            draw_fullscreen_overlay_center_text(
-                dash, f"캘리브레이션 중... {cal_remaining:.1f}초",
-                bgr_color=(255,0,0), alpha=0.55, font_scale=1.8, thickness=5
-            )
-            overlay_active = True
-        else:
-            alert_text = None
-            if drowsy_on_since   and drowsy_dur  >= DROWSY_WARN_SEC:  alert_text = "졸음운전이 감지되었습니다."
-            elif forward_off_since and forward_dur >= FORWARD_WARN_SEC: alert_text = "전방미주시 상태입니다. 전방을 주시해주세요."
-            elif twofoot_on_since  and twofoot_dur >= TWOFOOT_WARN_SEC:  alert_text = "양발운전이 감지되었습니다."
-
-            if alert_text:
-                draw_fullscreen_overlay_center_text(
-                    dash, alert_text, bgr_color=(0,255,255), alpha=0.45, font_scale=1.6, thickness=4
+        with span("render.overlay"):
+            if st["is_calibrating"]:
+                dash = self.alerts.draw(
+                    dash, f"캘리브레이션 중... {st['cal_remaining']:.1f}초",
+                    bgr_color=(255,0,0), alpha=0.55, font_scale=1.8, thickness=5
                 )
-                overlay_active = True
-
-        cv.imshow(window, dash)
-        key = cv.waitKey(1) & 0xFF
-        if key == 27: break
-        elif key in (ord('r'), ord('R')):
-            calibration.start_calibration()
-            drowsy.recalibrate(); forward.recalibrate(); head_pos.recalibrate(); pedal_tracker.recalibrate()
-
-    # 종료
-    try: mmwave_sensor.stop()
-    except: pass
-    try: fsr.stop()
-    except: pass
-    cap_driver.release()
-    if pedal_connected: pedal_cap.release()
-    cv.destroyAllWindows()
+            elif st["alert_text"]:
+                color, alpha = ALERT_STYLE[st["alert_level"]]
+                dash = self.alerts.draw(dash, st["alert_text"], bgr_color=color, alpha=alpha, font_scale=1.6, thickness=4)
+        if self.show_hud: dash = self.draw_hud(dash)
+        return dash
+
+    def draw_hud(self, dash):
+        """프로파일링 HUD (통계는 HUD_REFRESH_SEC마다 다시 계산)"""
+        now_ts = time.monotonic()
+        if now_ts - self._hud_at >= HUD_REFRESH_SEC:
+            self._hud_lines, self._hud_at = format_snapshot(PROFILER.snapshot()), now_ts
+        return draw_hud(dash, self._hud_lines)
+
+
+def on_emergency(ev):
+    """긴급 단계 진입 (차량 비상 연락 장치를 붙일 지점. 지금은 로그만)"""
+    if ev.kind == ESCALATE and ev.level == LEVEL_EMERGENCY:
+        print(f"[Alert] EMERGENCY: {ev.rule} for {ev.held:.1f}s")
+
+def log_alert_event(ev):
+    """경고 이벤트 → 텔레메트리 이벤트 파일 (콘솔 출력은 print_event)"""
+    telemetry.event("Alert", f"{ev.rule} {ev.kind}", echo=False, **ev.as_dict())
+
+def telemetry_enums(rules):
+    """텔레메트리 헤더에 남기는 코드표 (FRAME_DTYPE의 emotion/alert_level/alert_rule 열)"""
+    return {"emotion": dict(EMOTION_CODES, **{"No Face": NO_FACE_CODE}),
+            "alert_level": {"warn": 1, LEVEL_EMERGENCY: 2},
+            "alert_rule": {name: i + 1 for i, name in enumerate(r.name for r in rules)}}
+
+def _shutdown(name, fn):
+    try: fn()
+    except Exception as e: print(f"[{name}] shutdown error: {e}")
+
+def main(record_dir=None, record_mode="video", stats_path=None, stats_period=5.0, backends=None, source=None,
+         profile="default", alert_style="full", rule_params=None, telemetry_dir=None):
+    """backends: {종류: real|sim|replay|auto} (parse_backends), source: replay 백엔드가 재생할 세션,
+    profile: 운전자 카메라 CAPTURE_PROFILES 이름, alert_style: 경고 오버레이 full | banner,
+    rule_params: 경고 규칙 파라미터 덮어쓰기 (DRIVER_RULE_DEFAULTS 키),
+    telemetry_dir: 프레임별 텔레메트리/센서 이벤트 기록 디렉터리 (common.telemetry)"""
+    t_start = time.monotonic()
+    cfg = backends or parse_backends()
+    ctx = BackendContext(source)
+    cam_profile = CAPTURE_PROFILES[profile]
+    print("[Init] backends: " + ", ".join(f"{k}={cfg[k]}" for k in BACKEND_KINDS) + f"; driver camera {cam_profile}")
+
+    # ── 장치 열기/모델 로드를 동시에 (카메라 파이프라인, OBD 초기화, TFLite/FaceMesh 로드가 서로 기다리지 않게)
+    init = init_parallel({
+        "DriverCam": lambda: create_backend("camera", cfg["camera"], ctx, role="driver", profile=cam_profile),
+        "PedalCam":  lambda: create_backend("camera", cfg["camera"], ctx, role="pedal", fps=PEDAL_FPS),
+        "mmWave":    lambda: create_backend("mmwave", cfg["mmwave"], ctx),
+        "FSR":       lambda: create_backend("fsr", cfg["fsr"], ctx),
+        "OBD":       lambda: create_backend("obd", cfg["obd"], ctx),
+        "SPI":       lambda: create_backend("spi", cfg["spi"], ctx),
+        "FaceMesh":  create_face_mesh,
+        "Emotion":   EmotionModule,
+    })
+    cap_driver, pedal_cap = init["DriverCam"], init["PedalCam"]
+    mmwave_sensor, fsr, obd, spi = init["mmWave"], init["FSR"], init["OBD"], init["SPI"]
+    if cap_driver is None or mmwave_sensor is None or fsr is None or spi is None:
+        print("Error: required backend unavailable (camera/mmWave/FSR/SPI)")
+        for name, dev, fn in (("OBD", obd, "stop"), ("SPI", spi, "close"), ("DriverCam", cap_driver, "release"),
+                              ("PedalCam", pedal_cap, "release")):
+            if dev is not None: _shutdown(name, getattr(dev, fn))
+        return
+    pedal_connected = pedal_cap is not None
+
+    # ── 모듈 준비
+    emo           = init["Emotion"] or EmotionModule()
+    rule_params   = dict(DRIVER_RULE_DEFAULTS, **(rule_params or {}))
+    drowsy        = DrowsinessModule(ear_thresh=rule_params["ear_thresh"])
+    forward       = ForwardAttentionModule()
+    head_pos      = HeadPositionModule()
+    calibration   = CalibrationManager()
+    pedal_tracker = PedalTracker()
+
+    recorder = None
+    if record_dir:
+        meta = {"width": int(cap_driver.get(cv.CAP_PROP_FRAME_WIDTH)), "height": int(cap_driver.get(cv.CAP_PROP_FRAME_HEIGHT)),
+                "orientation": "display", "profile": profile}   # 프레임은 이미 표시 방향 (리플레이에서 뒤집지 않음)
+        recorder = SessionRecorder(record_dir, mode=record_mode, meta=meta)
+        mmwave_sensor.recorder = recorder; fsr.recorder = recorder
+        print(f"[Recorder] recording session to {record_dir} ({record_mode})")
+
+    tlm = None
+    if telemetry_dir:
+        tlm = TelemetryLogger(telemetry_dir, enums=telemetry_enums(driver_rules(**rule_params)),
+                              meta={"profile": profile, "backends": cfg, "rules": rule_params})
+        telemetry.set_logger(tlm)     # 센서/캘리브레이션/SPI 이벤트도 같은 디렉터리에
+        print(f"[Telemetry] logging to {telemetry_dir} (run {tlm.run})")
+
+    fsr.start()
+    mmwave_sensor.start()
+    vehicle = VehicleState(obd, recorder)
+
+    # ── 스테이지 연결: 캡처 → 추론 → 렌더 → 화면 (모두 최신 프레임 우선)
+    stop = threading.Event()
+    q_driver = LatestQueue(1)
+    q_pedal  = LatestQueue(2) if pedal_connected else None   # 페달은 가능한 한 모든 프레임 처리
+    q_infer, q_display = LatestQueue(1), LatestQueue(1)
+
+    workers = [CaptureThread("DriverCam", cap_driver, q_driver, stop, stop_on_eof=True, max_failures=1)]
+    pedal = None
+    if pedal_connected:
+        pedal = PedalWorker(stop, q_pedal, pedal_tracker, recorder)
+        workers += [CaptureThread("PedalCam", pedal_cap, q_pedal, stop), pedal]
+    inference  = InferenceWorker(stop, q_driver, q_infer, emo, drowsy, forward, head_pos, pedal, recorder,
+                                 face_mesh=init["FaceMesh"] or False, infer_max=cam_profile.infer_max)
+    spi_link   = SpiLink(spi, make_spi_source(inference, vehicle, mmwave_sensor), stop, recorder=recorder)
+    render     = RenderWorker(stop, q_infer, q_display, calibration, vehicle, mmwave_sensor, fsr, spi_link,
+                              alert_style=alert_style, rules=driver_rules(**rule_params), telemetry=tlm)
+    # 경고 이벤트 구독: 콘솔 로그, 세션 기록, 텔레메트리, 긴급 단계
+    render.rules.subscribe(print_event)
+    if recorder: render.rules.subscribe(recorder.event)
+    if tlm: render.rules.subscribe(log_alert_event)
+    render.rules.subscribe(on_emergency)
+    workers += [inference, spi_link, render]
+    if stats_path: workers.append(StatsDumper(stats_path, stop, stats_period))
+    player = ctx.player(stop)       # replay 센서 재생 (카메라와 같은 세션 시각 기준)
+    if player: workers.append(player)
+
+    # 드롭/지연 카운터 (스냅샷 때만 읽음)
+    for name, q in (("drop.driver", q_driver), ("drop.pedal", q_pedal), ("drop.infer", q_infer), ("drop.display", q_display)):
+        if q is not None: PROFILER.gauge(name, lambda q=q: q.dropped)
+    PROFILER.gauge("spi.late_ticks", lambda: spi_link.late_ticks)
+    PROFILER.gauge("spi.errors", lambda: spi_link.errors)
+    pools = [inference.pool, render.pool, pedal_tracker.pool]
+    PROFILER.gauge("pool.allocs", lambda: sum(p.allocs for p in pools))   # 워밍업 뒤 늘면 재할당 발생
+    if tlm:   # 기록이 디스크 속도를 못 따라가 버린 프레임/이벤트 수
+        PROFILER.gauge("telemetry.dropped", lambda: tlm.dropped_frames)
+        PROFILER.gauge("telemetry.dropped_events", lambda: tlm.dropped_events)
+
+    window = "Enhanced Driver Dashboard"
+    cv.namedWindow(window, cv.WINDOW_NORMAL)
+    cv.setWindowProperty(window, cv.WND_PROP_FULLSCREEN, cv.WINDOW_FULLSCREEN)
+
+    print("Press ESC to exit, 'r' for 3s recalibration, 'p' for pedal calibration, 'h' for profiling HUD")
+
+    for w in workers: w.start()
+    alert_shown = False
+    try:
+        # HighGUI는 메인 스레드에서만 표시/키 입력 처리
+        while not stop.is_set():
+            item = q_display.get(timeout=0.05)
+            with span("display"):
+                if item is not None: cv.imshow(window, item[1])
+                key = cv.waitKey(1) & 0xFF
+            if item is not None:
+                # 캡처 시각 → 화면 표시 (경고는 새로 뜬 프레임만 glass_to_alert)
+                ts, _, alert = item
+                if not PROFILER.stage("glass_to_display").n:
+                    print(f"[Init] first frame {time.monotonic() - t_start:.2f}s after start")
+                lat = time.monotonic() - ts
+                PROFILER.add_latency("glass_to_display", lat); PROFILER.count("frames.displayed")
+                if alert and not alert_shown: PROFILER.add_latency("glass_to_alert", lat)
+                alert_shown = bool(alert)
+            if key == 27: break
+            elif key in (ord('r'), ord('R')):
+                calibration.start_calibration()
+                inference.request_recalibration(); render.request_recalibration()
+            elif key in (ord('p'), ord('P')):
+                if pedal: pedal.request_calibration()
+            elif key in (ord('h'), ord('H')):
+                render.show_hud = not render.show_hud
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # 종료: 워커 정지 → 대기 해제 → join → 장치 해제
+        stop.set()
+        for q in (q_driver, q_pedal, q_infer, q_display):
+            if q is not None: q.close()
+        for w in workers:
+            if not w.join(timeout=2.0): print(f"[{w.name}] did not stop in time")
+        _shutdown("mmWave", mmwave_sensor.stop)
+        _shutdown("FSR", fsr.stop)
+        _shutdown("SPI", spi.close)
+        if obd: _shutdown("OBD", obd.stop)
+        _shutdown("DriverCam", cap_driver.release)
+        if pedal_connected: _shutdown("PedalCam", pedal_cap.release)
+        if recorder: _shutdown("Recorder", recorder.close)
+        if tlm:
+            telemetry.set_logger(None)
+            _shutdown("Telemetry", tlm.close)
+            print(f"[Telemetry] {tlm.frames} frames in {tlm.files} file(s), dropped {tlm.dropped_frames}")
+        cv.destroyAllWindows()
+        if stats_path: print("\n".join(s.expandtabs(8) for s in format_snapshot(PROFILER.snapshot())))
+
+
+REPLAY_FIELDS = ["ts", "face", "emotion", "ear", "eyes_closed", "is_drowsy", "forward_ratio", "is_forward_looking",
+                 "attn_status", "head_status",
+                 "brake_percent", "brake_rate", "heart_rate", "resp_rate", "fsr_pressed",
+                 "pedal_flag_active", "condition_flags_active", "pedal_misuse_detected", "alert_text", "alert_level"]
+
+def run_replay(session_dir, use_landmarks=False, show=False, out_csv=None, stats_path=None, rule_params=None):
+    """기록된 세션을 같은 스테이지 코드로 순서대로 재실행. 시계는 기록 타임스탬프를 따르므로
+    실시간보다 빠르고 매번 같은 결과. use_landmarks=True면 FaceMesh 대신 기록된 랜드마크 사용.
+    out_csv 결과는 python -m common.rules 로 경고 임계값만 빠르게 다시 돌려볼 수 있음"""
+    reader = SessionReader(session_dir)
+    rule_params = dict(DRIVER_RULE_DEFAULTS, **(rule_params or {}))
+    if reader.meta.get("mode") == "landmarks": use_landmarks = True
+    vclock = clock.VirtualClock(); clock.set_source(vclock)
+    try:
+        mm, fsr, obd, spi_link = ReplayMmWave(), ReplayFSR(threshold=2000), ReplayOBD(), ReplaySpiLink()
+        vehicle   = VehicleState(obd)
+        pedal     = PedalWorker(None, None, PedalTracker())
+        inference = InferenceWorker(None, None, None, EmotionModule(),
+                                    DrowsinessModule(ear_thresh=rule_params["ear_thresh"]), ForwardAttentionModule(),
+                                    HeadPositionModule(), pedal,
+                                    flip_input=reader.meta.get("orientation") != "display")
+        render    = RenderWorker(None, None, None, CalibrationManager(), vehicle, mm, fsr, spi_link,
+                                 rules=driver_rules(**rule_params))
+        feeds = {K_MMWAVE: mm.feed, K_FSR: fsr.feed, K_OBD: obd.feed, K_SPI_RX: spi_link.feed}
+
+        writer, f = None, None
+        if out_csv:
+            f = open(out_csv, "w", newline="", encoding="utf-8")
+            writer = csv.DictWriter(f, fieldnames=REPLAY_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+
+        last_frame = None
+        blank = np.zeros((reader.meta.get("height", 720), reader.meta.get("width", 1280), 3), np.uint8)
+        n, t_start = 0, time.perf_counter()
+        for rec in reader:
+            vclock.set(rec.ts)
+            if rec.kind in feeds:
+                feeds[rec.kind](rec.value); continue
+            if rec.kind == K_PEDAL:
+                pedal.process(rec.value, rec.ts); continue
+            if rec.kind == K_DRIVER:
+                last_frame = rec.value
+                if use_landmarks: continue
+                res = inference.process(rec.ts, rec.value)
+            elif rec.kind == K_LANDMARKS and use_landmarks:
+                frame = last_frame if last_frame is not None else blank
+                res = inference.process(rec.ts, frame, landmarks=rec.value, detect=False)
+            else:
+                continue
+            inference.latest = res
+            st = render.evaluate(res); n += 1
+            if writer:
+                row = dict(res); row.update(st); writer.writerow(row)
+            if show:
+                cv.imshow("Replay", render.draw(res, st))
+                if (cv.waitKey(1) & 0xFF) == 27: break
+        dt = time.perf_counter() - t_start
+        print(f"[Replay] {n} frames in {dt:.1f}s ({n / max(dt, 1e-9):.1f} fps)")
+        if f: f.close()
+        if show: cv.destroyAllWindows()
+        if stats_path: write_stats(stats_path, PROFILER.snapshot())
+    finally:
+        clock.set_source(None)
+
+
+def _parse_args():
+    ap = argparse.ArgumentParser(description="Driver monitoring dashboard")
+    ap.add_argument("--record", metavar="DIR", help="주행 세션 기록 디렉터리")
+    ap.add_argument("--record-mode", choices=("video", "landmarks"), default="video")
+    ap.add_argument("--replay", metavar="DIR", help="기록된 세션을 하드웨어 없이 재실행")
+    ap.add_argument("--use-landmarks", action="store_true", help="리플레이 시 FaceMesh 대신 기록된 랜드마크 사용")
+    ap.add_argument("--show", action="store_true", help="리플레이 대시보드 표시")
+    ap.add_argument("--out", metavar="CSV", help="리플레이 프레임별 결과 CSV")
+    ap.add_argument("--stats", metavar="PATH", help="스테이지별 지연 통계 저장 (.json: 최신 덮어쓰기, .csv: 누적)")
+    ap.add_argument("--stats-period", type=float, default=5.0, help="통계 저장 주기(초)")
+    ap.add_argument("--backend", action="append", metavar="KIND=NAME", default=[],
+                    help="장치 백엔드 선택 (camera/mmwave/fsr/spi/obd = real|sim|replay|auto, 여러 번 가능)")
+    ap.add_argument("--sim", action="store_true", help="모든 장치를 시뮬레이션 백엔드로 (--backend로 개별 지정 가능)")
+    ap.add_argument("--source", metavar="DIR", help="replay 백엔드가 실시간으로 재생할 세션")
+    ap.add_argument("--profile", choices=sorted(CAPTURE_PROFILES), default="default", help="운전자 카메라 캡처 프로파일")
+    ap.add_argument("--alert-style", choices=AlertCompositor.MODES, default="full",
+                    help="경고 오버레이: full(화면 전체 틴트) | banner(문구 주변 띠만)")
+    ap.add_argument("--telemetry", metavar="DIR", help="프레임별 텔레메트리 기록 디렉터리 (python -m common.telemetry DIR로 요약)")
+    ap.add_argument("--rule", action="append", metavar="PARAM=VALUE", default=[],
+                    help=f"경고 규칙 파라미터 ({', '.join(DRIVER_RULE_DEFAULTS)})")
+    args = ap.parse_args()
+    try:
+        args.backends = parse_backends(args.backend, sim=args.sim)
+    except ValueError as e:
+        ap.error(str(e))
+    if "replay" in args.backends.values() and not args.source: ap.error("replay backends need --source DIR")
+    args.rule_params = {}
+    for spec in args.rule:
+        k, _, v = spec.partition("=")
+        if k not in DRIVER_RULE_DEFAULTS: ap.error(f"unknown rule parameter '{k}' (one of {', '.join(DRIVER_RULE_DEFAULTS)})")
+        try: args.rule_params[k] = float(v)
+        except ValueError: ap.error(f"--rule {spec}: value must be a number")
+    return args
 
 if __name__ == "__main__":
-    main()
+    args = _parse_args()
+    if args.replay:
+        run_replay(args.replay, use_landmarks=args.use_landmarks, show=args.show, out_csv=args.out,
+                   stats_path=args.stats, rule_params=args.rule_params)
+    else:
+        main(record_dir=args.record, record_mode=args.record_mode,
+             stats_path=args.stats, stats_period=args.stats_period,
+             backends=args.backends, source=args.source, profile=args.profile,
+             alert_style=args.alert_style, rule_params=args.rule_params, telemetry_dir=args.telemetry)
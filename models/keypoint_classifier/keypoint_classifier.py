@@ -9,6 +9,7 @@ class KeyPointClassifier(object):
         self,
         model_path='model/keypoint_classifier/keypoint_classifier.tflite',
         num_threads=1,
+        score_th=0.85,
     ):
         self.interpreter = tf.lite.Interpreter(model_path=model_path,
                                                num_threads=num_threads)
@@ -16,25 +17,39 @@ class KeyPointClassifier(object):
         self.interpreter.allocate_tensors()
         self.input_details = self.interpreter.get_input_details()
         self.output_details = self.interpreter.get_output_details()
+        self.input_index = self.input_details[0]['index']
+        self.output_index = self.output_details[0]['index']
+        self.num_features = int(self.input_details[0]['shape'][-1])
+        self.batch_size = int(self.input_details[0]['shape'][0])
+        self.score_th = score_th
         self.last_index = 2
 
+    def input_tensor(self, batch_size=1):
+        """입력 텐서 메모리를 직접 가리키는 (batch_size, num_features) 뷰.
+        invoke() 전에 반드시 참조를 모두 해제해야 함"""
+        if batch_size != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input_index, [batch_size, self.num_features])
+            self.interpreter.allocate_tensors()
+            self.batch_size = batch_size
+        return self.interpreter.tensor(self.input_index)()
+
+    def invoke(self):
+        """input_tensor()에 써 둔 입력으로 추론. 배치의 각 행에 임계값 규칙을 순서대로 적용"""
+        self.interpreter.invoke()
+        result = self.interpreter.get_tensor(self.output_index)
+        best = np.argmax(result, axis=1)
+        ok = np.max(result, axis=1) >= self.score_th
+        out = np.empty(len(best), dtype=np.intp)
+        for i in range(len(best)):
+            if ok[i]: self.last_index = int(best[i])
+            out[i] = self.last_index
+        return out
+
     def __call__(
         self,
         landmark_list,
     ):
-        input_details_tensor_index = self.input_details[0]['index']
-        self.interpreter.set_tensor(
-            input_details_tensor_index,
-            np.array([landmark_list], dtype=np.float32))
-        self.interpreter.invoke()
-
-        output_details_tensor_index = self.output_details[0]['index']
-
-        result = self.interpreter.get_tensor(output_details_tensor_index)
-        if np.max(result) >= 0.85:
-            result_index = np.argmax(np.squeeze(result))
-            self.last_index =  result_index
-            return result_index
-        else:
-            return self.last_index
-    
+        buf = self.input_tensor(1)
+        buf[0] = landmark_list
+        del buf
+        return int(self.invoke()[0])
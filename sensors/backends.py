@@ -0,0 +1,169 @@
+"""장치 백엔드 레지스트리: 종류(camera/mmwave/fsr/spi/obd)별 real · sim · replay 구현을 설정으로 선택.
+하드웨어 라이브러리(spidev, board/adafruit, pyserial, GStreamer)는 팩토리 안에서만 import 하므로
+개발 PC에서도 전체 앱을 import/실행할 수 있음.
+
+    cfg = parse_backends(["fsr=sim", "obd=replay"])      # 나머지는 DEFAULTS
+    dev = create("fsr", cfg["fsr"], ctx)
+"""
+import time
+
+KINDS = ("camera", "mmwave", "fsr", "spi", "obd")
+# auto: real을 시도하고 실패(예외 또는 None)하면 sim
+DEFAULTS = {"camera": "real", "mmwave": "real", "fsr": "real", "spi": "auto", "obd": "real"}
+
+_FACTORIES = {}   # (종류, 이름) → factory(ctx, **kw)
+
+def register(kind, name):
+    def deco(fn):
+        _FACTORIES[(kind, name)] = fn; return fn
+    return deco
+
+def names(kind):
+    return sorted(n for k, n in _FACTORIES if k == kind) + ["auto"]
+
+
+class BackendContext:
+    """팩토리들이 공유하는 설정. replay 센서는 feeds에 등록되고 SessionPlayer 하나가 시각에 맞춰 전달"""
+    def __init__(self, session=None):
+        self.session = session
+        self.start = time.monotonic()   # 세션 0초 = 이 시각 (카메라/센서 재생 공통)
+        self.feeds = {}
+
+    def require_session(self, kind):
+        if not self.session: raise ValueError(f"{kind}=replay needs a session directory (--source)")
+        return self.session
+
+    def player(self, stop_event):
+        """replay 센서가 있으면 SessionPlayer, 없으면 None"""
+        if not self.feeds: return None
+        from common.session import SessionPlayer
+        return SessionPlayer(self.session, self.feeds, stop_event, start=self.start)
+
+
+def parse_backends(specs=(), sim=False):
+    """["kind=name", ...] → {kind: name}. sim=True면 기본값이 전부 sim"""
+    cfg = {k: "sim" for k in KINDS} if sim else dict(DEFAULTS)
+    for spec in specs or ():
+        kind, _, name = spec.partition("=")
+        if kind not in KINDS: raise ValueError(f"unknown backend kind '{kind}' (one of {', '.join(KINDS)})")
+        if name not in names(kind): raise ValueError(f"unknown {kind} backend '{name}' (one of {', '.join(names(kind))})")
+        cfg[kind] = name
+    return cfg
+
+def create(kind, name, ctx, **kw):
+    if name == "auto":
+        try:
+            dev = create(kind, "real", ctx, **kw)
+            if dev is not None: return dev
+            print(f"[{kind}] real backend unavailable; using sim")
+        except Exception as e:
+            print(f"[{kind}] real backend failed ({e}); using sim")
+        return create(kind, "sim", ctx, **kw)
+    fn = _FACTORIES.get((kind, name))
+    if fn is None: raise ValueError(f"unknown {kind} backend '{name}' (one of {', '.join(names(kind))})")
+    return fn(ctx, **kw)
+
+
+# ── camera (role: "driver" | "pedal", profile: 운전자 CaptureProfile). real pedal은 장치가 없으면 None (페달 없이 동작)
+@register("camera", "real")
+def _camera_real(ctx, role="driver", fps=60, profile=None):
+    from sensors.camera import open_driver_camera, open_pedal_camera
+    if role == "driver":
+        cap = open_driver_camera(0, profile)
+        if cap is None: raise RuntimeError("cannot open any camera")
+        return cap
+    return open_pedal_camera(1, fps=fps)
+
+@register("camera", "sim")
+def _camera_sim(ctx, role="driver", fps=None, profile=None):
+    from sensors.camera import SyntheticCamera
+    if role == "driver" and profile is not None:
+        return SyntheticCamera(role, *profile.output, fps=profile.fps, gray=profile.gray)
+    return SyntheticCamera(role, fps=fps)
+
+@register("camera", "replay")
+def _camera_replay(ctx, role="driver", fps=None, profile=None):
+    from sensors.camera import SessionCamera
+    from common.session import K_DRIVER, K_PEDAL
+    cap = SessionCamera(ctx.require_session("camera"), K_DRIVER if role == "driver" else K_PEDAL, start=ctx.start)
+    if cap.isOpened(): return cap
+    if role == "driver": raise RuntimeError("session has no driver frames (record with --record-mode video)")
+    return None
+
+# ── mmWave
+@register("mmwave", "real")
+def _mmwave_real(ctx):
+    from sensors.mmwave import MmWaveSensor
+    return MmWaveSensor(debug=False)
+
+@register("mmwave", "sim")
+def _mmwave_sim(ctx):
+    from sensors.mmwave import MmWaveSensor, SimulatedMmWaveSerial
+    return MmWaveSensor(debug=False, ser=SimulatedMmWaveSerial())
+
+@register("mmwave", "replay")
+def _mmwave_replay(ctx):
+    from common.session import ReplayMmWave, K_MMWAVE
+    ctx.require_session("mmwave")
+    dev = ReplayMmWave(); ctx.feeds[K_MMWAVE] = dev.feed
+    return dev
+
+# ── FSR
+@register("fsr", "real")
+def _fsr_real(ctx):
+    from sensors.fsr import FSRMonitor
+    return FSRMonitor(threshold=2000, check_interval=0.05, not_pressed_duration=5.0, debug=False)
+
+@register("fsr", "sim")
+def _fsr_sim(ctx):
+    """발판을 대부분 밟고 있다가 40초마다 7초 동안 뗌 (양발운전 경고 경로 확인용)"""
+    from sensors.fsr import FSRMonitor, FakeADC
+    adc = FakeADC(signal=lambda t: 12000 if (t % 40.0) < 33.0 else 300, noise=50)
+    return FSRMonitor(threshold=2000, not_pressed_duration=5.0, chan=adc)
+
+@register("fsr", "replay")
+def _fsr_replay(ctx):
+    from common.session import ReplayFSR, K_FSR
+    ctx.require_session("fsr")
+    dev = ReplayFSR(threshold=2000); ctx.feeds[K_FSR] = dev.feed
+    return dev
+
+# ── SPI (FPGA 장치. replay는 기록된 rx 워드를 응답으로 돌려주는 spidev 대역)
+@register("spi", "real")
+def _spi_real(ctx):
+    from sensors.spi import open_spi
+    return open_spi()
+
+@register("spi", "sim")
+def _spi_sim(ctx):
+    from sensors.fpga_model import SimulatedSpiDev
+    return SimulatedSpiDev()
+
+@register("spi", "replay")
+def _spi_replay(ctx):
+    from common.session import ReplaySpiDev, K_SPI_RX
+    ctx.require_session("spi")
+    dev = ReplaySpiDev(); ctx.feeds[K_SPI_RX] = dev.feed
+    return dev
+
+# ── OBD (연결 실패 시 None → 데모 값)
+@register("obd", "real")
+def _obd_real(ctx):
+    from sensors.obd_client import OBDClient
+    obd = OBDClient(port='/dev/ttyACM0', baudrate=9600, timeout=1.0, debug=False)
+    if obd.start(): return obd
+    print("[OBD] not started; continue without OBD")
+    return None
+
+@register("obd", "sim")
+def _obd_sim(ctx):
+    from sensors.obd_client import OBDClient, FakeELM327
+    obd = OBDClient(ser=FakeELM327())
+    return obd if obd.start() else None
+
+@register("obd", "replay")
+def _obd_replay(ctx):
+    from common.session import ReplayOBD, K_OBD
+    ctx.require_session("obd")
+    dev = ReplayOBD(); ctx.feeds[K_OBD] = dev.feed
+    return dev
@@ -0,0 +1,160 @@
+import time, math
+import numpy as np, cv2 as cv
+
+class CaptureProfile:
+    """운전자 카메라 캡처 설정.
+    sensor: 센서 모드(화각), output: 앱이 받는 프레임 크기 (Jetson은 nvvidconv 하드웨어 스케일러에서 축소),
+    infer_max: FaceMesh 입력(얼굴 ROI)의 최대 변 길이 (넘으면 CPU에서 INTER_AREA 축소, 0이면 그대로),
+    flip_method: nvvidconv 번호 (0 없음, 2 180도, 4 좌우, 6 상하, 1/3 90도 회전) - 파이프라인 안에서 처리,
+    gray: GRAY8로 받음 (BGRx→BGR videoconvert CPU 변환 없음, 화면도 흑백. IR 카메라용)"""
+    def __init__(self, sensor=(1280, 720), output=(1280, 720), fps=30, infer_max=640, flip_method=0, gray=False):
+        self.sensor, self.output = tuple(sensor), tuple(output)
+        self.fps, self.infer_max = int(fps), int(infer_max)
+        self.flip_method, self.gray = int(flip_method), bool(gray)
+
+    def __repr__(self):
+        return (f"CaptureProfile({self.output[0]}x{self.output[1]}@{self.fps}{' GRAY8' if self.gray else ''}, "
+                f"infer<={self.infer_max}, flip={self.flip_method})")
+
+# 대시보드 운전자 영상 칸은 약 614x345 → 640x360이면 표시 화질 손실 없음
+CAPTURE_PROFILES = {
+    "default": CaptureProfile(),
+    "fast":    CaptureProfile(output=(640, 360), infer_max=640),
+    "gray":    CaptureProfile(output=(640, 360), infer_max=640, gray=True),
+}
+
+def create_jetson_csi_pipeline(camera_id=0, capture_width=1280, capture_height=720,
+                               display_width=1280, display_height=720, framerate=30, flip_method=2, gray=False):
+    """NV12(NVMM) → nvvidconv(회전/뒤집기/축소, 하드웨어) → BGR 또는 GRAY8 appsink"""
+    head = (
+        f"nvarguscamerasrc sensor-id={camera_id} ! "
+        f"video/x-raw(memory:NVMM), width=(int){capture_width}, height=(int){capture_height}, "
+        f"format=(string)NV12, framerate=(fraction){framerate}/1 ! "
+        f"nvvidconv flip-method={flip_method} ! "
+        f"video/x-raw, width=(int){display_width}, height=(int){display_height}, "
+    )
+    if gray:   # nvvidconv가 Y 평면을 바로 내보냄 → CPU 색변환 없음
+        return head + "format=(string)GRAY8 ! appsink drop=True max-buffers=1"
+    return head + "format=(string)BGRx ! videoconvert ! video/x-raw, format=(string)BGR ! appsink drop=True max-buffers=1"
+
+def profile_pipeline(profile, camera_id=0):
+    return create_jetson_csi_pipeline(camera_id, *profile.sensor, *profile.output, profile.fps,
+                                      profile.flip_method, profile.gray)
+
+# nvvidconv flip-method → OpenCV (V4L2 대체 경로에서 캡처 스레드가 적용)
+_CV_FLIP = {2: lambda f: cv.flip(f, -1), 4: lambda f: cv.flip(f, 1), 6: lambda f: cv.flip(f, 0),
+            1: lambda f: cv.rotate(f, cv.ROTATE_90_COUNTERCLOCKWISE), 3: lambda f: cv.rotate(f, cv.ROTATE_90_CLOCKWISE)}
+
+def open_driver_camera(index=0, profile=None):
+    """운전자 카메라: Jetson CSI 파이프라인 → 실패시 index번 V4L2 장치 (뒤집기/축소/흑백은 캡처 스레드에서).
+    둘 다 안 되면 None"""
+    profile = profile or CAPTURE_PROFILES["default"]
+    cap = cv.VideoCapture(profile_pipeline(profile), cv.CAP_GSTREAMER)
+    if cap.isOpened(): return cap
+    cap = cv.VideoCapture(index)
+    if not cap.isOpened(): return None
+    cap.set(cv.CAP_PROP_FRAME_WIDTH, profile.output[0]); cap.set(cv.CAP_PROP_FRAME_HEIGHT, profile.output[1])
+    cap.set(cv.CAP_PROP_FPS, profile.fps)
+    return TransformedCapture(cap, profile)
+
+def open_pedal_camera(index=1, width=640, height=480, fps=60):
+    """페달 카메라: MJPG로 고주사율 요청, 드라이버 버퍼 1장 (오래된 프레임 누적 방지). 없으면 None"""
+    cap = cv.VideoCapture(index)
+    if not cap.isOpened(): return None
+    cap.set(cv.CAP_PROP_FOURCC, cv.VideoWriter_fourcc(*"MJPG"))
+    cap.set(cv.CAP_PROP_FRAME_WIDTH, width); cap.set(cv.CAP_PROP_FRAME_HEIGHT, height)
+    cap.set(cv.CAP_PROP_FPS, fps)
+    cap.set(cv.CAP_PROP_BUFFERSIZE, 1)
+    print(f"[PedalCam] {int(cap.get(cv.CAP_PROP_FRAME_WIDTH))}x{int(cap.get(cv.CAP_PROP_FRAME_HEIGHT))}"
+          f" @ {cap.get(cv.CAP_PROP_FPS):.0f} fps")
+    return cap
+
+
+class _CaptureLike:
+    """cv.VideoCapture 대역 공통 부분 (read/get/set/isOpened/release)"""
+    width = height = 0
+    fps = 30.0
+    def isOpened(self): return self._open
+    def release(self): self._open = False
+    def set(self, prop, value): return False
+    def get(self, prop):
+        return {cv.CAP_PROP_FRAME_WIDTH: self.width, cv.CAP_PROP_FRAME_HEIGHT: self.height,
+                cv.CAP_PROP_FPS: self.fps}.get(prop, 0.0)
+
+
+class TransformedCapture(_CaptureLike):
+    """파이프라인에서 못 한 뒤집기/축소/흑백 변환을 read()에서 적용 (캡처 스레드에서 실행)"""
+    def __init__(self, cap, profile):
+        self.cap, self.profile = cap, profile
+        self._flip = _CV_FLIP.get(profile.flip_method)
+        self.width, self.height = profile.output
+        self.fps = cap.get(cv.CAP_PROP_FPS) or profile.fps
+
+    def isOpened(self): return self.cap.isOpened()
+    def release(self): self.cap.release()
+
+    def read(self):
+        ok, f = self.cap.read()
+        if not ok: return ok, f
+        if f.shape[1] != self.width or f.shape[0] != self.height:
+            f = cv.resize(f, (self.width, self.height), interpolation=cv.INTER_AREA)
+        if self.profile.gray: f = cv.cvtColor(f, cv.COLOR_BGR2GRAY)
+        return True, (self._flip(f) if self._flip else f)
+
+
+class SyntheticCamera(_CaptureLike):
+    """하드웨어 없이 쓰는 합성 카메라. fps에 맞춰 read()가 대기.
+    driver: 어두운 배경 + 좌우로 흔들리는 얼굴 타원, pedal: 주기적으로 밟히는 녹색 마커"""
+    def __init__(self, role="driver", width=None, height=None, fps=None, seed=0, gray=False):
+        self.role, self.gray = role, gray
+        self.width = width or (1280 if role == "driver" else 640)
+        self.height = height or (720 if role == "driver" else 480)
+        self.fps = float(fps or (30 if role == "driver" else 60))
+        rng = np.random.default_rng(seed)
+        self._noise = [rng.integers(0, 12, (self.height, self.width, 3), dtype=np.uint8) for _ in range(4)]
+        self._base = cv.GaussianBlur(rng.integers(20, 70, (self.height, self.width, 3), dtype=np.uint8), (0, 0), 5)
+        self._open, self._i = True, 0
+        self._t0 = self._next = time.monotonic()
+
+    def _draw(self, t):
+        f = self._base.copy()
+        W, H = self.width, self.height
+        if self.role == "driver":
+            cx = int(W / 2 + 0.05 * W * math.sin(t * 0.7))
+            cv.ellipse(f, (cx, int(H * 0.47)), (int(W * 0.12), int(H * 0.28)), 0, 0, 360, (120, 140, 170), -1, cv.LINE_AA)
+        else:
+            press = max(0.0, math.sin(t * 0.6)) ** 2
+            cv.rectangle(f, (W//2 - 60, H//4), (W//2 + 60, H*3//4), (70, 70, 75), -1)
+            cv.circle(f, (W//2, int(H * 0.4 + 0.15 * H * press)), 10, (40, 200, 50), -1, cv.LINE_AA)
+        f = cv.add(f, self._noise[self._i % len(self._noise)])
+        return cv.cvtColor(f, cv.COLOR_BGR2GRAY) if self.gray else f
+
+    def read(self):
+        if not self._open: return False, None
+        self._next += 1.0 / self.fps
+        dt = self._next - time.monotonic()
+        if dt > 0: time.sleep(dt)
+        else: self._next = time.monotonic()
+        self._i += 1
+        return True, self._draw(time.monotonic() - self._t0)
+
+
+class SessionCamera(_CaptureLike):
+    """기록된 세션의 kind 프레임을 기록 시각에 맞춰 재생 (start: 세션 0초에 해당하는 monotonic 시각)"""
+    def __init__(self, session_dir, kind, start=None):
+        from common.session import SessionReader
+        reader = SessionReader(session_dir, kinds=[kind])
+        self._it = iter(reader)
+        self._first = next(self._it, None)
+        if self._first is not None: self.height, self.width = self._first.value.shape[:2]
+        self.start = time.monotonic() if start is None else start
+        self._open = self._first is not None     # 프레임이 없는 세션 (예: landmarks 모드)
+
+    def read(self):
+        if not self._open: return False, None
+        rec = self._first if self._first is not None else next(self._it, None)
+        self._first = None
+        if rec is None: return False, None
+        dt = self.start + rec.ts - time.monotonic()
+        if dt > 0: time.sleep(dt)
+        return True, rec.value
@@ -0,0 +1,218 @@
+"""misapplication_logic/*.v (PMPD) 소프트웨어 골든 모델.
+
+- 10Hz tick 단위로 check_pedal / check_bpm / check_expression, 10번째 tick마다 check_respiration(1Hz)
+- 레지스터 비트폭(롤링합 wrap, 6비트 포화, 호흡 평균 1 tick 지연)까지 RTL과 동일
+- rx 워드 레이아웃은 spi_8byte.tx_pack = sensors.spi.unpack_rx_frame 과 같음
+"""
+from collections import deque
+import numpy as np
+from common import clock
+
+# RTL localparam (임계값 스윕용으로 인자로도 받음)
+PEDAL_THRESH_LOW, PEDAL_THRESH_HIGH, PEDAL_THRESH_PEAK = 25, 75, 99     # %/s
+BPM_SHORT, BPM_LONG = 8, 64              # 0.8s / 6.4s @10Hz
+BPM_CMP = (32, 5)                        # 32*sum_short >= 5*sum_long
+RR_SHORT, RR_LONG = 16, 120              # 16s / 120s @1Hz
+RR_CMP = (2400, 368)                     # 2400*sum_short >= 368*sum_long
+EXP_SURPRISED = 4
+PEDAL_TAPS = 8
+TICKS_PER_1HZ = 10
+DRIVE_HIGH_TICKS, DRIVE_LOW_TICKS = 10, 20   # drive_device HIGH 1s / LOW 2s (tick 해상도)
+
+def pack_rx_word(rate_inst, rate_avg, bpm_long, bpm_short, rr_long, rr_short, pedal_flag, cond, pm):
+    """spi_8byte.tx_pack 과 같은 64비트 배치 (스칼라/NumPy 배열 모두 가능)"""
+    u = np.uint64 if isinstance(rate_inst, np.ndarray) else int
+    return ((u(rate_inst) & u(0xFFFF)) << u(48) | (u(rate_avg) & u(0xFFFF)) << u(32) |
+            (u(bpm_long) & u(0xFF)) << u(24) | (u(bpm_short) & u(0xFF)) << u(16) |
+            (u(rr_long) & u(0x3F)) << u(10) | (u(rr_short) & u(0x3F)) << u(4) |
+            u(pedal_flag) << u(3) | u(cond) << u(2) | u(pm))
+
+
+class PMPDModel:
+    """PMPD 최상위 모듈의 tick 단위 모델. set_inputs()로 state_buffer를 바꾸고 tick()으로 10Hz 진행"""
+    def __init__(self, pedal_thresh=(PEDAL_THRESH_LOW, PEDAL_THRESH_HIGH, PEDAL_THRESH_PEAK),
+                 bpm_cmp=BPM_CMP, rr_cmp=RR_CMP):
+        self.pedal_thresh, self.bpm_cmp, self.rr_cmp = tuple(pedal_thresh), tuple(bpm_cmp), tuple(rr_cmp)
+        self.reset()
+
+    def reset(self):
+        # state_buffer
+        self.pedal_in = self.expression_in = self.bpm_in = self.rr_in = 0
+        self.ticks = 0
+        # check_pedal
+        self.pedal_curr = 0
+        self.fir = deque([0]*PEDAL_TAPS, maxlen=PEDAL_TAPS)    # [0]=최신
+        self.fir_sum = 0; self.pedal_filled = 0
+        self.rate_inst = self.rate_avg = 0; self.pedal_flag = 0
+        # check_bpm
+        self.bpm_s = deque([0]*BPM_SHORT, maxlen=BPM_SHORT); self.bpm_l = deque([0]*BPM_LONG, maxlen=BPM_LONG)
+        self.bpm_sum_s = self.bpm_sum_l = 0; self.bpm_filled_s = self.bpm_filled_l = 0
+        self.bpm_short_avg = self.bpm_long_avg = 0; self.bpm_flag = 0
+        # check_respiration
+        self.rr_s = deque([0]*RR_SHORT, maxlen=RR_SHORT); self.rr_l = deque([0]*RR_LONG, maxlen=RR_LONG)
+        self.rr_sum_s = self.rr_sum_l = 0; self.rr_filled_s = self.rr_filled_l = 0
+        self.rr_short_avg8 = self.rr_long_avg8 = 0
+        self.rr_short_avg = self.rr_long_avg = 0; self.rr_flag = 0
+        # drive_device
+        self.drive = 0; self._drive_state = 0; self._drive_cnt = 0
+
+    def set_inputs(self, pedal, expression, bpm, rr):
+        """SPI로 받은 state_buffer[31:0]"""
+        self.pedal_in, self.expression_in, self.bpm_in, self.rr_in = pedal & 0xFF, expression & 0xFF, bpm & 0xFF, rr & 0xFF
+
+    @property
+    def expression_flag(self): return int(self.expression_in == EXP_SURPRISED)
+
+    @property
+    def cond_flags(self): return int(self.expression_flag or self.bpm_flag or self.rr_flag)
+
+    @property
+    def pm(self): return int(self.pedal_flag and self.cond_flags)
+
+    def _tick_pedal(self):
+        lo, hi, peak = self.pedal_thresh
+        delta = max(self.pedal_in - self.pedal_curr, 0)
+        rate_next = (delta * 10) & 0xFFFF
+        sum_next = (self.fir_sum - self.fir[-1] + rate_next) & 0x3FFF
+        self.pedal_flag = int(self.pedal_filled == PEDAL_TAPS and
+                              ((rate_next >= lo and (sum_next >> 3) >= hi) or rate_next >= peak))
+        self.fir.appendleft(rate_next)
+        self.rate_inst, self.fir_sum, self.rate_avg = rate_next, sum_next, sum_next >> 3
+        self.pedal_curr = self.pedal_in
+        if self.pedal_filled < PEDAL_TAPS: self.pedal_filled += 1
+
+    def _tick_bpm(self):
+        x = self.bpm_in
+        s = (self.bpm_sum_s - self.bpm_s[-1] + x) & 0x7FF
+        l = (self.bpm_sum_l - self.bpm_l[-1] + x) & 0x3FFF
+        a, b = self.bpm_cmp
+        self.bpm_flag = int(self.bpm_filled_s == BPM_SHORT and self.bpm_filled_l == BPM_LONG and a*s >= b*l)
+        self.bpm_s.appendleft(x); self.bpm_l.appendleft(x)
+        self.bpm_sum_s, self.bpm_sum_l = s, l
+        self.bpm_short_avg, self.bpm_long_avg = (s >> 3) & 0xFF, (l >> 6) & 0xFF
+        if self.bpm_filled_s < BPM_SHORT: self.bpm_filled_s += 1
+        if self.bpm_filled_l < BPM_LONG:  self.bpm_filled_l += 1
+
+    def _tick_rr(self):
+        x = self.rr_in
+        s = (self.rr_sum_s - self.rr_s[-1] + x) & 0xFFF
+        l = (self.rr_sum_l - self.rr_l[-1] + x) & 0x7FFF
+        a, b = self.rr_cmp
+        self.rr_flag = int(self.rr_filled_s == RR_SHORT and self.rr_filled_l == RR_LONG and a*s >= b*l)
+        self.rr_s.appendleft(x); self.rr_l.appendleft(x)
+        self.rr_sum_s, self.rr_sum_l = s, l
+        # 6비트 포화 출력은 이전 tick의 8비트 평균 사용 (RTL 논블로킹 지연)
+        self.rr_short_avg = min(self.rr_short_avg8, 63)
+        self.rr_long_avg  = min(self.rr_long_avg8, 63)
+        self.rr_short_avg8, self.rr_long_avg8 = (s >> 4) & 0xFF, (l // 120) & 0xFF
+        if self.rr_filled_s < RR_SHORT: self.rr_filled_s += 1
+        if self.rr_filled_l < RR_LONG:  self.rr_filled_l += 1
+
+    def _tick_drive(self):
+        if self._drive_state:
+            self._drive_cnt -= 1
+            if self._drive_cnt > 0: return
+            if self._drive_state == 1:
+                self._drive_state, self._drive_cnt, self.drive = 2, DRIVE_LOW_TICKS, 0; return
+            self._drive_state = 0
+        if self.pm: self._drive_state, self._drive_cnt, self.drive = 1, DRIVE_HIGH_TICKS, 1
+
+    def tick(self, n=1):
+        """10Hz tick n회 (10번째마다 1Hz 호흡 블록 포함)"""
+        for _ in range(n):
+            self.ticks += 1
+            self._tick_pedal()
+            self._tick_bpm()
+            if self.ticks % TICKS_PER_1HZ == 0: self._tick_rr()
+            self._tick_drive()
+
+    def rx_word(self):
+        return pack_rx_word(self.rate_inst, self.rate_avg, self.bpm_long_avg, self.bpm_short_avg,
+                            self.rr_long_avg, self.rr_short_avg, self.pedal_flag, self.cond_flags, self.pm)
+
+
+def _rolling_sum(x, n):
+    """x[k-n+1..k] 합 (리셋 직후 0으로 채워진 시프트 레지스터와 동일)"""
+    c = np.concatenate(([0], np.cumsum(x, dtype=np.int64)))
+    k = np.arange(1, len(x) + 1)
+    return c[k] - c[np.maximum(k - n, 0)]
+
+def evaluate_batch(pedal, expression, bpm, rr,
+                   pedal_thresh=(PEDAL_THRESH_LOW, PEDAL_THRESH_HIGH, PEDAL_THRESH_PEAK),
+                   bpm_cmp=BPM_CMP, rr_cmp=RR_CMP):
+    """10Hz tick마다의 state_buffer 입력 배열(길이 T) → 각 tick 직후 레지스터 출력 (dict of arrays).
+    리셋 직후부터 시작하며 PMPDModel.tick()을 T번 돌린 것과 비트 단위로 같음"""
+    p = np.asarray(pedal, dtype=np.int64) & 0xFF
+    e = np.asarray(expression, dtype=np.int64) & 0xFF
+    b = np.asarray(bpm, dtype=np.int64) & 0xFF
+    r = np.asarray(rr, dtype=np.int64) & 0xFF
+    T = len(p); k = np.arange(T)
+
+    # check_pedal
+    lo, hi, peak = pedal_thresh
+    prev = np.concatenate(([0], p[:-1]))
+    rate_inst = np.maximum(p - prev, 0) * 10
+    fir_sum = _rolling_sum(rate_inst, PEDAL_TAPS) & 0x3FFF
+    rate_avg = fir_sum >> 3
+    pedal_flag = (k >= PEDAL_TAPS) & (((rate_inst >= lo) & (rate_avg >= hi)) | (rate_inst >= peak))
+
+    # check_bpm
+    s, l = _rolling_sum(b, BPM_SHORT) & 0x7FF, _rolling_sum(b, BPM_LONG) & 0x3FFF
+    bpm_flag = (k >= BPM_LONG) & (bpm_cmp[0]*s >= bpm_cmp[1]*l)
+    bpm_short_avg, bpm_long_avg = (s >> 3) & 0xFF, (l >> 6) & 0xFF
+
+    # check_respiration: 10번째 tick마다 샘플, 다음 1Hz tick까지 값 유지
+    idx = np.arange(TICKS_PER_1HZ - 1, T, TICKS_PER_1HZ)
+    rs = r[idx]; j = np.arange(len(rs))
+    s, l = _rolling_sum(rs, RR_SHORT) & 0xFFF, _rolling_sum(rs, RR_LONG) & 0x7FFF
+    rr_flag_j = (j >= RR_LONG) & (rr_cmp[0]*s >= rr_cmp[1]*l)
+    avg8_s, avg8_l = (s >> 4) & 0xFF, (l // 120) & 0xFF
+    rr_short_j = np.minimum(np.concatenate(([0], avg8_s[:-1])), 63)
+    rr_long_j  = np.minimum(np.concatenate(([0], avg8_l[:-1])), 63)
+    hold = np.searchsorted(idx, k, side="right") - 1          # 각 tick의 최근 1Hz 인덱스 (-1: 아직 없음)
+    def held(v): return np.where(hold >= 0, np.concatenate((v, [0]))[hold], 0)
+    rr_flag, rr_short_avg, rr_long_avg = held(rr_flag_j).astype(bool), held(rr_short_j), held(rr_long_j)
+
+    expression_flag = e == EXP_SURPRISED
+    cond = expression_flag | bpm_flag | rr_flag
+    pm = pedal_flag & cond
+    word = pack_rx_word(rate_inst.astype(np.uint64), rate_avg.astype(np.uint64),
+                        bpm_long_avg.astype(np.uint64), bpm_short_avg.astype(np.uint64),
+                        rr_long_avg.astype(np.uint64), rr_short_avg.astype(np.uint64),
+                        pedal_flag.astype(np.uint64), cond.astype(np.uint64), pm.astype(np.uint64))
+    return {
+        "rate_inst": rate_inst, "rate_avg": rate_avg,
+        "bpm_short_avg": bpm_short_avg, "bpm_long_avg": bpm_long_avg,
+        "rr_short_avg": rr_short_avg, "rr_long_avg": rr_long_avg,
+        "pedal_flag": pedal_flag, "expression_flag": expression_flag, "bpm_flag": bpm_flag, "rr_flag": rr_flag,
+        "cond_flags": cond, "pm": pm, "word": word,
+    }
+
+
+class SimulatedSpiDev:
+    """FPGA 없이 spidev.SpiDev 대신 쓰는 장치. xfer2 사이 경과 시간만큼 10Hz tick을 진행.
+    RTL과 같이 응답(MISO)은 이번 프레임을 받기 전 상태, 받은 입력은 다음 tick부터 반영"""
+    def __init__(self, model=None, tick_period=0.1):
+        self.model = model or PMPDModel()
+        self.tick_period = float(tick_period)
+        self._t_last = None; self._acc = 0.0
+
+    def _advance(self):
+        now = clock.now()
+        if self._t_last is not None:
+            self._acc += now - self._t_last
+            n = int(self._acc / self.tick_period)
+            if n: self.model.tick(n); self._acc -= n * self.tick_period
+        self._t_last = now
+
+    def xfer2(self, tx):
+        """8바이트 프레임 여러 개를 한 번에 보내도 됨 (RTL의 6비트 카운터가 64비트마다 wrap)"""
+        self._advance()
+        data, rx = bytes(tx), []
+        for off in range(0, len(data) - 7, 8):
+            rx += self.model.rx_word().to_bytes(8, "big")
+            w = int.from_bytes(data[off:off+8], "big")
+            self.model.set_inputs((w >> 24) & 0xFF, (w >> 16) & 0xFF, (w >> 8) & 0xFF, w & 0xFF)
+        return rx
+
+    def close(self): pass
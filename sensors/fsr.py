@@ -1,77 +1,244 @@
-import threading, time
-import board, busio
-import adafruit_ads1x15.ads1115 as ADS
-from adafruit_ads1x15.analog_in import AnalogIn
+import threading, time, math
+from collections import deque
+import numpy as np
+from common import clock
+from common.telemetry import event
+from common.timeseries import RingSeries
+
+# ADS1115 PGA 게인별 풀스케일 전압 (AnalogIn.voltage와 같은 환산)
+_PGA_RANGE = {2/3: 6.144, 1: 4.096, 2: 2.048, 4: 1.024, 8: 0.512, 16: 0.256}
+_REG_LO_THRESH, _REG_HI_THRESH = 0x02, 0x03
+# 샘플 스레드 스케줄링 예산(초): 샘플이 예정보다 이만큼까지 늦는 것은 지연 상한에 포함, 넘으면 overrun으로 집계
+SCHED_BUDGET = 0.005
+
+
+class PressDetector:
+    """히스테리시스 + 디바운스 눌림 판정.
+    눌림: raw > on_th 가 debounce_on 동안 유지, 뗌: raw < off_th 가 debounce_off 동안 유지"""
+    def __init__(self, on_threshold=2000, off_threshold=None, debounce_on=0.02, debounce_off=0.02):
+        self.on_threshold = int(on_threshold)
+        self.off_threshold = int(on_threshold if off_threshold is None else off_threshold)
+        self.debounce_on, self.debounce_off = float(debounce_on), float(debounce_off)
+        self.pressed = False
+        self._since = None             # 반대 상태 후보가 시작된 시각
+        self.changed_at = None         # 마지막 상태 전환 시각
+        self.release_latency = deque(maxlen=256)   # 첫 뗌 샘플 → 뗌 판정 (초)
+
+    def update(self, raw, ts):
+        """샘플 하나 반영. 상태가 바뀌면 True"""
+        cand = raw < self.off_threshold if self.pressed else raw > self.on_threshold
+        if not cand:
+            self._since = None; return False
+        if self._since is None: self._since = ts
+        if ts - self._since < (self.debounce_off if self.pressed else self.debounce_on): return False
+        if self.pressed: self.release_latency.append(ts - self._since)
+        self.pressed = not self.pressed
+        self.changed_at, self._since = ts, None
+        return True
+
+
+class FakeADC:
+    """테스트/벤치마크용 AnalogIn 대역. signal(t)->raw 를 data_rate 변환 주기로 샘플링.
+    continuous=False면 읽을 때마다 변환 시간만큼 대기 (단발 모드).
+    clock_fn/sleep_fn: 가상 시계를 주면 FSRMonitor(clock_fn=, sleep_fn=)와 함께 결정적으로 재현"""
+    def __init__(self, signal=None, data_rate=475, continuous=True, noise=0.0, gain=1, seed=0,
+                 clock_fn=None, sleep_fn=None):
+        self.signal = signal or (lambda t: 0)
+        self.data_rate, self.continuous, self.noise, self.gain = int(data_rate), continuous, float(noise), gain
+        self._rng = np.random.default_rng(seed)
+        self._clock, self._sleep = clock_fn or time.monotonic, sleep_fn or time.sleep
+
+    def press(self, raw=12000): self.signal = lambda t: raw
+    def release(self, raw=300):  self.signal = lambda t: raw
+
+    def timeline(self, steps, initial=300):
+        """[(t, raw), ...] 시각 순 계단 신호 (t 이전은 initial)"""
+        steps = sorted(steps)
+        self.signal = lambda t: next((raw for ts, raw in reversed(steps) if t >= ts), initial)
+
+    @property
+    def value(self):
+        if not self.continuous: self._sleep(1.0 / self.data_rate)
+        t = self._clock()
+        t = math.floor(t * self.data_rate) / self.data_rate     # 마지막 변환 완료 시점
+        raw = self.signal(t) + (self._rng.normal(0, self.noise) if self.noise else 0)
+        return int(min(max(raw, -32768), 32767))
+
+    @property
+    def voltage(self): return self.value * _PGA_RANGE[self.gain] / 32767
+
 
 class FSRMonitor:
-    """ADS1115 FSR(발판 압력) → 센서 눌림 여부 판단"""
+    """ADS1115 FSR(발판 압력) → 센서 눌림 여부 판단.
+    연속 변환 모드에서 샘플당 I2C 읽기 1회(전압은 raw로 환산), block_size개씩 타임스탬프 버퍼에 저장.
+    rdy_pin을 주면 ALERT/RDY 핀의 변환 완료 엣지로 깨어남 (없으면 data_rate 주기 폴링)"""
     def __init__(self, i2c_scl=None, i2c_sda=None,
                  threshold=2000, check_interval=0.05,
-                 not_pressed_duration=5.0, debug=False):
+                 not_pressed_duration=5.0, debug=False,
+                 continuous=True, data_rate=475, gain=1, hysteresis=200, debounce=0.02,
+                 block_size=16, history=8192, rdy_pin=None, chan=None, sched_budget=SCHED_BUDGET,
+                 clock_fn=None, sleep_fn=None):
         self.threshold = int(threshold)
         self.check_interval = float(check_interval)
         self.not_pressed_duration = float(not_pressed_duration)
         self.debug = debug
+        self.data_rate = int(data_rate)
+        self.block_size = int(block_size)
+        self._volts_per_lsb = _PGA_RANGE[gain] / 32767
 
         self._running = False
         self._thread = None
-        self._pressed = False
         self._raw = 0; self._voltage = 0.0
         self._last_released_time = None
+        self.detector = PressDetector(threshold, threshold - hysteresis, debounce, debounce)
+        self.samples = RingSeries(history, dtype=np.int16)   # 원시 샘플 시계열
+        self.on_change = None  # 콜백 (pressed, ts)
+        self.recorder = None   # 세션 기록기 (있으면 원시 샘플 기록)
+        self._wait_rdy = None
+        self.sched_budget = float(sched_budget)
+        self._now, self._sleep = clock_fn or clock.now, sleep_fn or time.sleep   # 가상 시계 주입 (테스트)
+        self._next_t = self._prev_ts = None
+        self._block_ts, self._block_raw = [], []
+        self.samples_late = 0              # 예정보다 sched_budget 넘게 늦은 샘플 수
+        self.release_overruns = 0          # 뗌 판정이 max_release_latency를 넘은 횟수
+        self.worst_late = 0.0              # 가장 늦은 샘플 (초)
 
         self._i2c = self._ads = self._chan = None
         self.available = False
+        self.continuous = False
+        if chan is not None:
+            self._chan = chan; self.available = True
+            self.continuous = bool(getattr(chan, "continuous", continuous))
+        else:
+            try:
+                import board, busio
+                import adafruit_ads1x15.ads1115 as ADS
+                from adafruit_ads1x15.analog_in import AnalogIn
+                scl = board.SCL if i2c_scl is None else i2c_scl
+                sda = board.SDA if i2c_sda is None else i2c_sda
+                self._i2c = busio.I2C(scl, sda)
+                self._ads = ADS.ADS1115(self._i2c, gain=gain, data_rate=self.data_rate)
+                self._chan = AnalogIn(self._ads, ADS.P0)
+                self.available = True
+                if continuous:
+                    try:
+                        self._ads.mode = ADS.Mode.CONTINUOUS; self.continuous = True
+                    except Exception as e:
+                        event("FSR", f"continuous mode unavailable ({e}); single-shot")
+                if rdy_pin is not None: self._wait_rdy = self._open_rdy(rdy_pin)
+            except Exception as e:
+                event("FSR", f"Init failed: {e}")
+                self.available = False
+        self.sample_interval = 1.0 / self.data_rate if self.continuous else self.check_interval
+
+    def _open_rdy(self, pin):
+        """ALERT/RDY 핀을 변환 완료 신호로 설정 (Hi_thresh MSB=1, Lo_thresh MSB=0)"""
         try:
-            scl = board.SCL if i2c_scl is None else i2c_scl
-            sda = board.SDA if i2c_sda is None else i2c_sda
-            self._i2c = busio.I2C(scl, sda)
-            self._ads = ADS.ADS1115(self._i2c)
-            self._chan = AnalogIn(self._ads, ADS.P0)
-            self.available = True
+            import Jetson.GPIO as GPIO
+            self._ads._write_register(_REG_LO_THRESH, 0x0000)
+            self._ads._write_register(_REG_HI_THRESH, 0x8000)
+            if hasattr(self._ads, "comparator_queue_length"): self._ads.comparator_queue_length = 1
+            GPIO.setmode(GPIO.BOARD); GPIO.setup(pin, GPIO.IN)
+            timeout_ms = max(2, int(4000 / self.data_rate))
+            return lambda: GPIO.wait_for_edge(pin, GPIO.FALLING, timeout=timeout_ms)
         except Exception as e:
-            print(f"[FSR] Init failed: {e}")
-            self.available = False
+            event("FSR", f"RDY pin setup failed ({e}); polling")
+            return None
+
+    @property
+    def nominal_release_latency(self):
+        """스케줄링 지연이 없을 때의 뗌 판정 지연 상한: 뗌 후 첫 샘플까지(샘플 주기 + 변환 1회)
+        + 디바운스를 샘플 주기 단위로 올림 (판정은 디바운스 시간이 지난 첫 샘플에서)"""
+        deb = math.ceil(self.detector.debounce_off / self.sample_interval - 1e-9) * self.sample_interval
+        return deb + self.sample_interval + 1.0 / self.data_rate
+
+    @property
+    def max_release_latency(self):
+        """뗌 판정 지연 상한 = 공칭 + 스케줄링 예산 (sched_budget). 샘플이 예산보다 늦으면 넘을 수 있고,
+        그 경우는 samples_late / release_overruns로 집계 (실시간 OS가 아니므로 예산 초과를 감지해 보고)"""
+        return self.nominal_release_latency + self.sched_budget
+
+    def poll(self):
+        """샘플 1개: 다음 변환까지 대기 → 읽기 → 판정. 샘플 스레드가 반복 호출 (테스트는 가상 시계로 직접)"""
+        if self._wait_rdy is not None:
+            self._wait_rdy()
+            ts = self._now(); raw = self._chan.value
+            # RDY: 이전 샘플 + 변환 주기가 이번 변환 완료 예정 시각
+            late = 0.0 if self._prev_ts is None else ts - self._prev_ts - 1.0 / self.data_rate
+        else:
+            if self._next_t is None: self._next_t = self._now()
+            self._next_t += self.sample_interval
+            dt = self._next_t - self._now()
+            if dt > 0: self._sleep(dt)
+            raw = self._chan.value; ts = self._now()
+            late = ts - self._next_t - (0.0 if self.continuous else 1.0 / self.data_rate)   # 단발은 변환 시간 제외
+            if ts - self._next_t >= self.sample_interval: self._next_t = ts   # 한 주기 넘게 밀렸으면 따라잡지 않고 재정렬
+        self._prev_ts = ts
+        if late > self.worst_late: self.worst_late = late
+        if late > self.sched_budget: self.samples_late += 1
+        self._raw, self._voltage = raw, raw * self._volts_per_lsb
+        self._block_ts.append(ts); self._block_raw.append(raw)
+
+        if self.detector.update(raw, ts):
+            pressed = self.detector.pressed
+            event("FSR", f"{'pressed' if pressed else 'released'} (raw={raw}, V={self._voltage:.3f})", echo=self.debug,
+                  pressed=pressed, raw=raw)
+            if not pressed:
+                # 첫 뗌 샘플 → 판정 (+ 뗌이 그 샘플 직전 변환 직후였을 경우 한 주기) 가 상한을 넘었는지
+                lat = self.detector.release_latency[-1] + self.sample_interval + 1.0 / self.data_rate
+                if lat > self.max_release_latency:
+                    self.release_overruns += 1
+                    event("FSR", f"release latency {lat*1e3:.1f} ms over {self.max_release_latency*1e3:.1f} ms budget",
+                          echo=self.debug, latency_ms=lat * 1e3)
+            self._last_released_time = None if pressed else ts
+            if self.on_change: self.on_change(pressed, ts)
+
+        if (not self.detector.pressed) and (self._last_released_time is not None):
+            if (ts - self._last_released_time) >= self.not_pressed_duration:
+                event("FSR", "Warning: released >= 5s", echo=self.debug)
+                self._last_released_time = None
+
+        if len(self._block_raw) >= self.block_size:
+            self.samples.extend(self._block_raw, self._block_ts)
+            if self.recorder:
+                for t, r in zip(self._block_ts, self._block_raw): self.recorder.fsr(r, r * self._volts_per_lsb, t)
+            self._block_ts, self._block_raw = [], []
+        return raw, ts
 
     def _loop(self):
-        was_pressed = False
         while self._running:
             try:
                 if not self.available or self._chan is None:
-                    self._pressed = False; time.sleep(0.5); continue
-                raw = self._chan.value; volt = self._chan.voltage
-                self._raw, self._voltage = raw, volt
-                pressed_now = raw > self.threshold
-                if pressed_now and not was_pressed:
-                    if self.debug: print(f"[FSR] pressed (raw={raw}, V={volt:.3f})")
-                    self._last_released_time = None
-                elif (not pressed_now) and was_pressed:
-                    if self.debug: print(f"[FSR] released (raw={raw}, V={volt:.3f})")
-                    self._last_released_time = time.time()
-                was_pressed = pressed_now
-                self._pressed = pressed_now
-
-                if (not pressed_now) and (self._last_released_time is not None):
-                    if (time.time() - self._last_released_time) >= self.not_pressed_duration:
-                        if self.debug: print("[FSR] Warning: released >= 5s")
-                        self._last_released_time = None
-                time.sleep(self.check_interval)
+                    self.detector.pressed = False; time.sleep(0.5); continue
+                self.poll()
             except Exception as e:
-                if self.debug: print(f"[FSR] loop error: {e}")
+                event("FSR", f"loop error: {e}", echo=self.debug)
                 time.sleep(0.1)
 
     def start(self):
-        if self._running or not self.available: 
-            if not self.available: print("[FSR] Not available. Skipping start.")
+        if self._running or not self.available:
+            if not self.available: event("FSR", "Not available. Skipping start.")
             return
         self._running = True
         self._thread = threading.Thread(target=self._loop, daemon=True)
         self._thread.start()
-        print("[FSR] monitor started.")
+        mode = "continuous" if self.continuous else "single-shot"
+        event("FSR", f"monitor started ({mode}, {1/self.sample_interval:.0f} SPS, "
+                     f"release latency <= {self.max_release_latency*1e3:.0f} ms incl. {self.sched_budget*1e3:.0f} ms scheduling budget).")
 
     def stop(self):
         self._running = False
         if self._thread: self._thread.join(timeout=1.0)
-        print("[FSR] monitor stopped.")
+        event("FSR", "monitor stopped.")
+
+    def latency_stats(self):
+        """뗌 판정 지연 통계 (ms)"""
+        lat = np.array(self.detector.release_latency) * 1e3
+        if not len(lat): return {"count": 0}
+        return {"count": len(lat), "p50": float(np.percentile(lat, 50)),
+                "p99": float(np.percentile(lat, 99)), "max": float(lat.max()),
+                "bound": self.max_release_latency * 1e3, "release_overruns": self.release_overruns,
+                "samples_late": self.samples_late, "worst_late": self.worst_late * 1e3}
 
-    def get_pressed(self): return bool(self._pressed)
+    def get_pressed(self): return bool(self.detector.pressed)
     def get_raw(self):     return int(self._raw), float(self._voltage)
@@ -1,82 +1,136 @@
-import time, struct, threading, serial
+import time, math, struct, threading
+import numpy as np
+from common.timeseries import TelemetryStore
+from common.telemetry import event
 
 SERIAL_PORT = '/dev/ttyTHS1'
 BAUD_RATE   = 115200
 SOF_BYTE    = 0x01
 FRAME_HEADER_SIZE = 8
-TYPE_HEART_RATE   = 0x0A15
+MAX_PAYLOAD = 200
+TYPE_PHASE        = 0x0A13   # total, breath, heart phase
 TYPE_BREATH_RATE  = 0x0A14
+TYPE_HEART_RATE   = 0x0A15
+TYPE_DISTANCE     = 0x0A16   # flag(u32), distance
+
+# 타입별 페이로드 디코딩 (모르는 타입은 원시 바이트를 uint8 시리즈로 보관)
+_DECODERS = {
+    TYPE_HEART_RATE:  struct.Struct('<f'),
+    TYPE_BREATH_RATE: struct.Struct('<f'),
+    TYPE_PHASE:       struct.Struct('<fff'),
+    TYPE_DISTANCE:    struct.Struct('<If'),
+}
+
+# 프레임: SOF(1) ID(2) LEN(2,BE) TYPE(2,BE) HEAD_CKSUM(1) | PAYLOAD(LEN) DATA_CKSUM(1)
+# 체크섬 = ~(XOR of bytes) & 0xFF
+_HDR = struct.Struct(">BHHHB")
+_SOF = bytes([SOF_BYTE])
+
+def _cksum(data):
+    s = 0
+    for b in data: s ^= b
+    return (~s) & 0xFF
+
+def build_frame(data_type, payload, frame_id=0):
+    """시뮬레이터/벤치마크용 프레임 생성"""
+    hdr = _HDR.pack(SOF_BYTE, frame_id, len(payload), data_type, 0)[:-1]
+    return hdr + bytes([_cksum(hdr)]) + bytes(payload) + bytes([_cksum(payload)])
+
+
+class MmWaveFrameParser:
+    """바이트 스트림 → 완성된 프레임 목록. 읽은 덩어리 단위로 SOF를 find로 찾고,
+    체크섬은 덩어리 전체의 누적 XOR(prefix XOR) 한 번으로 구간별 O(1) 검사"""
+    def __init__(self, max_payload=MAX_PAYLOAD):
+        self.max_payload = int(max_payload)
+        self._buf = bytearray()
+        self.frames = self.bad_checksum = 0
+
+    def reset(self): self._buf.clear()
+
+    def feed(self, data):
+        """새 바이트를 넣고 이번에 완성된 (data_type, payload) 목록 반환"""
+        buf = self._buf
+        buf += data
+        n = len(buf)
+        if n < FRAME_HEADER_SIZE: return []
+        px = np.bitwise_xor.accumulate(np.frombuffer(buf, np.uint8)).tobytes()
+        def xor(a, b): return px[b-1] ^ (px[a-1] if a else 0)      # buf[a:b] XOR
+
+        out, pos, mv = [], 0, memoryview(buf)
+        while True:
+            sof = buf.find(_SOF, pos)
+            if sof < 0: pos = n; break
+            if sof + FRAME_HEADER_SIZE > n: pos = sof; break
+            _, _, length, dtype, hck = _HDR.unpack_from(buf, sof)
+            if length > self.max_payload or (~xor(sof, sof + 7)) & 0xFF != hck:
+                pos = sof + 1; continue                       # 잘못된 SOF → 다음 바이트부터 재동기
+            end = sof + FRAME_HEADER_SIZE + length + 1
+            if end > n: pos = sof; break                      # 아직 덜 들어온 프레임
+            if (~xor(sof + FRAME_HEADER_SIZE, end - 1)) & 0xFF == buf[end-1]:
+                out.append((dtype, bytes(mv[sof + FRAME_HEADER_SIZE:end - 1])))
+            else:
+                self.bad_checksum += 1
+            pos = end
+        mv.release()
+        del buf[:pos]
+        self.frames += len(out)
+        return out
+
 
 class MmWaveSensor:
-    def __init__(self, port=SERIAL_PORT, baudrate=BAUD_RATE, debug=False):
+    def __init__(self, port=SERIAL_PORT, baudrate=BAUD_RATE, debug=False, ser=None):
         self.port, self.baudrate, self.debug = port, baudrate, debug
-        self.ser = None
+        self.ser = ser     # 주면 포트를 열지 않고 그대로 사용 (SimulatedMmWaveSerial 등)
         self.connected = False
         self.has_data  = False
         self.last_update = 0.0
-        self._latest_data = {"heart_rate": None, "breath_rate": None}
-        self._frame_buffer = bytearray()
-        self._is_frame_started = False
+        self.store = TelemetryStore()   # 데이터 타입별 시계열 (UI/분석이 같이 읽음)
+        self._parser = MmWaveFrameParser()
         self._is_running = False
         self._thread = None
-
-    def _cksum(self, data):
-        s = 0
-        for b in data: s ^= b
-        return (~s) & 0xFF
+        self.recorder = None   # 세션 기록기 (있으면 원시 페이로드 기록)
 
     def _parse_payload(self, data_type, payload):
+        if self.recorder: self.recorder.mmwave(data_type, payload)
         try:
-            if data_type == TYPE_HEART_RATE:
-                self._latest_data["heart_rate"] = struct.unpack('<f', payload)[0]
-            elif data_type == TYPE_BREATH_RATE:
-                self._latest_data["breath_rate"] = struct.unpack('<f', payload)[0]
+            dec = _DECODERS.get(data_type)
+            if dec is not None:
+                v = dec.unpack(payload)
+                self.store.append(data_type, v[0] if len(v) == 1 else v, width=None if len(v) == 1 else len(v))
+            else:
+                self.store.append(data_type, np.frombuffer(payload, np.uint8), width=len(payload), dtype=np.uint8)
             self.has_data = True
             self.last_update = time.time()
         except Exception as e:
-            if self.debug: print("payload parse error:", e)
+            event("mmWave", f"payload parse error: {e}", echo=self.debug, type=data_type)
 
-    def _process_frame(self):
-        hdr = self._frame_buffer[:FRAME_HEADER_SIZE]
-        if self._cksum(hdr[:FRAME_HEADER_SIZE-1]) != hdr[7]: return
-        payload = self._frame_buffer[FRAME_HEADER_SIZE:-1]
-        if self._cksum(payload) != self._frame_buffer[-1]: return
-        dtype = (hdr[5] << 8) | hdr[6]
-        self._parse_payload(dtype, payload)
+    def _latest(self, data_type):
+        last = self.store.latest(data_type) if self.has_data else None
+        return None if last is None else float(last[1])
 
     def _read_loop(self):
         while self._is_running:
             try:
-                b = self.ser.read(1)
-                if not b:
+                # OS 버퍼에 쌓인 만큼 한 번에 (없으면 1바이트 대기, timeout=1)
+                data = self.ser.read(self.ser.in_waiting or 1)
+                if not data:
                     if self.has_data and (time.time() - self.last_update > 2.0):
                         self.has_data = False
                     continue
-                b = b[0]
-                if not self._is_frame_started and b == SOF_BYTE:
-                    self._is_frame_started = True
-                    self._frame_buffer.clear()
-                    self._frame_buffer.append(b)
-                elif self._is_frame_started:
-                    self._frame_buffer.append(b)
-                    if len(self._frame_buffer) >= FRAME_HEADER_SIZE:
-                        data_len = (self._frame_buffer[3] << 8) | self._frame_buffer[4]
-                        if data_len > 200:
-                            self._is_frame_started = False; continue
-                        total_len = FRAME_HEADER_SIZE + data_len + 1
-                        if len(self._frame_buffer) >= total_len:
-                            self._process_frame()
-                            self._is_frame_started = False
+                for dtype, payload in self._parser.feed(data):
+                    self._parse_payload(dtype, payload)
             except Exception as e:
-                print("[mmWave] read error:", e); time.sleep(0.1)
+                event("mmWave", f"read error: {e}"); time.sleep(0.1)
 
     def start(self):
         if self._is_running: return
         try:
-            self.ser = serial.Serial(self.port, self.baudrate, timeout=1)
+            if self.ser is None:
+                import serial
+                self.ser = serial.Serial(self.port, self.baudrate, timeout=1)
             self.connected = True
-        except serial.SerialException as e:
-            print(f"[mmWave] open fail: {e}")
+        except Exception as e:
+            event("mmWave", f"open fail: {e}", port=self.port)
             self.connected = False
             return
         self._is_running = True
@@ -89,5 +143,43 @@ class MmWaveSensor:
         if self.ser and self.ser.is_open: self.ser.close()
         self.connected = False; self.has_data = False; self.last_update = 0.0
 
-    def get_heart_rate(self):  return self._latest_data["heart_rate"] if self.has_data else None
-    def get_breath_rate(self): return self._latest_data["breath_rate"] if self.has_data else None
+    def get_heart_rate(self):  return self._latest(TYPE_HEART_RATE)
+    def get_breath_rate(self): return self._latest(TYPE_BREATH_RATE)
+    def heart_rate_series(self):  return self.store.series(TYPE_HEART_RATE)
+    def breath_rate_series(self): return self.store.series(TYPE_BREATH_RATE)
+
+
+class SimulatedMmWaveSerial:
+    """레이더 없이 쓰는 직렬 포트 대역 (read/in_waiting/close). period초마다 심박/호흡/위상 프레임 생성"""
+    def __init__(self, heart=72.0, breath=15.0, period=1.0, timeout=1.0):
+        self.heart, self.breath, self.period, self.timeout = float(heart), float(breath), float(period), float(timeout)
+        self.is_open = True
+        self._buf = bytearray()
+        self._fid = 0
+        self._t0 = self._next = time.monotonic()
+
+    def _generate(self):
+        now = time.monotonic()
+        while self._next <= now:
+            t = self._next - self._t0
+            hr = self.heart + 6 * math.sin(t * 0.1)
+            br = self.breath + 2 * math.sin(t * 0.05)
+            phase = (math.sin(2*math.pi*br/60*t) + 0.2*math.sin(2*math.pi*hr/60*t),
+                     math.sin(2*math.pi*br/60*t), 0.2*math.sin(2*math.pi*hr/60*t))
+            for dtype, payload in ((TYPE_HEART_RATE, struct.pack("<f", hr)), (TYPE_BREATH_RATE, struct.pack("<f", br)),
+                                   (TYPE_PHASE, struct.pack("<3f", *phase))):
+                self._buf += build_frame(dtype, payload, self._fid); self._fid = (self._fid + 1) & 0xFFFF
+            self._next += self.period
+
+    @property
+    def in_waiting(self):
+        self._generate(); return len(self._buf)
+
+    def read(self, n=1):
+        self._generate()
+        if not self._buf:
+            time.sleep(min(self.timeout, max(0.0, self._next - time.monotonic()))); self._generate()
+        out = bytes(self._buf[:n]); del self._buf[:n]
+        return out
+
+    def close(self): self.is_open = False
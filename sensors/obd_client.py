@@ -1,10 +1,290 @@
+import re, time, math, threading
+from common import clock
+
 OBD_AVAILABLE = True
 
+# Mode 01 PID: (데이터 바이트 수, 디코더)
+PID_RPM, PID_SPEED, PID_THROTTLE, PID_ACCEL_D = 0x0C, 0x0D, 0x11, 0x49
+PID_DEFS = {
+    PID_RPM:      (2, lambda a, b=0: (256*a + b) / 4.0),
+    PID_SPEED:    (1, lambda a: float(a)),
+    PID_THROTTLE: (1, lambda a: a * 100.0 / 255.0),
+    PID_ACCEL_D:  (1, lambda a: a * 100.0 / 255.0),
+}
+MAX_PIDS_PER_REQUEST = 6      # ELM327 CAN 한 요청당 최대 PID 수
+INIT_COMMANDS = ("ATZ", "ATE0", "ATL0", "ATS0", "ATH0", "ATSP0", "ATAT2")
+_HEX = re.compile(r"^[0-9A-F]+$")
+
+
+class _PidState:
+    __slots__ = ("pid", "min_hz", "max_hz", "rate", "next_due", "value", "ts", "polls")
+    def __init__(self, pid, min_hz, max_hz):
+        self.pid, self.min_hz, self.max_hz = pid, float(min_hz), float(max_hz)
+        self.rate = float(max_hz)
+        self.next_due = 0.0
+        self.value = self.ts = None
+        self.polls = 0
+
+
 class OBDClient:
-    def __init__(self, port="/dev/ttyACM0", baudrate=9600, timeout=1.0, debug=False):
+    """ELM327 직렬 OBD-II 클라이언트. 백그라운드 폴러가 기한이 된 PID들을 한 요청(010C0D49…)으로 묶어 조회하고,
+    값은 타임스탬프와 함께 캐시 → get_*()는 캐시만 읽으므로 프레임 루프를 막지 않음.
+    PID별 주기는 값 변화에 따라 [min_hz, max_hz] 사이에서 조정 (변하면 빠르게, 안 변하면 느리게)"""
+    def __init__(self, port="/dev/ttyACM0", baudrate=9600, timeout=1.0, debug=False,
+                 rates=None, stale_after=2.0, ser=None):
         self.port, self.baudrate, self.timeout, self.debug = port, baudrate, timeout, debug
+        self.stale_after = float(stale_after)
+        self.rates = rates or {PID_RPM: (2, 10), PID_SPEED: (1, 5), PID_ACCEL_D: (5, 10)}
+        self.ser = ser
+        self.multi_pid = True
+        self.supported = None
+        self._pids = {}
         self._running = False
-    def start(self): self._running = False; return False  # 실제 연결 없으면 False
-    def get_rpm(self):         return None
-    def get_speed(self):       return None
-    def get_accel_pos(self):   return None
+        self._thread = None
+        self._lock = threading.Lock()     # 직렬 포트 요청/응답 직렬화
+        self.requests = self.responses = self.errors = 0
+        self.rtt = None                   # 요청 왕복 시간 EMA (초)
+
+    # ── 저수준 ELM327 대화
+    def _command(self, cmd, timeout=None):
+        """명령 전송 후 '>' 프롬프트까지 읽어 응답 줄 목록 반환"""
+        with self._lock:
+            ser = self.ser
+            ser.reset_input_buffer()
+            ser.write((cmd + "\r").encode("ascii"))
+            if timeout is not None: ser.timeout = timeout
+            raw = ser.read_until(b">")
+            if timeout is not None: ser.timeout = self.timeout
+        if not raw.endswith(b">"): raise TimeoutError(f"no prompt for {cmd}")
+        text = raw[:-1].decode("ascii", "ignore").replace("\n", "\r")
+        return [ln.strip().replace(" ", "") for ln in text.split("\r") if ln.strip()]
+
+    @staticmethod
+    def _payload(lines):
+        """응답 줄 → 헥스 바이트열 (ISO-TP 멀티프레임 '0:' 접두사/길이 줄 처리)"""
+        if any(ln.upper().startswith(("NODATA", "?", "ERROR", "UNABLE", "STOPPED", "CANERROR", "BUSINIT"))
+               for ln in lines):
+            return None
+        parts, multi = [], any(re.match(r"^[0-9A-F]:", ln.upper()) for ln in lines)
+        for ln in lines:
+            ln = ln.upper()
+            if ln.startswith("SEARCHING"): continue
+            if multi:
+                if re.match(r"^[0-9A-F]:", ln): parts.append(ln[2:])
+                continue          # 멀티프레임 앞의 바이트 수 줄
+            if _HEX.match(ln): parts.append(ln)
+        data = "".join(parts)
+        return bytes.fromhex(data[: len(data) // 2 * 2]) if data else None
+
+    @staticmethod
+    def _parse_mode01(data, expect):
+        """41 PID A [B] PID A ... → {pid: value}. 응답이 여러 개 이어져도 처리"""
+        out, i = {}, 0
+        while i < len(data):
+            if data[i] != 0x41: i += 1; continue
+            i += 1
+            while i < len(data) and data[i] in expect and data[i] in PID_DEFS:
+                pid = data[i]; n, dec = PID_DEFS[pid]
+                if i + 1 + n > len(data): return out
+                out[pid] = dec(*data[i+1:i+1+n]); i += 1 + n
+        return out
+
+    def query(self, pids):
+        """mode 01 PID 여러 개를 한 요청으로 조회 → {pid: value}"""
+        cmd = "01" + "".join(f"{p:02X}" for p in pids)
+        if len(pids) > 1: cmd += " 1"     # 첫 응답 ECU 뒤 바로 프롬프트 (타임아웃 대기 생략)
+        t = time.perf_counter()
+        data = self._payload(self._command(cmd))
+        dt = time.perf_counter() - t
+        self.rtt = dt if self.rtt is None else 0.8*self.rtt + 0.2*dt
+        self.requests += 1
+        return {} if data is None else self._parse_mode01(data, set(pids))
+
+    # ── 초기화
+    def _init_elm(self):
+        for cmd in INIT_COMMANDS:
+            self._command(cmd, timeout=max(self.timeout, 2.0) if cmd == "ATZ" else None)
+        # 프로토콜 탐색 + 지원 PID 비트맵 (0100/0120/0140)
+        supported = set()
+        for base in (0x00, 0x20, 0x40):
+            data = self._payload(self._command(f"01{base:02X}", timeout=max(self.timeout, 5.0)))
+            if not data or len(data) < 6 or data[0] != 0x41: break
+            bits = int.from_bytes(data[2:6], "big")
+            supported |= {base + i + 1 for i in range(32) if bits >> (31 - i) & 1}
+            if not bits & 1: break
+        self.supported = supported or None
+        rates = dict(self.rates)
+        if self.supported and PID_ACCEL_D in rates and PID_ACCEL_D not in self.supported:
+            rates[PID_THROTTLE] = rates.pop(PID_ACCEL_D)      # 가속 페달 PID 없으면 스로틀 개도로 대체
+        self._pids = {p: _PidState(p, lo, hi) for p, (lo, hi) in rates.items()
+                      if self.supported is None or p in self.supported}
+        # 멀티 PID 지원 확인 (CAN 외 프로토콜은 한 번에 하나만)
+        if len(self._pids) > 1:
+            got = self.query(list(self._pids)[:2])
+            self.multi_pid = len(got) == 2
+        if self.debug: print(f"[OBD] pids={[hex(p) for p in self._pids]} multi_pid={self.multi_pid}")
+
+    def start(self):
+        if self._running: return True
+        try:
+            if self.ser is None:
+                import serial
+                self.ser = serial.Serial(self.port, self.baudrate, timeout=self.timeout)
+            self._init_elm()
+        except Exception as e:
+            print(f"[OBD] connect failed: {e}")
+            self.close(); return False
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="OBD", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._running = False
+        if self._thread: self._thread.join(timeout=2.0)
+        self.close()
+
+    def close(self):
+        try:
+            if self.ser is not None: self.ser.close()
+        except Exception: pass
+
+    # ── 폴러
+    def _adapt(self, st, value):
+        """값이 의미 있게 변하면 주기를 올리고, 그대로면 천천히 내림"""
+        if st.value is not None:
+            scale = max(1.0, abs(st.value) * 0.02)
+            st.rate = min(st.max_hz, st.rate * 1.5) if abs(value - st.value) > scale else max(st.min_hz, st.rate * 0.9)
+
+    def poll_once(self):
+        """기한이 된 PID들을 조회. 조회한 PID 수 반환 (없으면 0)"""
+        now = clock.now()
+        if not any(st.next_due <= now for st in self._pids.values()): return 0
+        # 곧(주기의 1/4 이내) 기한이 될 PID도 같은 요청에 실어 요청 수를 줄임
+        due = sorted((st for st in self._pids.values() if st.next_due <= now + 0.25 / st.rate),
+                     key=lambda s: s.next_due)
+        due = due[:MAX_PIDS_PER_REQUEST] if self.multi_pid else due[:1]
+        got = self.query([st.pid for st in due])
+        now = clock.now()
+        for st in due:
+            st.polls += 1
+            st.next_due = now + 1.0 / st.rate
+            if st.pid in got:
+                v = got[st.pid]
+                self._adapt(st, v)
+                st.value, st.ts = v, now
+                self.responses += 1
+        return len(due)
+
+    def _loop(self):
+        while self._running:
+            try:
+                if not self.poll_once():
+                    nxt = min((st.next_due for st in self._pids.values()), default=clock.now() + 0.1)
+                    time.sleep(min(0.1, max(0.0, nxt - clock.now())))
+            except Exception as e:
+                self.errors += 1
+                if self.debug: print(f"[OBD] poll error: {e}")
+                time.sleep(0.2)
+
+    # ── 캐시 읽기 (논블로킹)
+    def get(self, pid):
+        """(값, 타임스탬프). 없거나 stale_after보다 오래되면 (None, ts)"""
+        st = self._pids.get(pid)
+        if st is None or st.ts is None: return None, None
+        return (st.value if clock.now() - st.ts <= self.stale_after else None), st.ts
+
+    def get_rpm(self):   return self.get(PID_RPM)[0]
+    def get_speed(self): return self.get(PID_SPEED)[0]
+    def get_accel_pos(self):
+        v = self.get(PID_ACCEL_D)[0]
+        return v if v is not None else self.get(PID_THROTTLE)[0]
+
+    def stats(self):
+        return {"requests": self.requests, "responses": self.responses, "errors": self.errors,
+                "rtt_ms": None if self.rtt is None else self.rtt * 1e3,
+                "rates": {hex(p): round(st.rate, 2) for p, st in self._pids.items()}}
+
+
+class FakeELM327:
+    """테스트/벤치마크용 ELM327 대역 (pyserial 인터페이스 일부).
+    요청마다 latency + 전송 시간(baudrate)만큼 지연, 차량 값은 시간에 따른 사인파"""
+    def __init__(self, baudrate=38400, latency=0.03, multi_pid=True, supported=(PID_RPM, PID_SPEED, PID_THROTTLE, PID_ACCEL_D)):
+        self.baudrate, self.latency, self.multi_pid = baudrate, float(latency), multi_pid
+        self.supported = set(supported)
+        self.timeout = 1.0
+        self.echo, self.spaces = True, True
+        self._out = bytearray()
+        self._ready_at = 0.0
+        self._cond = threading.Condition()
+        self.t0 = time.monotonic()
+        self.is_open = True
+
+    def vehicle(self, t):
+        rpm = 1500 + 1200*math.sin(t*1.2) + 500*math.sin(t*0.3)
+        speed = 60 + 40*math.sin(t*0.8)
+        accel = 30 + 25*math.sin(t*1.7)
+        return {PID_RPM: int(rpm*4), PID_SPEED: int(speed), PID_THROTTLE: int(accel*2.55), PID_ACCEL_D: int(accel*2.55)}
+
+    def _answer(self, cmd):
+        c = cmd.replace(" ", "").upper()
+        if c.startswith("AT"):
+            if c == "ATZ": self.echo, self.spaces = True, True; return "ELM327 v1.5"
+            if c == "ATE0": self.echo = False
+            if c == "ATS0": self.spaces = False
+            return "OK"
+        if not c.startswith("01") or len(c) < 4: return "?"
+        body = c[2:]
+        if len(body) % 2: body = body[:-1]       # 응답 개수 접미사 ("… 1")
+        pids = [int(body[i:i+2], 16) for i in range(0, len(body), 2)]
+        if len(pids) > 1 and not self.multi_pid: return "NODATA"
+        out = [0x41]
+        vals = self.vehicle(time.monotonic() - self.t0)
+        for p in pids:
+            if p in (0x00, 0x20, 0x40):
+                bits = sum(1 << (31 - (q - p - 1)) for q in self.supported if p < q <= p + 32)
+                if p == 0x00 and any(q > 0x20 for q in self.supported): bits |= 1
+                if p == 0x20 and any(q > 0x40 for q in self.supported): bits |= 1
+                out += [p] + list(bits.to_bytes(4, "big"))
+            elif p in self.supported and p in PID_DEFS:
+                n = PID_DEFS[p][0]
+                out += [p] + list(int(vals[p]).to_bytes(n, "big"))
+        if len(out) == 1: return "NODATA"
+        if len(out) <= 7: return "".join(f"{b:02X}" for b in out)
+        # ISO-TP 멀티프레임 형식 (길이 줄 + 0:/1: …)
+        hexs = "".join(f"{b:02X}" for b in out)
+        lines, first = [f"{len(out):03X}", "0:" + hexs[:12]], hexs[12:]
+        for k in range(0, len(first), 14): lines.append(f"{(k//14 + 1) & 0xF:X}:" + first[k:k+14])
+        return "\r".join(lines)
+
+    # ── pyserial 인터페이스
+    def write(self, data):
+        cmd = data.decode("ascii").strip()
+        resp = self._answer(cmd)
+        if self.spaces and not cmd.upper().startswith("AT") and ":" not in resp:
+            resp = " ".join(resp[i:i+2] for i in range(0, len(resp), 2)) if _HEX.match(resp) else resp
+        text = ((cmd + "\r") if self.echo else "") + resp + "\r\r>"
+        with self._cond:
+            self._out += text.encode("ascii")
+            self._ready_at = time.monotonic() + self.latency + len(text) * 10.0 / self.baudrate
+            self._cond.notify_all()
+        return len(data)
+
+    def reset_input_buffer(self):
+        with self._cond: self._out.clear()
+
+    @property
+    def in_waiting(self): return len(self._out) if time.monotonic() >= self._ready_at else 0
+
+    def read_until(self, expected=b"\n"):
+        wait = self._ready_at - time.monotonic()
+        if wait > (self.timeout or 0):
+            time.sleep(self.timeout or 0); return b""
+        if wait > 0: time.sleep(wait)
+        with self._cond:
+            k = self._out.find(expected)
+            end = len(self._out) if k < 0 else k + len(expected)
+            data = bytes(self._out[:end]); del self._out[:end]
+        return data
+
+    def close(self): self.is_open = False
@@ -1,9 +1,19 @@
-import spidev
+import struct, time
+from collections import deque
+from common.pipeline import Worker
+from common.profiling import span
+from common.telemetry import event
 
 BUS, DEV = 0, 0
 MODE, SPEED, BITS = 1, 11_000_000, 8  # CPOL=0, CPHA=1
+FRAME_BYTES = 8
+TICK_PERIOD = 0.1   # FPGA 10Hz 샘플링 주기
+
+_WORD = struct.Struct(">Q")     # 64비트 빅엔디언 프레임
+_TX = struct.Struct(">4xBBBB")  # 상위 32비트 0, pedal/expression/bpm/rr
 
 def open_spi():
+    import spidev   # 보드에서만 필요 (리플레이/개발 PC에서는 없어도 됨)
     spi = spidev.SpiDev()
     spi.open(BUS, DEV)
     spi.mode = MODE
@@ -13,32 +23,106 @@ def open_spi():
     return spi
 
 def pack_tx_frame(pedal: int, expression: int, bpm: int, rr: int) -> list:
-    pedal, expression, bpm, rr = pedal & 0xFF, expression & 0xFF, bpm & 0xFF, rr & 0xFF
-    w = 0
-    w |= (pedal & 0xFF) << 24
-    w |= (expression & 0xFF) << 16
-    w |= (bpm & 0xFF) << 8
-    w |= (rr & 0xFF)
-    return [(w >> s) & 0xFF for s in (56,48,40,32,24,16,8,0)]
+    return list(_TX.pack(pedal & 0xFF, expression & 0xFF, bpm & 0xFF, rr & 0xFF))
+
+
+class RxFrame:
+    """FPGA 상태 워드. 필드는 접근할 때만 비트 추출 (dict처럼 [] / get() 도 가능)"""
+    __slots__ = ("word",)
+    FIELDS = ("rate_inst", "rate_avg", "bpm_long_avg", "bpm_short_avg", "rr_long_avg", "rr_short_avg",
+              "pedal_flag", "cond_flags", "pm", "raw64_hex")
+
+    def __init__(self, word=0): self.word = word
+
+    @classmethod
+    def from_bytes(cls, rx): return cls(int.from_bytes(bytes(rx), "big"))
+
+    rate_inst     = property(lambda self: (self.word >> 48) & 0xFFFF)
+    rate_avg      = property(lambda self: (self.word >> 32) & 0xFFFF)
+    bpm_long_avg  = property(lambda self: (self.word >> 24) & 0xFF)
+    bpm_short_avg = property(lambda self: (self.word >> 16) & 0xFF)
+    rr_long_avg   = property(lambda self: (self.word >> 10) & 0x3F)
+    rr_short_avg  = property(lambda self: (self.word >>  4) & 0x3F)
+    pedal_flag    = property(lambda self: (self.word >> 3) & 0x1)
+    cond_flags    = property(lambda self: (self.word >> 2) & 0x1)
+    pm            = property(lambda self: self.word & 0x1)
+    raw64_hex     = property(lambda self: f"0x{self.word:016X}")
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS: raise KeyError(key)
+        return getattr(self, key)
+    def get(self, key, default=None): return getattr(self, key) if key in self.FIELDS else default
+    def as_dict(self): return {k: getattr(self, k) for k in self.FIELDS}
+    def __repr__(self): return f"RxFrame({self.raw64_hex})"
+
+RX_IDLE = RxFrame(0)
 
 def unpack_rx_frame(rx_bytes: list) -> dict:
-    if len(rx_bytes) != 8: raise ValueError("rx_bytes must be length 8")
-    w = 0
-    for b in rx_bytes: w = ((w << 8) | (b & 0xFF)) & 0xFFFFFFFFFFFFFFFF
-    return {
-        "rate_inst":     (w >> 48) & 0xFFFF,
-        "rate_avg":      (w >> 32) & 0xFFFF,
-        "bpm_long_avg":  (w >> 24) & 0xFF,
-        "bpm_short_avg": (w >> 16) & 0xFF,
-        "rr_long_avg":   (w >> 10) & 0x3F,
-        "rr_short_avg":  (w >>  4) & 0x3F,
-        "pedal_flag":    (w >> 3) & 0x1,
-        "cond_flags":    (w >> 2) & 0x1,
-        "pm":            w & 0x1,
-        "raw64_hex":     f"0x{w:016X}"
-    }
+    if len(rx_bytes) != FRAME_BYTES: raise ValueError("rx_bytes must be length 8")
+    return RxFrame.from_bytes(rx_bytes).as_dict()
 
 def xfer_once(spi, pedal: int, expression: int, bpm: int, rr: int) -> dict:
     tx = pack_tx_frame(pedal, expression, bpm, rr)
     rx = spi.xfer2(tx)
     return unpack_rx_frame(rx)
+
+
+class SpiLink(Worker):
+    """FPGA SPI 전용 워커. 카메라 FPS와 무관하게 10Hz로 source()의 (pedal, expression, bpm, rr)를 송신.
+    submit()으로 생산자가 넣어 둔 프레임은 다음 tick에 source 프레임과 함께 CS 한 번(xfer2 1회)에 모아서 전송.
+    루프가 밀리면 따라잡지 않고 지금 값 하나만 보냄 (PMPD는 tick마다 마지막 입력만 반영하므로 같은 값을
+    되풀이해 보낼 이유가 없음). 제때 못 보낸 주기 수는 late_ticks
+    최신 상태는 불변 RxFrame으로 self.latest에 통째로 교체 (읽는 쪽 잠금 불필요)"""
+    def __init__(self, spi, source=None, stop_event=None, period=TICK_PERIOD, max_batch=8, recorder=None):
+        super().__init__("SPI", stop_event)
+        self.spi, self.source = spi, source
+        self.period = float(period)
+        self.max_batch = int(max_batch)
+        self.recorder = recorder
+        self.latest = RX_IDLE
+        self._pending = deque(maxlen=self.max_batch)
+        self._tx = bytearray(FRAME_BYTES * self.max_batch)
+        self._views = [memoryview(self._tx)[:FRAME_BYTES * n] for n in range(self.max_batch + 1)]
+        self._next = time.monotonic()
+        self.transfers = self.frames = self.late_ticks = self.errors = 0
+
+    @property
+    def flags(self): return self.latest
+
+    def submit(self, pedal, expression, bpm, rr):
+        """다음 전송에 실을 프레임 추가 (가득 차면 가장 오래된 것 버림)"""
+        self._pending.append((pedal & 0xFF, expression & 0xFF, bpm & 0xFF, rr & 0xFF))
+
+    def transfer(self, frames):
+        """frames를 한 번의 xfer2로 전송하고 프레임별 RxFrame 반환.
+        각 응답은 그 프레임을 받기 전 FPGA 상태 (PMPD는 10Hz tick에 마지막 입력만 반영)"""
+        n = len(frames)
+        for i, f in enumerate(frames): _TX.pack_into(self._tx, i * FRAME_BYTES, *f)
+        with span("spi.xfer"):
+            rx = bytes(self.spi.xfer2(self._views[n]))
+        out = [RxFrame(_WORD.unpack_from(rx, i * FRAME_BYTES)[0]) for i in range(n)]
+        self.transfers += 1; self.frames += n
+        return out
+
+    def step(self):
+        self._next += self.period
+        delay = self._next - time.monotonic()
+        if delay > 0: self.stop_event.wait(delay)
+        else:
+            self.late_ticks += 1 + int(-delay / self.period)   # 이번 tick + 그 전에 통째로 지나간 주기
+            self._next = time.monotonic()   # 밀렸으면 따라잡지 않고 재정렬
+
+        if self.source is not None:
+            try: self.submit(*self.source())
+            except Exception as e: event("SPI", f"source error: {e}")
+        frames = [self._pending.popleft() for _ in range(len(self._pending))]
+        if not frames: return
+        try:
+            rx = self.transfer(frames)
+            self.latest = rx[-1]
+            if self.recorder:
+                for r in rx: self.recorder.spi_rx(r.word)
+        except Exception as e:
+            self.errors += 1
+            event("SPI", f"error: {e}", errors=self.errors)
+            self.latest = RX_IDLE
@@ -0,0 +1,56 @@
+"""풀 경로(bench_alloc.make_frame_fn(pooled=True))가 워밍업 뒤 재할당 없이, 프레임당 임시 할당이 작게 유지되는지"""
+import os, sys, tracemalloc
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from bench_alloc import make_frame_fn
+from common.framepool import FramePool
+
+WARMUP, FRAMES = 30, 60
+MAX_MB_PER_FRAME = 0.5      # bench_alloc --check 기본값과 같음
+
+@pytest.fixture(scope="module")
+def inputs():
+    from sensors.camera import SyntheticCamera
+    dcam, pcam = SyntheticCamera("driver", fps=1e6), SyntheticCamera("pedal", fps=1e6)
+    return [dcam.read()[1] for _ in range(4)], [pcam._draw(i / 60.0) for i in range(120)]
+
+@pytest.fixture(scope="module", params=[False, True], ids=["vision", "vision+ui"])
+def pooled_frame(request, inputs):
+    with_ui = request.param
+    if with_ui:
+        from ui.utils import KOREAN_FONT_PATH
+        if not os.path.exists(KOREAN_FONT_PATH): pytest.skip("Korean font not found (KOREAN_FONT_PATH)")
+    frame, pools = make_frame_fn(True, *inputs, with_ui)
+    for i in range(WARMUP): frame(i)
+    return frame, pools
+
+def test_no_reallocation_after_warmup(pooled_frame):
+    frame, pools = pooled_frame
+    allocs = sum(p.allocs for p in pools)
+    for i in range(WARMUP, WARMUP + FRAMES): frame(i)      # ROI 크기가 프레임마다 바뀜 (bench_alloc)
+    assert sum(p.allocs for p in pools) == allocs
+
+def test_per_frame_temporary_allocation(pooled_frame):
+    frame, _ = pooled_frame
+    tracemalloc.start()
+    try:
+        peaks = []
+        for i in range(FRAMES):
+            base = tracemalloc.get_traced_memory()[0]; tracemalloc.reset_peak()
+            frame(WARMUP + FRAMES + i)
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    assert np.mean(peaks) / 1e6 < MAX_MB_PER_FRAME, f"{np.mean(peaks)/1e6:.2f} MB/frame"
+
+def test_get_reuses_capacity_for_smaller_shapes():
+    pool = FramePool()
+    a = pool.get("x", (100, 100, 3))
+    b = pool.get("x", (50, 80, 3))
+    assert pool.allocs == 1 and np.shares_memory(a, b) and b.flags.c_contiguous
+    pool.get("x", (200, 200, 3))
+    assert pool.allocs == 2
+    r = [pool.ring("r", (4, 4), n=3) for _ in range(4)]
+    assert np.shares_memory(r[0], r[3]) and not np.shares_memory(r[0], r[1])
@@ -0,0 +1,78 @@
+"""FSRMonitor.poll + FakeADC를 가상 시계로 구동: 눌림/뗌 판정 시각이 정확히 예상대로인지, 잡음에 떨림이 없는지,
+스케줄링 예산을 넘은 샘플/뗌 판정이 집계되는지. 512 SPS, 디바운스 10샘플이라 시각이 모두 2진수로 정확"""
+import pytest
+from sensors.fsr import FSRMonitor, FakeADC
+
+RATE = 512
+I = 1.0 / RATE                  # 샘플 주기
+DEBOUNCE = 10 * I
+
+class VirtualTime:
+    """now()/sleep(). late[n] = n번째 sleep을 그만큼 더 늦게 깨어남"""
+    def __init__(self): self.t, self.n, self.late = 0.0, 0, {}
+    def now(self): return self.t
+    def sleep(self, dt):
+        self.n += 1; self.t += dt + self.late.get(self.n, 0.0)
+
+def make(steps, noise=0.0, hysteresis=200, debounce=DEBOUNCE, initial=300, seed=0):
+    vt = VirtualTime()
+    adc = FakeADC(data_rate=RATE, noise=noise, seed=seed, clock_fn=vt.now, sleep_fn=vt.sleep)
+    adc.timeline(steps, initial)
+    mon = FSRMonitor(chan=adc, data_rate=RATE, threshold=2000, hysteresis=hysteresis, debounce=debounce,
+                     clock_fn=vt.now, sleep_fn=vt.sleep)
+    events = []
+    mon.on_change = lambda pressed, ts: events.append((pressed, ts))
+    return mon, vt, events
+
+def run_until(mon, vt, t_end):
+    while vt.t < t_end: mon.poll()
+
+def test_exact_press_and_release_times():
+    # 100.5번째 샘플 시각에 밟고 300.5에서 뗌 → 다음 샘플(101, 301)이 첫 후보, 10샘플 뒤 판정
+    mon, vt, events = make([(100.5 * I, 12000), (300.5 * I, 300)])
+    run_until(mon, vt, 400 * I)
+    assert events == [(True, 111 * I), (False, 311 * I)]
+    assert list(mon.detector.release_latency) == [DEBOUNCE]
+    assert 311 * I - 300.5 * I <= mon.nominal_release_latency
+    assert mon.samples_late == 0 and mon.release_overruns == 0 and mon.worst_late == 0.0
+
+def test_nominal_bound_is_tight():
+    # 뗌이 샘플 직후(변환 경계 직후) → 첫 후보 샘플까지 거의 한 주기: 최악 경우가 공칭 상한과 같음
+    mon, vt, events = make([(0, 12000), (200 * I + 1e-9, 300)])
+    run_until(mon, vt, 300 * I)
+    assert events[-1] == (False, 211 * I)
+    assert 211 * I - 200 * I == pytest.approx(mon.nominal_release_latency - I, abs=1e-12)
+    assert mon.max_release_latency == mon.nominal_release_latency + mon.sched_budget
+
+def test_no_chatter_under_noise_with_exact_release_latency():
+    # 밟은 값 2080 ± 80: 눌림 임계값 2000을 수시로 넘나들지만 뗌 임계값 1800 아래로는 안 내려감
+    steps = []
+    for k in range(5):
+        steps += [((1000 * k + 100.5) * I, 2080), ((1000 * k + 600.5) * I, 1500)]
+    mon, vt, events = make(steps, noise=80, initial=1500)
+    run_until(mon, vt, 5000 * I)
+    assert [p for p, _ in events] == [True, False] * 5
+    releases = [ts for p, ts in events if not p]
+    assert releases == [(1000 * k + 611) * I for k in range(5)]      # 뗌 쪽은 잡음이 있어도 정확히 10샘플
+    assert mon.release_overruns == 0
+
+    # 같은 신호를 히스테리시스/디바운스 없이 → 떨림 (잡음이 실제로 판정에 영향을 주는 조건임을 확인)
+    raw_mon, raw_vt, raw_events = make(steps, noise=80, initial=1500, hysteresis=0, debounce=0.0)
+    run_until(raw_mon, raw_vt, 5000 * I)
+    assert len(raw_events) > 2 * 5
+
+def test_late_sample_within_budget_does_not_count():
+    mon, vt, events = make([(0, 12000), (200.5 * I, 300)])
+    vt.late = {205: 2 * I}                                  # 약 3.9 ms < 5 ms 예산
+    run_until(mon, vt, 300 * I)
+    assert mon.samples_late == 0 and mon.release_overruns == 0
+    assert mon.worst_late == pytest.approx(2 * I)
+
+def test_overrun_reported_when_deciding_sample_is_late():
+    mon, vt, events = make([(0, 12000), (200.5 * I, 300)])
+    vt.late = {211: 6 * I}                                  # 판정할 샘플이 약 11.7 ms 늦게 깨어남
+    run_until(mon, vt, 300 * I)
+    assert events[-1] == (False, 217 * I)                   # 201에서 시작 → 16샘플 뒤
+    assert mon.samples_late == 1 and mon.release_overruns == 1
+    stats = mon.latency_stats()
+    assert stats["release_overruns"] == 1 and stats["max"] == pytest.approx(16 * I * 1e3)
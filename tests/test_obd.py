@@ -0,0 +1,87 @@
+"""ELM327 응답 파싱 + FakeELM327로 초기화(지원 PID 비트맵, 스로틀 대체, 멀티 PID 확인)"""
+import pytest
+from sensors.obd_client import (OBDClient, FakeELM327, PID_RPM, PID_SPEED, PID_THROTTLE, PID_ACCEL_D,
+                                MAX_PIDS_PER_REQUEST)
+
+class RecordingELM(FakeELM327):
+    def __init__(self, **kw):
+        super().__init__(baudrate=10_000_000, latency=0.0, **kw)
+        self.commands = []
+    def write(self, data):
+        self.commands.append(data.decode("ascii").strip()); return super().write(data)
+
+def init_client(**kw):
+    ser = RecordingELM(**kw)
+    client = OBDClient(ser=ser)
+    client._init_elm()
+    return client, ser
+
+# ── _payload
+def test_payload_single_line_and_searching():
+    assert OBDClient._payload(["SEARCHING...", "410C1AF8"]) == bytes.fromhex("410C1AF8")
+
+def test_payload_isotp_multiframe():
+    lines = ["00A", "0:410C1AF80D3C", "1:49801100000000"]      # 길이 줄 + 0:/1: (마지막 프레임 패딩)
+    data = OBDClient._payload(lines)
+    assert data[:10] == bytes.fromhex("410C1AF80D3C49801100")
+
+@pytest.mark.parametrize("lines", [["NODATA"], ["?"], ["SEARCHING...", "UNABLETOCONNECT"], ["CANERROR"], []])
+def test_payload_error_replies(lines):
+    assert OBDClient._payload(lines) is None
+
+# ── _parse_mode01
+def test_parse_mode01_mixed_widths():
+    data = bytes([0x41, 0x0C, 0x1A, 0xF8, 0x0D, 0x3C, 0x49, 0x80])
+    got = OBDClient._parse_mode01(data, {PID_RPM, PID_SPEED, PID_ACCEL_D})
+    assert got[PID_RPM] == 0x1AF8 / 4.0
+    assert got[PID_SPEED] == 60.0
+    assert got[PID_ACCEL_D] == pytest.approx(0x80 * 100 / 255)
+
+def test_parse_mode01_multiple_responses_and_truncation():
+    data = bytes([0x41, 0x0D, 0x10, 0x41, 0x0C, 0x0F, 0xA0])   # ECU 두 개의 응답이 이어짐
+    assert OBDClient._parse_mode01(data, {PID_RPM, PID_SPEED}) == {PID_SPEED: 16.0, PID_RPM: 1000.0}
+    assert OBDClient._parse_mode01(bytes([0x41, 0x0D, 0x10, 0x0C, 0x0F]), {PID_RPM, PID_SPEED}) == {PID_SPEED: 16.0}
+
+def test_parse_mode01_ignores_unrequested_pid():
+    assert OBDClient._parse_mode01(bytes([0x41, 0x0D, 0x10]), {PID_RPM}) == {}
+
+# ── 지원 PID 비트맵 (0100 → 0120 → 0140)
+def test_supported_bitmap_walk_all_ranges():
+    client, ser = init_client(supported=(PID_RPM, PID_SPEED, PID_THROTTLE, 0x2F, PID_ACCEL_D))
+    # 0x20/0x40 비트는 다음 범위 지원 표시
+    assert client.supported == {PID_RPM, PID_SPEED, PID_THROTTLE, 0x20, 0x2F, 0x40, PID_ACCEL_D}
+    assert [c for c in ser.commands if c in ("0100", "0120", "0140")] == ["0100", "0120", "0140"]
+
+def test_supported_bitmap_walk_stops_without_next_range_bit():
+    client, ser = init_client(supported=(PID_RPM, PID_SPEED, PID_THROTTLE))
+    assert client.supported == {PID_RPM, PID_SPEED, PID_THROTTLE}
+    assert [c for c in ser.commands if c in ("0100", "0120", "0140")] == ["0100"]
+
+# ── 가속 페달 PID 대체 / 단일 PID 요청
+def test_throttle_fallback_when_accel_pid_unsupported():
+    client, _ = init_client(supported=(PID_RPM, PID_SPEED, PID_THROTTLE))
+    assert PID_THROTTLE in client._pids and PID_ACCEL_D not in client._pids
+    assert client._pids[PID_THROTTLE].max_hz == client.rates[PID_ACCEL_D][1]
+    while client.poll_once(): pass
+    assert client.get_accel_pos() is not None and client.get(PID_ACCEL_D) == (None, None)
+
+def test_accel_pid_used_when_supported():
+    client, _ = init_client()
+    assert PID_ACCEL_D in client._pids and PID_THROTTLE not in client._pids
+    assert client.multi_pid
+
+def test_single_pid_fallback_without_multi_pid():
+    client, ser = init_client(multi_pid=False)
+    assert not client.multi_pid
+    n = len(ser.commands)
+    assert client.poll_once() == 1
+    req = ser.commands[n:]
+    assert len(req) == 1 and len(req[0]) == 4              # "01XX" 하나, 응답 개수 접미사 없음
+    assert client.responses == 1
+
+def test_multi_pid_batches_due_pids():
+    client, ser = init_client()
+    n = len(ser.commands)
+    assert client.poll_once() == min(len(client._pids), MAX_PIDS_PER_REQUEST)
+    assert len(ser.commands) == n + 1
+    assert client.get_rpm() is not None and client.get_speed() is not None
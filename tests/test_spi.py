@@ -0,0 +1,80 @@
+"""SpiLink → FPGA 소프트웨어 모델/기록기가 실제로 받는 프레임: tick마다 source 1개 (밀려도 복제 없음),
+submit()으로 넣은 프레임은 순서대로 같은 전송에, 응답 워드는 전송한 프레임당 1개"""
+import time, threading
+from sensors.spi import SpiLink
+from sensors.fpga_model import PMPDModel, SimulatedSpiDev
+
+class LoggingModel(PMPDModel):
+    """FPGA가 SPI로 받은 입력 (set_inputs 호출) 기록"""
+    def __init__(self):
+        super().__init__(); self.received = []
+    def set_inputs(self, pedal, expression, bpm, rr):
+        self.received.append((pedal, expression, bpm, rr)); super().set_inputs(pedal, expression, bpm, rr)
+
+class LoggingSpiDev(SimulatedSpiDev):
+    def __init__(self, model):
+        super().__init__(model); self.transfers = []
+    def xfer2(self, tx):
+        n = len(self.model.received); rx = super().xfer2(tx)
+        self.transfers.append(self.model.received[n:]); return rx
+
+class Recorder:
+    def __init__(self): self.words = []
+    def spi_rx(self, word, ts=None): self.words.append(word)
+
+def make_link(source, period=0.02):
+    model = LoggingModel()
+    dev, rec = LoggingSpiDev(model), Recorder()
+    return SpiLink(dev, source, threading.Event(), period=period, recorder=rec), dev, rec
+
+def test_each_tick_sends_latest_source_frame_once():
+    vals = iter([(10, 0, 70, 15), (20, 0, 71, 15), (30, 0, 72, 15)])
+    link, dev, rec = make_link(lambda: next(vals))
+    for _ in range(3): link.step()
+    assert dev.transfers == [[(10, 0, 70, 15)], [(20, 0, 71, 15)], [(30, 0, 72, 15)]]
+    assert len(rec.words) == 3 and link.late_ticks == 0
+
+def test_late_tick_sends_one_frame_and_counts_missed_periods():
+    period, calls = 0.02, []
+    def source():
+        calls.append(1)
+        if len(calls) == 1: time.sleep(3.5 * period)   # 첫 tick에서 막힘 → 다음 tick은 약 2.5주기 늦음
+        return (len(calls), 0, 70, 15)
+    link, dev, rec = make_link(source, period)
+    link.step(); link.step()
+    assert dev.transfers == [[(1, 0, 70, 15)], [(2, 0, 70, 15)]]      # 같은 값 복제 없음
+    assert len(rec.words) == 2 and rec.words[-1] == link.latest.word     # 기록도 전송한 프레임당 워드 1개
+    assert 3 <= link.late_ticks <= 5                                    # 늦은 tick 1 + 통째로 놓친 주기 2 (지터 여유)
+
+def test_submitted_frames_go_out_in_order_with_source_frame():
+    link, dev, rec = make_link(lambda: (99, 0, 70, 15))
+    link.submit(1, 0, 60, 12); link.submit(2, 0, 61, 12)
+    link.step()
+    assert dev.transfers == [[(1, 0, 60, 12), (2, 0, 61, 12), (99, 0, 70, 15)]]
+    assert len(rec.words) == 3 and link.transfers == 1
+    assert dev.model.pedal_in == 99                                     # PMPD는 마지막 입력을 반영
+    link.step()
+    assert dev.transfers[-1] == [(99, 0, 70, 15)]                       # 큐는 비워짐
+
+def test_replay_backend_answers_with_recorded_words(tmp_path):
+    from sensors.backends import BackendContext, parse_backends, create
+    from common.session import SessionRecorder
+    rec_dir = str(tmp_path / "sess")
+    sess = SessionRecorder(rec_dir, mode="landmarks")
+    sess.spi_rx(0x0048_0046_4643_F0A9, ts=sess.t0); sess.spi_rx(0x0050_0048_4643_F0A8, ts=sess.t0 + 0.01)
+    sess.close()
+
+    assert parse_backends(["spi=replay"])["spi"] == "replay"
+    ctx = BackendContext(rec_dir); ctx.start -= 1.0          # 기록된 워드는 모두 이미 재생 시각이 지남
+    dev, stop = create("spi", "replay", ctx), threading.Event()
+    player = ctx.player(stop)
+    link = SpiLink(dev, lambda: (10, 0, 70, 15), stop, period=0.01, recorder=Recorder())
+    link.step()
+    assert link.latest.word == 0                              # 재생 전: 대기 상태 워드
+    player.step()
+    link.step()
+    assert link.latest.word == 0x0048_0046_4643_F0A9 and link.flags["pm"] == 1
+    player.step()
+    link.submit(1, 0, 60, 12); link.step()
+    assert link.recorder.words[-2:] == [0x0050_0048_4643_F0A8] * 2   # 전송한 프레임마다 마지막 재생 워드
+    assert link.flags["pm"] == 0
@@ -1,13 +1,93 @@
-import cv2 as cv
-from .utils import put_korean_center_text
+import cv2 as cv, numpy as np
+from collections import OrderedDict
+from . import utils
+from .utils import _text_tile, _text_size
+
+class AlertCompositor:
+    """반투명 경고 화면 + 중앙 문구 합성 (img에 직접).
+    틴트: 색/알파별 3x4 행렬을 캐시 → cv.transform 한 번으로 img*(1-alpha) + color*alpha (복사본/단색 레이어 없음)
+    문구: 메시지별 스프라이트(BGR 타일 + 배경/글자 가중치)를 캐시 → 글자 영역만 cv.blendLinear 한 번
+    mode="banner"면 문구 주변 가로 띠(화면 높이 × banner_frac)만 틴트하고 나머지 화면은 그대로 둠"""
+    MODES = ("full", "banner")
+
+    def __init__(self, mode="full", banner_frac=0.2, max_sprites=32):
+        if mode not in self.MODES: raise ValueError(f"unknown overlay mode '{mode}' (one of {', '.join(self.MODES)})")
+        self.mode, self.banner_frac = mode, float(banner_frac)
+        self.max_sprites = int(max_sprites)
+        self._tints = {}
+        self._sprites = OrderedDict()   # 캘리브레이션 카운트다운처럼 바뀌는 문구가 있어 LRU
+
+    def _tint(self, bgr_color, alpha):
+        key = (tuple(bgr_color), float(alpha))
+        m = self._tints.get(key)
+        if m is None:
+            m = np.zeros((3, 4), np.float32)
+            m[:, :3] = np.eye(3) * (1.0 - alpha)
+            m[:, 3] = np.asarray(bgr_color, np.float32) * alpha
+            self._tints[key] = m
+        return m
+
+    def _sprite(self, text, font_path, font_size, stroke):
+        """(ox, oy, 글자 폭, 높이, BGR 타일, 배경 가중치, 글자 가중치). 흰 글자 + 검은 외곽선"""
+        key = (text, font_path, font_size, stroke)
+        sp = self._sprites.get(key)
+        if sp is not None:
+            self._sprites.move_to_end(key); return sp
+        ox, oy, tile = _text_tile(text, font_path, font_size, (255, 255, 255), stroke, (0, 0, 0))
+        tw, th = _text_size(text, font_path, font_size)
+        fg = tile[:, :, 3].astype(np.float32) / 255.0
+        sp = self._sprites[key] = (ox, oy, tw, th, np.ascontiguousarray(tile[:, :, 2::-1]), 1.0 - fg, fg)
+        if len(self._sprites) > self.max_sprites: self._sprites.popitem(last=False)
+        return sp
+
+    def draw(self, img, message, bgr_color, alpha=0.55, font_scale=1.6, thickness=4, font_path=None):
+        H, W = img.shape[:2]
+        font_size = max(24, int(36 * (H / 768.0) * font_scale))
+        stroke = max(2, int(thickness * 0.8))
+        ox, oy, tw, th, bgr, w_bg, w_fg = self._sprite(message, font_path or utils.KOREAN_FONT_PATH, font_size, stroke)
+        sh, sw = bgr.shape[:2]
+        x, y = (W - tw) // 2 + ox, (H - th) // 2 + oy      # 스프라이트 좌상단 (put_korean_center_text와 같은 위치)
+
+        # 틴트 (배너는 문구를 덮는 가운데 띠만)
+        if self.mode == "banner":
+            bh = int(H * self.banner_frac)
+            y0 = max(0, min((H - bh) // 2, y - stroke)); y1 = min(H, max(y0 + bh, y + sh + stroke))
+            region = img[y0:y1]
+        else:
+            region = img
+        cv.transform(region, self._tint(bgr_color, alpha), dst=region)
+
+        # 문구 (화면 밖으로 나가는 부분은 잘라냄)
+        cx0, cy0, cx1, cy1 = max(0, x), max(0, y), min(W, x + sw), min(H, y + sh)
+        if cx0 < cx1 and cy0 < cy1:
+            sl = (slice(cy0 - y, cy1 - y), slice(cx0 - x, cx1 - x))
+            roi = img[cy0:cy1, cx0:cx1]
+            cv.blendLinear(roi, bgr[sl], w_bg[sl], w_fg[sl], dst=roi)
+        return img
+
+_ALERTS = AlertCompositor()
 
 def draw_fullscreen_overlay_center_text(img, message, bgr_color, alpha=0.55, font_scale=1.6, thickness=4):
-    """화면 전체 반투명 + 중앙 한국어 문구"""
-    h, w = img.shape[:2]
-    overlay = img.copy()
-    cv.rectangle(overlay, (0, 0), (w, h), bgr_color, -1)
-    cv.addWeighted(img, 1 - alpha, overlay, alpha, 0, img)
-    base = int(36 * (h / 768.0) * font_scale)
-    font_size = max(24, base)
-    stroke = max(2, int(thickness * 0.8))
-    return put_korean_center_text(img, message, font_size=font_size, stroke=stroke)
+    """화면 전체 반투명 + 중앙 한국어 문구. img에 직접 그림 (AlertCompositor 전체 화면 모드)"""
+    return _ALERTS.draw(img, message, bgr_color, alpha, font_scale, thickness)
+
+def draw_hud(img, lines, x=10, y=10, font_scale=0.45, line_h=16, dim=0.4):
+    """좌상단에 배경을 어둡게 한 상자 + 텍스트 줄 (프로파일링 HUD). 줄 안의 '\t'는 열 구분. img에 직접 그림"""
+    if not lines: return img
+    font = cv.FONT_HERSHEY_SIMPLEX
+    rows = [s.split("\t") for s in lines]
+    ncol = max(len(r) for r in rows)
+    col_w = [max((cv.getTextSize(r[c], font, font_scale, 1)[0][0] for r in rows if len(r) > c), default=0) + 10
+             for c in range(ncol)]
+    col_x = np.cumsum([x + 6] + col_w[:-1])
+    H, W = img.shape[:2]
+    full = max(cv.getTextSize(s.replace("\t", "  "), font, font_scale, 1)[0][0] for s in lines)
+    roi = img[y:min(H, y + line_h * len(rows) + 8), x:min(W, x + max(sum(col_w), full) + 12)]
+    cv.convertScaleAbs(roi, roi, alpha=dim)     # 상자 영역만 어둡게
+    for i, r in enumerate(rows):
+        yy = y + line_h * (i + 1)
+        if len(r) == 1:       # 열 없는 줄은 상자 폭 전체 사용
+            cv.putText(img, r[0], (x + 6, yy), font, font_scale, (0, 255, 0), 1, cv.LINE_AA); continue
+        for c, s in enumerate(r):
+            cv.putText(img, s, (int(col_x[c]), yy), font, font_scale, (0, 255, 0), 1, cv.LINE_AA)
+    return img
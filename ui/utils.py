@@ -1,31 +1,85 @@
-import cv2 as cv, numpy as np, math
+import os, cv2 as cv, numpy as np, math
+from collections import OrderedDict
+from functools import lru_cache
+from common.timeseries import minmax_decimate
+from common.profiling import span
 from PIL import ImageFont, ImageDraw, Image
 
-# 한국어 폰트 경로 (환경에 맞게 교체-현재 Jetson 환경)
-KOREAN_FONT_PATH = "/home/simson/gyeonglee/dashboard/nanum-all_new/Nanum/NanumGothic/NanumFontSetup_TTF_GOTHIC/NanumGothicExtraBold.ttf"
+# 한국어 폰트 경로 (환경에 맞게 교체-현재 Jetson 환경, 환경변수 KOREAN_FONT_PATH로 덮어쓰기 가능)
+KOREAN_FONT_PATH = os.environ.get("KOREAN_FONT_PATH",
+    "/home/simson/gyeonglee/dashboard/nanum-all_new/Nanum/NanumGothic/NanumFontSetup_TTF_GOTHIC/NanumGothicExtraBold.ttf")
 
-def put_korean_text(img, text, x, y, font_path=KOREAN_FONT_PATH, color=(255,255,255), font_size=28, stroke=0, stroke_color=(0,0,0)):
-    img_pil = Image.fromarray(cv.cvtColor(img, cv.COLOR_BGR2RGB))
-    draw = ImageDraw.Draw(img_pil)
-    font = ImageFont.truetype(font_path, int(font_size))
+_SPRITE_CACHE_SIZE = 256
+_sprite_cache = OrderedDict()   # (text, font, size, color, stroke, stroke_color) → sprite (LRU)
+
+@lru_cache(maxsize=32)
+def _get_font(font_path, font_size):
+    return ImageFont.truetype(font_path, int(font_size))
+
+def _text_tile(text, font_path, font_size, color, stroke, stroke_color):
+    """텍스트 래스터화 → (ox, oy, RGBA uint8). (ox, oy)는 그리기 원점 기준 오프셋"""
+    font = _get_font(font_path, font_size)
+    l, t, r, b = ImageDraw.Draw(Image.new("L", (1, 1))).textbbox((0, 0), text, font=font, stroke_width=int(stroke))
+    tile = Image.new("RGBA", (max(1, r-l), max(1, b-t)), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(tile)
     if stroke > 0:
-        draw.text((int(x), int(y)), text, font=font, fill=stroke_color, stroke_width=int(stroke), stroke_fill=stroke_color)
-    draw.text((int(x), int(y)), text, font=font, fill=tuple(color), stroke_width=int(stroke), stroke_fill=stroke_color)
-    return cv.cvtColor(np.array(img_pil), cv.COLOR_RGB2BGR)
+        draw.text((-l, -t), text, font=font, fill=tuple(stroke_color), stroke_width=int(stroke), stroke_fill=tuple(stroke_color))
+    draw.text((-l, -t), text, font=font, fill=tuple(color), stroke_width=int(stroke), stroke_fill=tuple(stroke_color))
+    return l, t, np.asarray(tile)
+
+def _text_sprite(text, font_path, font_size, color, stroke, stroke_color):
+    """텍스트를 한 번만 래스터화: (ox, oy, premultiplied BGR, 1-alpha). (ox, oy)는 그리기 원점 기준 오프셋"""
+    key = (text, font_path, int(font_size), tuple(color), int(stroke), tuple(stroke_color))
+    sprite = _sprite_cache.get(key)
+    if sprite is not None:
+        _sprite_cache.move_to_end(key); return sprite
+    l, t, tile = _text_tile(text, font_path, font_size, color, stroke, stroke_color)
+    rgba = tile.astype(np.float32)
+    alpha = rgba[:, :, 3:4] / 255.0
+    premul = np.ascontiguousarray(rgba[:, :, 2::-1] * alpha)   # RGB → BGR, 알파 곱해 둠
+    inv_alpha = 1.0 - alpha
+    sprite = (l, t, premul, inv_alpha)
+    _sprite_cache[key] = sprite
+    if len(_sprite_cache) > _SPRITE_CACHE_SIZE: _sprite_cache.popitem(last=False)
+    return sprite
+
+@lru_cache(maxsize=256)
+def _text_size(text, font_path, font_size):
+    font = _get_font(font_path, font_size)
+    return ImageDraw.Draw(Image.new("L", (1, 1))).textbbox((0, 0), text, font=font)[2:]
+
+def _blend_sprite(img, sprite, x, y):
+    """스프라이트가 덮는 ROI에만 알파 블렌딩 (in-place)"""
+    ox, oy, premul, inv_alpha = sprite
+    H, W = img.shape[:2]; sh, sw = premul.shape[:2]
+    x0, y0 = int(x) + ox, int(y) + oy
+    cx0, cy0 = max(0, x0), max(0, y0)
+    cx1, cy1 = min(W, x0 + sw), min(H, y0 + sh)
+    if cx0 >= cx1 or cy0 >= cy1: return img
+    sx, sy = cx0 - x0, cy0 - y0
+    roi = img[cy0:cy1, cx0:cx1]
+    out = roi * inv_alpha[sy:sy+cy1-cy0, sx:sx+cx1-cx0] + premul[sy:sy+cy1-cy0, sx:sx+cx1-cx0]
+    np.add(out, 0.5, out=out)
+    roi[...] = out.astype(np.uint8)
+    return img
+
+def put_korean_text(img, text, x, y, font_path=KOREAN_FONT_PATH, color=(255,255,255), font_size=28, stroke=0, stroke_color=(0,0,0)):
+    """(x, y)에 한국어 텍스트 (color는 RGB). img에 직접 그리고 img를 반환"""
+    with span("ui.korean_text"):
+        sprite = _text_sprite(text, font_path, font_size, color, stroke, stroke_color)
+        return _blend_sprite(img, sprite, x, y)
 
 def put_korean_center_text(img, text, font_path=KOREAN_FONT_PATH, color=(255,255,255), font_size=36, stroke=3, stroke_color=(0,0,0)):
+    """화면 중앙에 한국어 텍스트. img에 직접 그리고 img를 반환"""
     h, w = img.shape[:2]
-    img_pil = Image.fromarray(cv.cvtColor(img, cv.COLOR_BGR2RGB))
-    draw = ImageDraw.Draw(img_pil)
-    font = ImageFont.truetype(font_path, int(font_size))
-    tw, th = draw.textbbox((0,0), text, font=font)[2:]
+    tw, th = _text_size(text, font_path, font_size)
     x = (w - tw) // 2; y = (h - th) // 2
-    if stroke > 0:
-        draw.text((x, y), text, font=font, fill=stroke_color, stroke_width=int(stroke), stroke_fill=stroke_color)
-    draw.text((x, y), text, font=font, fill=tuple(color), stroke_width=int(stroke), stroke_fill=stroke_color)
-    return cv.cvtColor(np.array(img_pil), cv.COLOR_RGB2BGR)
+    with span("ui.korean_text"):
+        sprite = _text_sprite(text, font_path, font_size, color, stroke, stroke_color)
+        return _blend_sprite(img, sprite, x, y)
 
-def _fit_into_box(dst, rect, src):
+def _fit_into_box(dst, rect, src, pool=None):
+    """src를 비율 유지로 rect 중앙에 맞춰 dst에 직접 축소 (중간 배열 없음). GRAY8은 pool 버퍼에서 BGR로 변환"""
     x, y, w, h = rect
     if src is None or w<=0 or h<=0: return
     Hs, Ws = src.shape[:2]
@@ -33,11 +87,16 @@ def _fit_into_box(dst, rect, src):
     s = min(w/float(Ws), h/float(Hs))
     nw, nh = int(Ws*s), int(Hs*s)
     if nw<=0 or nh<=0: return
-    resized = cv.resize(src, (nw, nh))
     ox = x + (w-nw)//2; oy = y + (h-nh)//2
-    dst[oy:oy+nh, ox:ox+nw] = resized
+    roi = dst[oy:oy+nh, ox:ox+nw]
+    if src.ndim == 2:      # GRAY8 캡처
+        tmp = pool.get("fit.gray", (nh, nw)) if pool is not None else None
+        cv.cvtColor(cv.resize(src, (nw, nh), dst=tmp), cv.COLOR_GRAY2BGR, dst=roi)
+    else:
+        cv.resize(src, (nw, nh), dst=roi)
 
-def _semi_gauge(canvas, cx, cy, r, value, vmax):
+def _semi_gauge_face(canvas, cx, cy, r):
+    """게이지 정적 부분 (호, 눈금)"""
     cv.ellipse(canvas, (cx, cy), (r, r), 0, 180, 360, (128,128,128), 4, cv.LINE_AA)
     cv.ellipse(canvas, (cx, cy), (r-10, r-10), 0, 180, 360, (128,128,128), 2, cv.LINE_AA)
     num_ticks = 9
@@ -46,6 +105,9 @@ def _semi_gauge(canvas, cx, cy, r, value, vmax):
         x1 = int(cx + (r-5)*math.cos(ang)); y1 = int(cy - (r-5)*math.sin(ang))
         x2 = int(cx + (r-20)*math.cos(ang)); y2 = int(cy - (r-20)*math.sin(ang))
         cv.line(canvas, (x1, y1), (x2, y2), (255,255,255), 3, cv.LINE_AA)
+
+def _semi_gauge_needle(canvas, cx, cy, r, value, vmax):
+    """게이지 동적 부분 (바늘, 중심 캡)"""
     v = 0.0 if vmax<=0 else max(0.0, min(1.0, float(value)/float(vmax)))
     ang = math.radians(180 - 180 * v)
     x2 = int(cx + (r-25)*math.cos(ang)); y2 = int(cy - (r-25)*math.sin(ang))
@@ -53,30 +115,49 @@ def _semi_gauge(canvas, cx, cy, r, value, vmax):
     cv.line(canvas, (cx, cy), (x2, y2), color, 4, cv.LINE_AA)
     cv.circle(canvas, (cx, cy), 8, (255,255,255), -1, cv.LINE_AA); cv.circle(canvas, (cx, cy), 5, (0,0,0), -1, cv.LINE_AA)
 
+def _semi_gauge(canvas, cx, cy, r, value, vmax):
+    _semi_gauge_face(canvas, cx, cy, r)
+    _semi_gauge_needle(canvas, cx, cy, r, value, vmax)
+
 def _semi_speed_gauge(canvas, cx, cy, r, value, vmax):
     _semi_gauge(canvas, cx, cy, r, value, vmax)
 
-def _vbar(canvas, x, y, w, h, percent, fill_color):
+def _vbar_frame(canvas, x, y, w, h):
     cv.rectangle(canvas, (x, y), (x+w, y+h), (255,255,0), 3)
+
+def _vbar_fill(canvas, x, y, w, h, percent, fill_color):
     p = max(0.0, min(100.0, float(percent))) / 100.0
     fh = int(h * p)
     if fh>0:
         cv.rectangle(canvas, (x+3, y+h-fh+3), (x+w-3, y+h-3), fill_color, -1, cv.LINE_AA)
 
-def _scroll_plot(canvas, x, y, w, h, hist, color, ymin, ymax, title, fill_ratio=0.8):
+def _vbar(canvas, x, y, w, h, percent, fill_color):
+    _vbar_frame(canvas, x, y, w, h)
+    _vbar_fill(canvas, x, y, w, h, percent, fill_color)
+
+def _scroll_plot_bg(canvas, x, y, w, h, title=""):
     cv.rectangle(canvas, (x, y), (x+w, y+h), (255,255,255), -1)
     if title:
         cv.putText(canvas, title, (x+10, y+25), cv.FONT_HERSHEY_SIMPLEX, 0.6, (0,0,0), 2, cv.LINE_AA)
-    if not hist or len(hist) < 2: return
+
+def _scroll_plot_line(canvas, x, y, w, h, hist, color, ymin, ymax, fill_ratio=0.8):
+    """hist: 리스트 또는 NumPy 배열(시계열 버퍼 뷰). 샘플이 픽셀 열보다 많으면 열마다 min/max 구간으로 그림"""
+    if hist is None or len(hist) < 2: return
     draw_w = max(2, int(w * float(fill_ratio)))
-    vals = hist[-w:]
-    def mapy(v): v = min(max(v, ymin), ymax); return int(y + h - (v - ymin) / (ymax - ymin + 1e-9) * h)
-    pts = []
+    vals = np.asarray(hist, dtype=np.float64)
+    vals = vals[np.isfinite(vals)]
     n = len(vals)
-    for i, v in enumerate(vals):
-        if v is None: continue
-        xi = x + int(i * (draw_w - 1) / (n - 1)) if n > 1 else x
-        pts.append((xi, mapy(v)))
-    if len(pts) >= 2:
-        import numpy as np
-        cv.polylines(canvas, [np.array(pts, dtype=np.int32)], False, color, 2, cv.LINE_AA)
+    if n < 2: return
+    if n > draw_w:
+        lo, hi = minmax_decimate(vals, draw_w)
+        xs = np.repeat(x + np.arange(draw_w), 2)
+        vs = np.empty(2 * draw_w); vs[0::2], vs[1::2] = lo, hi
+    else:
+        xs = x + (np.arange(n) * (draw_w - 1) / (n - 1)).astype(np.int32)
+        vs = vals
+    ys = (y + h - (np.clip(vs, ymin, ymax) - ymin) / (ymax - ymin + 1e-9) * h).astype(np.int32)
+    cv.polylines(canvas, [np.stack([xs, ys], axis=1).astype(np.int32)], False, color, 2, cv.LINE_AA)
+
+def _scroll_plot(canvas, x, y, w, h, hist, color, ymin, ymax, title, fill_ratio=0.8):
+    _scroll_plot_bg(canvas, x, y, w, h, title)
+    _scroll_plot_line(canvas, x, y, w, h, hist, color, ymin, ymax, fill_ratio)
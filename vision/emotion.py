@@ -1,17 +1,25 @@
 import csv
-EMO_AVAILABLE = False
+from .landmarks import to_pixels, normalize_relative, emotion_features
+EMO_AVAILABLE = None      # 첫 EmotionModule 생성 때 결정 (TFLite 모델 import는 그때 한 번)
 EMO_LABELS = ["Neutral"]
-try:
-    from model import KeyPointClassifier
-    EMO_AVAILABLE = True
-except Exception:
-    EMO_AVAILABLE = False
+
+def _load_classifier_class():
+    global EMO_AVAILABLE
+    try:
+        from model import KeyPointClassifier
+        EMO_AVAILABLE = True
+        return KeyPointClassifier.KeyPointClassifier if hasattr(KeyPointClassifier, "KeyPointClassifier") else KeyPointClassifier
+    except Exception:
+        EMO_AVAILABLE = False
+        return None
 
 class EmotionModule:
-    def __init__(self):
-        self.enabled = EMO_AVAILABLE
+    def __init__(self, num_threads=1):
+        cls = _load_classifier_class() if EMO_AVAILABLE is not False else None
+        self.enabled = cls is not None
+        self.num_threads = int(num_threads)
         if self.enabled:
-            self.classifier = KeyPointClassifier.KeyPointClassifier() if hasattr(KeyPointClassifier, "KeyPointClassifier") else KeyPointClassifier()
+            self.classifier = cls(num_threads=self.num_threads)
         try:
             with open('model/keypoint_classifier/keypoint_classifier_label.csv', encoding='utf-8-sig') as f:
                 EMO_LABELS[:] = [row[0] for row in csv.reader(f)]
@@ -20,35 +28,38 @@ class EmotionModule:
 
     @staticmethod
     def calc_landmark_list(image, landmarks):
+        """(N,3) 정규화 좌표 → 이미지 안 정수 픽셀 좌표 (N,2)"""
         h, w = image.shape[:2]
-        pts = []
-        for lm in landmarks.landmark:
-            x = int(min(max(lm.x * w, 0), w - 1))
-            y = int(min(max(lm.y * h, 0), h - 1))
-            pts.append([x, y])
-        return pts
+        return to_pixels(landmarks, w, h)
 
     @staticmethod
     def preprocess(landmark_list):
-        import copy, itertools
-        tmp = copy.deepcopy(landmark_list)
-        base_x, base_y = tmp[0][0], tmp[0][1]
-        for i, p in enumerate(tmp):
-            tmp[i][0] = p[0] - base_x
-            tmp[i][1] = p[1] - base_y
-        tmp = list(itertools.chain.from_iterable(tmp))
-        maxv = max(list(map(abs, tmp))) if tmp else 1
-        if maxv == 0: maxv = 1
-        return [v / maxv for v in tmp]
+        """0번 점 기준 상대 좌표 → 평탄화 → 최대 절댓값 정규화 (float32)"""
+        return normalize_relative(landmark_list)
+
+    def _label(self, emo_id):
+        return EMO_LABELS[emo_id] if 0 <= emo_id < len(EMO_LABELS) else "Neutral"
 
     def infer(self, frame_bgr, face_landmarks):
+        """face_landmarks: (N,3) 정규화 좌표 배열 또는 None"""
         if not self.enabled or face_landmarks is None:
             return "Neutral"
-        lm_list = self.calc_landmark_list(frame_bgr, face_landmarks)
-        feat = self.preprocess(lm_list)
+        labels = self.infer_batch(frame_bgr.shape[:2], [face_landmarks])
+        return labels[0]
+
+    def infer_batch(self, frame_shape, landmark_arrays):
+        """얼굴 N개(또는 버퍼링된 프레임 N개)를 invoke() 한 번으로 분류.
+        특징은 인터프리터 입력 텐서에 바로 씀. 프레임 순서대로 임계값 규칙 적용"""
+        n = len(landmark_arrays)
+        if not self.enabled or n == 0:
+            return ["Neutral"] * n
+        h, w = frame_shape[:2]
         try:
-            emo_id = self.classifier(feat)
-            if 0 <= emo_id < len(EMO_LABELS): return EMO_LABELS[emo_id]
+            npts = self.classifier.num_features // 2
+            buf = self.classifier.input_tensor(n)
+            for row, lms in zip(buf, landmark_arrays):
+                emotion_features(lms[:npts], w, h, out=row)
+            del buf, row
+            return [self._label(int(i)) for i in self.classifier.invoke()]
         except Exception:
-            pass
-        return "Neutral"
+            return ["Neutral"] * n
@@ -1,8 +1,12 @@
+import numpy as np
+from .landmarks import head_y
+
 class HeadPositionModule:
     def __init__(self):
         self.NOSE_TIP = 1
         self.FOREHEAD_CENTER = 9
         self.CHIN_CENTER = 175
+        self._head_idx = np.array([self.NOSE_TIP, self.CHIN_CENTER], dtype=np.intp)
         self.baseline_head_y = None
         self.head_tilt_threshold = 0.08
         self.calibration_frames = []
@@ -17,13 +21,12 @@ class HeadPositionModule:
 
     def _get_head_y_position(self, landmarks):
         try:
-            nose_y = landmarks[self.NOSE_TIP].y
-            chin_y = landmarks[self.CHIN_CENTER].y
-            return (nose_y + chin_y) / 2.0
+            return head_y(landmarks, self._head_idx)
         except Exception:
             return None
 
     def process(self, landmarks):
+        """landmarks: (N,3) 정규화 좌표 배열 또는 None"""
         if landmarks is None:
             return False, "No_Face"
         current_head_y = self._get_head_y_position(landmarks)
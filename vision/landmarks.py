@@ -0,0 +1,72 @@
+import numpy as np
+
+# FaceMesh(refine_landmarks=True) 랜드마크 수
+NUM_LANDMARKS = 478
+
+# EAR: 눈마다 (p1, p2, p3, p4, p5, p6)
+EYE_EAR_IDX = np.array([[362, 385, 387, 263, 373, 380],    # left
+                        [33, 160, 158, 133, 153, 144]],    # right
+                       dtype=np.intp)
+
+# 시선: (눈꼬리 2점, 눈꺼풀 위/아래, 홍채 5점) × (left, right)
+EYE_CORNER_IDX = np.array([[33, 133], [362, 263]], dtype=np.intp)
+EYE_LID_IDX    = np.array([[159, 145], [386, 374]], dtype=np.intp)
+IRIS_IDX       = np.array([[468, 469, 470, 471, 472], [473, 474, 475, 476, 477]], dtype=np.intp)
+IRIS_WEIGHTS   = np.array([3.0, 1.0, 1.0, 1.0, 1.0]) / 7.0   # 중심점 가중
+
+# 머리 높이: 코끝, 턱
+HEAD_Y_IDX = np.array([1, 175], dtype=np.intp)
+
+
+def landmarks_to_array(face_landmarks):
+    """FaceMesh NormalizedLandmarkList → 연속 (N,3) float32 정규화 좌표. 프레임당 한 번만 변환"""
+    lms = face_landmarks.landmark
+    n = len(lms)
+    flat = np.fromiter((v for lm in lms for v in (lm.x, lm.y, lm.z)), dtype=np.float32, count=n*3)
+    return flat.reshape(n, 3)
+
+def to_pixels(pts, w, h):
+    """정규화 좌표 → 이미지 안으로 자른 정수 픽셀 좌표 (helpers.denorm과 동일)"""
+    xy = pts[..., :2].astype(np.float64) * (w, h)
+    np.clip(xy, 0, (w - 1, h - 1), out=xy)
+    return xy.astype(np.int32)
+
+def eye_aspect_ratios(pts, w, h, idx=EYE_EAR_IDX):
+    """눈별 EAR (2,) = (|p2-p6| + |p3-p5|) / (2|p1-p4|)"""
+    p = to_pixels(pts[idx], w, h).astype(np.float64)       # (2,6,2)
+    d = np.hypot(*(p[:, [1, 2, 0]] - p[:, [5, 4, 3]]).transpose(2, 0, 1))   # (2,3)
+    den = 2.0 * d[:, 2]
+    ok = d[:, 2] > 1e-6
+    return np.where(ok, (d[:, 0] + d[:, 1]) / np.where(ok, den, 1.0), 0.0)
+
+def gaze_ratio(pts, corner_idx=EYE_CORNER_IDX, lid_idx=EYE_LID_IDX, iris_idx=IRIS_IDX):
+    """눈꼬리/눈꺼풀 사이 홍채 위치 비율 (gx, gy), 양눈 평균. 홍채 점이 없으면 눈 중심 좌표"""
+    p = pts.astype(np.float64)
+    corners_x = p[corner_idx, 0]               # (2,2)
+    lids_y    = p[lid_idx, 1]                  # (2,2)
+    if p.shape[0] <= iris_idx.max():
+        return float(corners_x.mean()), float(lids_y.mean())
+    iris = IRIS_WEIGHTS @ p[iris_idx, :2]      # (2,2) 눈별 (x, y)
+    lo_x, hi_x = corners_x.min(1), corners_x.max(1)
+    lo_y, hi_y = lids_y.min(1), lids_y.max(1)
+    rx = np.clip((iris[:, 0] - lo_x) / np.maximum(hi_x - lo_x, 1e-6), 0.0, 1.0)
+    ry = np.clip((iris[:, 1] - lo_y) / np.maximum(hi_y - lo_y, 1e-6), 0.0, 1.0)
+    return float(rx.mean()), float(ry.mean())
+
+def head_y(pts, idx=HEAD_Y_IDX):
+    """코끝/턱 평균 y (정규화)"""
+    return float(pts[idx, 1].astype(np.float64).mean())
+
+def normalize_relative(xy, out=None):
+    """0번 점 기준 상대 좌표 → 평탄화 → 최대 절댓값으로 정규화, (N*2,) float32.
+    out을 주면 (예: 인터프리터 입력 텐서 뷰) 그 메모리에 바로 씀"""
+    pts = np.asarray(xy).reshape(-1, 2)
+    if out is None: out = np.empty(pts.size, dtype=np.float32)
+    np.subtract(pts, pts[0], out=out.reshape(-1, 2), casting="unsafe")
+    maxv = max(float(out.max()), -float(out.min())) if out.size else 0.0
+    if maxv > 0: np.divide(out, maxv, out=out)
+    return out
+
+def emotion_features(pts, w, h, out=None):
+    """감정 분류 입력 특징 (N*2,) float32"""
+    return normalize_relative(to_pixels(pts, w, h), out)
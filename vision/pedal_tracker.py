@@ -1,50 +1,97 @@
 import numpy as np, cv2 as cv
+from common import clock
+from common.timeseries import RingSeries
+from common.framepool import FramePool
+
+class BrakePath:
+    """0%(놓음) → 100%(끝까지 밟음) 마커 궤적 폴리라인. 구간 벡터/길이를 미리 계산해 두고
+    점을 가장 가까운 구간에 정사영해 경로 길이 비율(%)을 소수점까지 구함"""
+    def __init__(self, points):
+        p = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(p) < 2: raise ValueError("brake path needs at least 2 points")
+        self.points = p
+        self.p0 = p[:-1]
+        self.d = p[1:] - p[:-1]
+        self.len2 = np.maximum(np.einsum("ij,ij->i", self.d, self.d), 1e-9)
+        seg = np.sqrt(self.len2)
+        self.total = float(seg.sum())
+        self.start = np.concatenate(([0.0], np.cumsum(seg)[:-1])) / max(self.total, 1e-9)
+        self.frac = seg / max(self.total, 1e-9)
+
+    def project(self, pt):
+        """(percent 0~100, 경로까지 거리 px)"""
+        v = np.asarray(pt, dtype=np.float64) - self.p0
+        t = np.clip(np.einsum("ij,ij->i", v, self.d) / self.len2, 0.0, 1.0)
+        e = v - t[:, None] * self.d
+        dist2 = np.einsum("ij,ij->i", e, e)
+        k = int(np.argmin(dist2))
+        return 100.0 * float(self.start[k] + t[k] * self.frac[k]), float(np.sqrt(dist2[k]))
+
 
 class PedalTracker:
-    def __init__(self, th_green=25, area_min=80, alpha=0.6, path_points=101):
+    FULL_OFFSET_DEFAULT = 50   # 끝점 캘리브레이션 전 임시 행정(px, 아래 방향)
+    CALIB_FRAMES = 10          # 캘리브레이션 점 하나에 평균할 검출 수
+    VIEW_RING = 8              # 표시용 프레임 버퍼 수: 60fps에서 약 130ms 동안 덮어쓰지 않음 (추론 결과 → 렌더까지)
+
+    def __init__(self, th_green=25, area_min=80, alpha=0.6, history=1024):
         self.TH_GREEN = th_green
         self.AREA_MIN = area_min
         self.KERNEL = np.ones((3,3), np.uint8)
         self.alpha = alpha
-        self.path_points = path_points
         self.ema_green = None
         self.roi_green = None
         self.init_green_y = None
         self.THRESH_DIFF = 10
-        self._brake_percent = 0
+        self.ROI_PAD = 40
+        self._sal_th = int(1.5 * th_green)
+        self._brake_percent = 0.0
+        self._ema_percent = None
         self.zero_pos = None
         self.full_pos = None
-        self.full_brake_path = None
+        self.mid_points = []       # 곡선 궤적용 중간 점 (0→100 순서)
+        self.brake_path = None
         self.is_calibrated = False
-
-    def find_nearest_index(self, points, current):
-        dists = [np.linalg.norm(np.array(current) - np.array(p)) for p in points]
-        return int(np.argmin(dists))
+        self.full_calibrated = False
+        self._capture = None       # (종류, 검출 좌표 목록) 캘리브레이션 수집 중
+        self.brake_series = RingSeries(history)   # (프레임 타임스탬프, 평활 전 brake %)
+        self.pool = FramePool("pedal")            # 채널/마스크/라벨/표시 버퍼 (페달 워커 스레드 전용)
 
     def find_point_by_saliency(self, frame):
-        bgr = frame.astype(np.int16)
-        B, G, R = bgr[:,:,0], bgr[:,:,1], bgr[:,:,2]
-        L = (R + G + B) // 3
-        Sg = (G - L)
-        mask_g = (Sg > self.TH_GREEN).astype(np.uint8) * 255
-        mask_g = cv.morphologyEx(mask_g, cv.MORPH_OPEN, self.KERNEL, iterations=1)
-
-        def largest_center(mask):
-            cnts,_ = cv.findContours(mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
-            if not cnts: return None, None
-            c = max(cnts, key=cv.contourArea)
-            if cv.contourArea(c) < self.AREA_MIN: return None, None
-            M = cv.moments(c)
-            if M["m00"] == 0: return None, None
-            cx = int(M["m10"]/M["m00"]); cy = int(M["m01"]/M["m00"])
-            return (cx, cy), c
-
-        green_pt, green_cnt = largest_center(mask_g)
-        return green_pt, green_cnt, mask_g
-
-    def update(self, frame):
+        """녹색 마커 중심. 채도 Sg = G - (R+G+B)/3 > TH  ⇔  G - (R+B)/2 > 1.5*TH 를 uint8 연산만으로 계산.
+        중간 결과는 풀 버퍼에 쓰므로 반환하는 mask_g는 다음 호출 전까지만 유효"""
+        pool, hw = self.pool, frame.shape[:2]
+        b, g, r = (cv.extractChannel(frame, c, dst=pool.get(k, hw)) for c, k in ((0, "sal.b"), (1, "sal.g"), (2, "sal.r")))
+        rb = cv.addWeighted(b, 0.5, r, 0.5, 0, dst=b)
+        sal = cv.subtract(g, rb, dst=r)                       # 음수는 0으로 포화
+        _, mask_g = cv.threshold(sal, self._sal_th, 255, cv.THRESH_BINARY, dst=g)
+        mask_g = cv.morphologyEx(mask_g, cv.MORPH_OPEN, self.KERNEL, dst=pool.get("sal.mask", hw), iterations=1)
+
+        # 연결요소는 남은 화소를 감싸는 사각형에서만 (전체 화면 라벨링이 검출 비용의 절반 이상)
+        x, y, w, h = cv.boundingRect(mask_g)
+        if w * h < self.AREA_MIN: return None, None, mask_g
+        n, _, stats, cents = cv.connectedComponentsWithStatsWithAlgorithm(mask_g[y:y+h, x:x+w], 8, cv.CV_32S, cv.CCL_GRANA,
+                                                                          pool.get("sal.labels", (h, w), np.int32))
+        if n <= 1: return None, None, mask_g
+        k = 1 + int(np.argmax(stats[1:, cv.CC_STAT_AREA]))
+        if stats[k, cv.CC_STAT_AREA] < self.AREA_MIN: return None, None, mask_g
+        cx, cy = cents[k]
+        bx, by, bw, bh = (int(v) for v in stats[k, :4])
+        return (int(cx) + x, int(cy) + y), (bx + x, by + y, bw, bh), mask_g
+
+    def _track_roi(self, pt, box, W, H):
+        """다음 프레임 탐색 영역: 마커 박스 + 여유 (못 찾으면 전체 화면)"""
+        if pt is None: self.roi_green = None; return
+        bx, by, bw, bh = box
+        pad = max(self.ROI_PAD, 2 * max(bw, bh))
+        x0, y0 = max(0, bx - pad), max(0, by - pad)
+        x1, y1 = min(W, bx + bw + pad), min(H, by + bh + pad)
+        self.roi_green = (x0, y0, x1 - x0, y1 - y0)
+
+    def update(self, frame, ts=None):
+        """ts: 프레임 캡처 시각 (없으면 현재 시각). 검출되면 brake_series에 기록"""
         if frame is None: return frame, ""
-        view = frame.copy()
+        ts = clock.now() if ts is None else ts
+        view = frame             # 그릴 게 있을 때만 풀 버퍼로 복사 (캡처 프레임은 건드리지 않음)
         H, W = frame.shape[:2]
 
         if self.roi_green:
@@ -55,10 +102,19 @@ class PedalTracker:
         else:
             crop_green = frame; x, y = 0, 0
 
-        green_pt, green_cnt, mask_g = self.find_point_by_saliency(crop_green)
+        green_pt, green_box, mask_g = self.find_point_by_saliency(crop_green)
+        if green_pt is None and self.roi_green:        # ROI에서 놓치면 전체 화면에서 다시
+            x, y = 0, 0
+            green_pt, green_box, mask_g = self.find_point_by_saliency(frame)
+        if green_pt:
+            green_box = (green_box[0]+x, green_box[1]+y, green_box[2], green_box[3])
+        self._track_roi(green_pt, green_box, W, H)
         action_text = ""
 
-        if green_pt and self.full_brake_path and self.is_calibrated:
+        if green_pt and self._capture is not None:
+            self._collect((green_pt[0]+x, green_pt[1]+y))
+
+        if green_pt and self.brake_path and self.is_calibrated:
             gx, gy = green_pt[0]+x, green_pt[1]+y
             self.ema_green = gy if self.ema_green is None else self.alpha*self.ema_green + (1-self.alpha)*gy
             if self.init_green_y is None:
@@ -66,34 +122,87 @@ class PedalTracker:
             elif abs(gy - self.init_green_y) >= self.THRESH_DIFF:
                 action_text = "BRAKE"
 
-            idx = self.find_nearest_index(self.full_brake_path, (gx, gy))
-            self._brake_percent = idx
+            pct, _ = self.brake_path.project((gx, gy))
+            self.brake_series.append(pct, ts)
+            self._ema_percent = pct if self._ema_percent is None else self.alpha*self._ema_percent + (1-self.alpha)*pct
+            self._brake_percent = self._ema_percent
+            view = self.pool.ring("view", frame.shape, n=self.VIEW_RING); np.copyto(view, frame)
             cv.circle(view, (gx, gy), 8, (0, 255, 0), -1)
-            cv.putText(view, f"BRAKE: {self._brake_percent}%", (gx+10, gy-10),
+            cv.putText(view, f"BRAKE: {self._brake_percent:.1f}%", (gx+10, gy-10),
                        cv.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,0), 2)
         return view, action_text
 
     def get_brake_percent(self): return self._brake_percent
 
+    def get_brake_rate(self, window=0.1):
+        """최근 window초 brake % 변화율(%/s, 최소자승 기울기). FPGA check_pedal과 같은 단위"""
+        t, v = self.brake_series.window()
+        if len(t) < 2: return 0.0
+        k = int(np.searchsorted(t, t[-1] - window, side="left"))
+        t, v = t[k:], v[k:].astype(np.float64)
+        if len(t) < 2:
+            t, v = self.brake_series.window(2); v = v.astype(np.float64)
+        dt = t - t.mean()
+        den = float(np.dot(dt, dt))
+        return float(np.dot(dt, v - v.mean()) / den) if den > 0 else 0.0
+
+    def brake_at(self, ts):
+        """임의 시각의 brake % (기록된 샘플 선형 보간)"""
+        t, v = self.brake_series.window()
+        return float(np.interp(ts, t, v)) if len(t) else 0.0
+
+    # ── 캘리브레이션
+    def _build_path(self):
+        full = self.full_pos or (self.zero_pos[0], self.zero_pos[1] + self.FULL_OFFSET_DEFAULT)
+        self.brake_path = BrakePath([self.zero_pos, *self.mid_points, full])
+        self.is_calibrated = True
+
     def calibrate_brake_simple(self, frame):
+        """현재 마커 위치를 0%로 (끝점은 실측 전까지 +FULL_OFFSET_DEFAULT px 가정)"""
         if frame is None: return False
         green_pt, _, _ = self.find_point_by_saliency(frame)
         if green_pt:
             self.zero_pos = green_pt
-            self.full_pos = (green_pt[0], green_pt[1] + 50)
-            self.full_brake_path = [
-                ( int(self.zero_pos[0] + (self.full_pos[0]-self.zero_pos[0])*i/(self.path_points-1)),
-                  int(self.zero_pos[1] + (self.full_pos[1]-self.zero_pos[1])*i/(self.path_points-1)) )
-                for i in range(self.path_points)
-            ]
-            self.is_calibrated = True
+            self._build_path()
             return True
         return False
 
+    def begin_capture(self, kind):
+        """다음 CALIB_FRAMES개 검출 평균을 kind("zero" | "mid" | "full") 점으로 기록"""
+        if kind not in ("zero", "mid", "full"): raise ValueError(kind)
+        self._capture = (kind, [])
+
+    @property
+    def capturing(self): return self._capture is not None
+
+    def _collect(self, pt):
+        kind, pts = self._capture
+        pts.append(pt)
+        if len(pts) < self.CALIB_FRAMES: return
+        self._capture = None
+        self.set_calibration_point(kind, tuple(np.mean(pts, axis=0)))
+
+    def set_calibration_point(self, kind, pt):
+        if kind == "zero":
+            self.zero_pos = pt; self.mid_points = []
+        elif kind == "mid":
+            self.mid_points.append(pt)
+        else:
+            self.full_pos = pt; self.full_calibrated = True
+        if self.zero_pos is not None: self._build_path()
+        self._ema_percent = None
+        print(f"[Pedal] {kind} position set: ({pt[0]:.1f}, {pt[1]:.1f})")
+
     def recalibrate(self):
         self.ema_green = None
+        self.roi_green = None
         self.init_green_y = None
-        self._brake_percent = 0
+        self._brake_percent = 0.0
+        self._ema_percent = None
         self.zero_pos = self.full_pos = None
-        self.full_brake_path = None
+        self.mid_points = []
+        self.brake_path = None
         self.is_calibrated = False
+        self.full_calibrated = False
+        self._capture = None
+        self.brake_series = RingSeries(self.brake_series.capacity)